@@ -34,7 +34,10 @@ ALLOWED_HOSTS = []
 
 INSTALLED_APPS = [
     'rest_framework',
-    'rest_framework_simplejwt',
+    # rest_framework_simplejwt n'est pas une application installée : elle
+    # n'apporte que ses traductions, et ses réglages importent django.test
+    # (~50 ms au démarrage). JWTAuthentication est chargée à la première
+    # requête (ou par le préchargement).
     'corsheaders',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -48,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'tournois.profilage.ProfilageMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'tournois.shards.ShardMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -80,9 +85,12 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Moteur avec pool de connexions (voir tournois/connexions/) : une
+# connexion est gardée CONN_MAX_AGE secondes et testée avant d'être
+# reprise si elle est restée inutilisée (CONN_HEALTH_CHECKS).
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'tournois.connexions.mysql',
         'NAME': 'smartsportvt',
         'USER': 'root',
         'PASSWORD': '',
@@ -90,10 +98,27 @@ DATABASES = {
         'PORT': '3306',
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-        }
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Pool de connexions, par base et par processus : POOL_TAILLE connexions
+# au plus, une requête attend POOL_ATTENTE secondes qu'une connexion se
+# libère, une connexion libre depuis POOL_CONTROLE_APRES secondes est
+# testée avant d'être reprise.
+POOL_TAILLE = 10
+POOL_ATTENTE = 5
+POOL_CONTROLE_APRES = 5
+
+# Partitionnement par organisateur (voir tournois/shards.py) : alias des
+# bases qui reçoivent les données de tournoi, par exemple
+# ['default', 'shard1', 'shard2'], puis manage.py migrate --database=shard1
+# ... et manage.py preparer_shards. Vide : tout reste dans 'default'.
+SHARDS = []
+DATABASE_ROUTERS = ['tournois.shards.RouteurShards']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -113,6 +138,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hachage des mots de passe (voir tournois/mots_de_passe.py) : le premier
+# algorithme sert aux nouveaux hachages, les suivants ne font que vérifier
+# les anciens (recalculés à la connexion). Pour passer à argon2 :
+# pip install argon2-cffi, puis placer Argon2Hacheur en tête.
+PASSWORD_HASHERS = [
+    'tournois.mots_de_passe.PBKDF2Hacheur',
+    'tournois.mots_de_passe.Argon2Hacheur',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# PBKDF2-SHA256 : le défaut de Django 5.2 (1 000 000 itérations, au-dessus
+# des 600 000 recommandées par l'OWASP) ; argon2id : 19 Mio, 2 passes,
+# 1 fil (OWASP). Un coût plus bas accélère les connexions, mais aussi les
+# attaques hors ligne : mesurer avec manage.py bench_mots_de_passe avant
+# de le changer. Les hachages existants ne sont recalculés que vers un
+# coût plus élevé.
+HACHAGE_PBKDF2_ITERATIONS = 1_000_000
+HACHAGE_ARGON2 = {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -163,7 +207,8 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': False,
-    'BLACKLIST_AFTER_ROTATION': True,
+    # La liste noire demande l'application token_blacklist, non installée
+    'BLACKLIST_AFTER_ROTATION': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -172,4 +217,40 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    # Utilisateur n'a pas de champ is_active
+    'CHECK_USER_IS_ACTIVE': False,
 }
+
+# Profilage à la demande (voir tournois/profilage.py) : une requête sur
+# PROFILAGE_ECHANTILLON est profilée (0 : seulement avec un jeton), les
+# PROFILAGE_TAMPON derniers profils sont gardés dans le cache.
+PROFILAGE_ECHANTILLON = 0
+PROFILAGE_TAMPON = 20
+PROFILAGE_DUREE_JETON = 3600
+PROFILAGE_INTERVALLE = 0.001
+
+# Cache (flux calendrier, ...). En production, utiliser un cache partagé
+# (Redis, Memcached) pour que les invalidations soient vues par tous les workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'smartsport-vt',
+    }
+}
+
+# Préchargement avant le fork (gunicorn --preload) : vues, résolveur
+# d'URL et classes DRF sont chargés par wsgi.py / asgi.py dans le
+# processus maître (voir tournois/demarrage.py).
+PRECHARGEMENT = False
+
+# Journal des changements (voir tournois/changements.py) : âge d'une
+# ligne avant de sonder le trou de séquence qui la précède, attente
+# d'un verrou pendant le sondage, attente maximale d'un long-poll
+# (secondes), puis rétention en jours (manage.py compacter_changements,
+# à lancer chaque nuit).
+CHANGEMENTS_DELAI = 5
+CHANGEMENTS_ATTENTE_VERROU = 1
+CHANGEMENTS_ATTENTE_MAX = 25
+CHANGEMENTS_INTERVALLE = 0.5
+CHANGEMENTS_RETENTION = 7
+CHANGEMENTS_RETENTION_SUPPRESSIONS = 30
@@ -1,11 +1,13 @@
-from django.views.generic import TemplateView
 from django.contrib import admin
-from django.urls import path
-from .views import register
-from backend.views import SyncSupabaseUser  # Import correct
+from django.urls import include, path
+
+from tournois.demarrage import vue
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/sync-user/', SyncSupabaseUser.as_view(), name='sync_user'),
-    path('api/register/', register, name='register'),
+    path('api/register/', vue('backend.views.register'), name='register'),
+    path('api/login/', vue('backend.views.login'), name='login'),
+    path('api/token/refresh/', vue('backend.views.refresh'),
+         name='token-refresh'),
+    path('', include('tournois.urls')),
 ]
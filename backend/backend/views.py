@@ -1,6 +1,14 @@
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from .models import Utilisateur
+from rest_framework.decorators import (
+    api_view, authentication_classes, permission_classes,
+)
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from tournois import mots_de_passe
+from tournois.models import Utilisateur
 
 
 @csrf_exempt  # Temporaire pour les tests, à retirer en production
@@ -34,3 +42,71 @@ def register(request):
         {"status": "error", "message": "Méthode non autorisée"},
         status=405
     )
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def login(request):
+    """Vérifie email / mot de passe et retourne un jeton d'accès JWT (en-tête
+    Authorization: Bearer) et son jeton de rafraîchissement
+    (/api/token/refresh/) ; un hachage moins coûteux que celui des settings
+    est recalculé au passage (voir tournois/mots_de_passe.py).
+
+    Vue DRF sans authentification : pas de contrôle CSRF, le jeton n'est
+    pas un cookie.
+    """
+    data = request.data
+    if not isinstance(data, dict):
+        return Response(
+            {"status": "error", "message": "Objet JSON attendu"},
+            status=400
+        )
+
+    utilisateur = Utilisateur.objects.filter(email=data.get('email')).first()
+    if utilisateur is None:
+        # Même coût qu'un mauvais mot de passe : la durée de la réponse
+        # ne dit pas si l'email existe
+        mots_de_passe.hacher(data.get('password') or '')
+    elif mots_de_passe.verifier(utilisateur, data.get('password')):
+        jeton = RefreshToken.for_user(utilisateur)
+        return Response({
+            "status": "success",
+            "user_id": utilisateur.pk,
+            "role": utilisateur.role,
+            "access": str(jeton.access_token),
+            "refresh": str(jeton),
+        })
+    return Response(
+        {"status": "error", "message": "Identifiants invalides"},
+        status=401
+    )
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def refresh(request):
+    """Nouveau jeton d'accès à partir du jeton de rafraîchissement de login.
+
+    Remplace TokenRefreshView de simplejwt, dont les sérialiseurs lisent
+    USERNAME_FIELD sur le modèle utilisateur, absent d'Utilisateur.
+    """
+    data = request.data
+    valeur = data.get('refresh') if isinstance(data, dict) else None
+    if not isinstance(valeur, str) or not valeur:
+        # RefreshToken(None) créerait un nouveau jeton
+        return Response(
+            {"status": "error", "message": "Champ refresh attendu"},
+            status=400
+        )
+    try:
+        jeton = RefreshToken(valeur)
+    except TokenError as e:
+        return Response({"status": "error", "message": str(e)}, status=401)
+    if not Utilisateur.objects.filter(pk=jeton['user_id']).exists():
+        return Response(
+            {"status": "error", "message": "Utilisateur introuvable"},
+            status=401
+        )
+    return Response({"access": str(jeton.access_token)})
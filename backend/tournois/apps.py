@@ -6,3 +6,6 @@ class TournoisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tournois'  # Doit correspondre exactement au nom du dossier
     # label = 'tournois'  # Optionnel - si présent, doit être unique
+
+    def ready(self):
+        from . import signals  # noqa: F401 - enregistre les receivers
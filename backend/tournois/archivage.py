@@ -0,0 +1,177 @@
+# tournois/archivage.py
+"""
+Archivage des tournois terminés.
+
+Un tournoi terminé depuis un certain temps est déplacé, avec ses
+rencontres, vers TournoiArchive / RencontreArchive. Les lignes qui en
+dépendent (inscriptions, places, format mixte, exemptions, notifications
+des rencontres) sont déplacées avec eux : supprimer le tournoi ne doit
+rien effacer en cascade. Les paiements
+n'étant pas liés à un tournoi, ceux dont le statut est définitif sont
+archivés selon leur ancienneté. Chaque lot est copié puis supprimé
+dans sa propre transaction courte : aucun verrou long sur les tables
+chaudes, et une interruption laisse chaque ligne d'un seul côté. Le
+journal des changements reçoit un 'archivage' par objet journalisé
+déplacé, et non une suppression.
+
+Les fonctions de lecture en bas du module interrogent la table chaude
+puis l'archive, l'appelant n'a pas à savoir où se trouve la donnée.
+"""
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.utils import timezone
+
+from . import changements, recettes, shards, statistiques
+from .models import (
+    Exemption,
+    ExemptionArchive,
+    FormatMixte,
+    FormatMixteArchive,
+    Inscription,
+    InscriptionArchive,
+    InstantaneTournoi,
+    Notification,
+    NotificationArchive,
+    Paiement,
+    PaiementArchive,
+    PlacesTournoi,
+    PlacesTournoiArchive,
+    Rencontre,
+    RencontreArchive,
+    Tournoi,
+    TournoiArchive,
+)
+
+TAILLE_LOT = 1000
+STATUTS_PAIEMENT_DEFINITIFS = ('paye', 'refuse', 'rembourse')
+
+
+def _colonnes(source, archive):
+    """Colonnes de `source` conservées dans `archive`."""
+    conservees = {champ.attname for champ in archive._meta.concrete_fields}
+    return [champ.attname for champ in source._meta.concrete_fields
+            if champ.attname in conservees]
+
+
+def _deplacer(source, archive, ids):
+    """Copie les lignes `ids` de `source` vers `archive` puis les supprime.
+
+    À appeler dans une transaction.
+    """
+    lignes = source.objects.filter(pk__in=ids).values(*_colonnes(source, archive))
+    archive.objects.bulk_create([archive(**ligne) for ligne in lignes])
+    with changements.suspendre():
+        source.objects.filter(pk__in=ids).delete()
+    if source._meta.model_name in changements.MODELES:
+        changements.enregistrer('archivage', [source(pk=pk) for pk in ids],
+                                router.db_for_write(source))
+
+
+def _par_lots(queryset, source, archive, taille_lot):
+    """Déplace les lignes de `queryset` lot par lot ; retourne le total."""
+    total = 0
+    while True:
+        with transaction.atomic(using=router.db_for_write(source)):
+            ids = list(queryset.order_by('pk').values_list(
+                'pk', flat=True)[:taille_lot])
+            if not ids:
+                return total
+            _deplacer(source, archive, ids)
+        total += len(ids)
+
+
+def tournois_archivables(avant=None):
+    """Tournois terminés dont la date de fin précède `avant`
+    (par défaut : il y a 90 jours)."""
+    if avant is None:
+        avant = timezone.now() - timedelta(days=90)
+    return Tournoi.objects.filter(statut='termine', date_fin__lt=avant)
+
+
+def archiver_tournoi(tournoi_id, taille_lot=TAILLE_LOT):
+    """Archive un tournoi, ses rencontres et leurs dépendances ; retourne
+    le nombre de rencontres déplacées.
+
+    Les statistiques agrégées ne sont pas modifiées : les rencontres
+    archivées y restent comptées.
+    """
+    # L'instantané serait reconstruit à chaque lot ; le tournoi archivé se
+    # lit par la lecture unifiée ci-dessous.
+    InstantaneTournoi.objects.filter(tournoi_id=tournoi_id).delete()
+    with statistiques.suspendre():
+        _par_lots(Notification.objects.filter(rencontre__tournoi_id=tournoi_id),
+                  Notification, NotificationArchive, taille_lot)
+        nb_rencontres = _par_lots(
+            Rencontre.objects.filter(tournoi_id=tournoi_id),
+            Rencontre, RencontreArchive, taille_lot)
+    for source, archive in ((Inscription, InscriptionArchive),
+                            (Exemption, ExemptionArchive)):
+        _par_lots(source.objects.filter(tournoi_id=tournoi_id),
+                  source, archive, taille_lot)
+    with transaction.atomic(using=router.db_for_write(Tournoi)):
+        _deplacer(PlacesTournoi, PlacesTournoiArchive, [tournoi_id])
+        _deplacer(FormatMixte, FormatMixteArchive, [tournoi_id])
+        _deplacer(Tournoi, TournoiArchive, [tournoi_id])
+    return nb_rencontres
+
+
+def archiver_paiements(avant, taille_lot=TAILLE_LOT):
+    """Archive les paiements définitifs antérieurs à `avant`.
+
+    Les recettes agrégées ne sont pas modifiées : les paiements archivés
+    y restent comptés.
+    """
+    queryset = Paiement.objects.filter(
+        statut__in=STATUTS_PAIEMENT_DEFINITIFS, date_paiement__lt=avant)
+    with recettes.suspendre():
+        return _par_lots(queryset, Paiement, PaiementArchive, taille_lot)
+
+
+def archiver(avant=None, taille_lot=TAILLE_LOT, paiements_avant=None):
+    """Archive tous les tournois éligibles (et les vieux paiements si
+    `paiements_avant` est fourni). Retourne un résumé."""
+    resume = {'tournois': 0, 'rencontres': 0, 'paiements': 0}
+    for alias in shards.bases():
+        with shards.sur(alias):
+            ids = list(tournois_archivables(avant).values_list('pk', flat=True))
+            for tournoi_id in ids:
+                resume['rencontres'] += archiver_tournoi(tournoi_id, taille_lot)
+                resume['tournois'] += 1
+    if paiements_avant is not None:
+        resume['paiements'] = archiver_paiements(paiements_avant, taille_lot)
+    return resume
+
+
+# Lecture unifiée
+
+def tournoi(tournoi_id):
+    """Tournoi sous forme de dictionnaire, chaud ou archivé (None sinon)."""
+    colonnes = _colonnes(Tournoi, TournoiArchive)
+    ligne = Tournoi.objects.filter(pk=tournoi_id).values(*colonnes).first()
+    if ligne is not None:
+        return {**ligne, 'archive': False}
+    ligne = TournoiArchive.objects.filter(pk=tournoi_id).values(*colonnes).first()
+    if ligne is not None:
+        return {**ligne, 'archive': True}
+    return None
+
+
+def rencontres(tournoi_id):
+    """Rencontres d'un tournoi, triées par date, où qu'elles soient."""
+    colonnes = _colonnes(Rencontre, RencontreArchive)
+    lignes = list(Rencontre.objects.filter(
+        tournoi_id=tournoi_id).values(*colonnes))
+    lignes += list(RencontreArchive.objects.filter(
+        tournoi_id=tournoi_id).values(*colonnes))
+    return sorted(lignes, key=lambda ligne: ligne['date_heure'])
+
+
+def paiements(joueur_id):
+    """Paiements d'un joueur, les plus récents d'abord, archives comprises."""
+    colonnes = _colonnes(Paiement, PaiementArchive)
+    lignes = list(Paiement.objects.filter(
+        joueur_id=joueur_id).values(*colonnes))
+    lignes += list(PaiementArchive.objects.filter(
+        joueur_id=joueur_id).values(*colonnes))
+    return sorted(lignes, key=lambda ligne: ligne['date_paiement'], reverse=True)
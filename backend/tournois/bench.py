@@ -0,0 +1,162 @@
+# tournois/bench.py
+"""
+Outils communs aux commandes de benchmark (manage.py bench_*).
+
+Les données générées vivent dans une transaction annulée à la fin :
+un benchmark peut tourner sur une base de développement sans la salir.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import inscriptions
+from .models import (
+    Equipe,
+    Joueur,
+    JoueurEquipe,
+    Organisateur,
+    Rencontre,
+    Tournoi,
+    Utilisateur,
+)
+
+
+@contextmanager
+def donnees_temporaires(using='default'):
+    """Transaction annulée à la sortie du bloc."""
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def ajouter_base(alias, chemin):
+    """Déclare une base SQLite temporaire (un fichier par shard : SQLite
+    n'admet qu'un écrivain à la fois par fichier)."""
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3', 'NAME': chemin,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 30},
+    }
+    connections.settings[alias] = connections.configure_settings(
+        {**settings.DATABASES, alias: config})[alias]
+    settings.DATABASES[alias] = connections.settings[alias]
+
+
+def retirer_base(alias):
+    connections[alias].close()
+    del connections[alias]
+    # connections.settings est en général settings.DATABASES lui-même
+    connections.settings.pop(alias, None)
+    settings.DATABASES.pop(alias, None)
+
+
+def chronometrer(fonction, repetitions=20):
+    """Exécute `fonction` plusieurs fois et retourne les durées en ms."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return {
+        'mediane_ms': round(statistics.median(durees), 3),
+        'p95_ms': round(durees[int(len(durees) * 0.95) - 1], 3),
+        'min_ms': round(durees[0], 3),
+    }
+
+
+def _utilisateurs(prefixe, nombre, role):
+    """Crée des utilisateurs sans passer par save() (pas de hachage)."""
+    Utilisateur.objects.bulk_create([
+        Utilisateur(nom=f'{prefixe} {i}', email=f'{prefixe}-{i}@bench.local',
+                    motDePasse='!', role=role)
+        for i in range(nombre)
+    ], batch_size=1000)
+    return list(Utilisateur.objects.filter(
+        email__endswith='@bench.local', email__startswith=f'{prefixe}-'
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def joueurs(prefixe, nombre):
+    """Crée des joueurs (utilisateur et profil) ; leurs adresses sont
+    f'{prefixe}-{i}@bench.local'. Retourne leurs identifiants."""
+    joueur_ids = _utilisateurs(prefixe, nombre, 'joueur')
+    Joueur.objects.bulk_create(
+        [Joueur(utilisateur_id=pk) for pk in joueur_ids], batch_size=1000)
+    return joueur_ids
+
+
+def generer(tournois=10, equipes=16, rencontres_par_tournoi=50,
+            joueurs_par_equipe=0, ratio_termines=0.5, prefixe='bench'):
+    """Génère un jeu de données synthétique en bulk_create.
+
+    Les premiers tournois (selon `ratio_termines`) sont terminés depuis
+    un an, les autres sont planifiés. Retourne les objets principaux.
+    """
+    org_id = _utilisateurs(f'{prefixe}-org', 1, 'organisateur')[0]
+    organisateur = Organisateur.objects.create(
+        utilisateur_id=org_id, nom_organisation=f'{prefixe} organisation')
+
+    Equipe.objects.bulk_create([
+        Equipe(nom=f'{prefixe} equipe {i}', organisateur=organisateur)
+        for i in range(equipes)
+    ])
+    equipe_ids = list(Equipe.objects.filter(
+        organisateur=organisateur).order_by('pk').values_list('pk', flat=True))
+
+    if joueurs_par_equipe:
+        joueur_ids = joueurs(f'{prefixe}-joueur', equipes * joueurs_par_equipe)
+        JoueurEquipe.objects.bulk_create([
+            JoueurEquipe(
+                joueur_id=joueur_id,
+                equipe_id=equipe_ids[i // joueurs_par_equipe],
+                role='capitaine' if i % joueurs_par_equipe == 0 else 'membre')
+            for i, joueur_id in enumerate(joueur_ids)
+        ], batch_size=1000)
+
+    maintenant = timezone.now()
+    nb_termines = int(tournois * ratio_termines)
+    Tournoi.objects.bulk_create([
+        Tournoi(
+            nom=f'{prefixe} tournoi {i}', description='', type='round-robin',
+            date_debut=maintenant + timedelta(days=-365 if i < nb_termines else 7),
+            date_fin=maintenant + timedelta(days=-360 if i < nb_termines else 14),
+            statut='termine' if i < nb_termines else 'planifie',
+            prix_inscription=Decimal('10.00'),
+            organisateur=organisateur)
+        for i in range(tournois)
+    ])
+    # bulk_create ne renseigne pas les pk sous MySQL
+    tournois_crees = list(
+        Tournoi.objects.filter(organisateur=organisateur).order_by('pk'))
+    # Ni les signaux
+    inscriptions.creer_compteurs([tournoi.pk for tournoi in tournois_crees])
+
+    rencontres = []
+    for tournoi in tournois_crees:
+        termine = tournoi.statut == 'termine'
+        for n in range(rencontres_par_tournoi):
+            e1 = equipe_ids[n % len(equipe_ids)]
+            e2 = equipe_ids[(n + 1 + n // len(equipe_ids)) % len(equipe_ids)]
+            if e1 == e2:
+                e2 = equipe_ids[(n + 1) % len(equipe_ids)]
+            rencontres.append(Rencontre(
+                tournoi=tournoi, nom=f'{e1} vs {e2}',
+                date_heure=tournoi.date_debut + timedelta(hours=n),
+                equipe1_id=e1, equipe2_id=e2,
+                score1=n % 4 if termine else None,
+                score2=n % 3 if termine else None,
+                statut='termine' if termine else 'planifie',
+                terrain=f'Terrain {n % 8}'))
+    Rencontre.objects.bulk_create(rencontres, batch_size=1000)
+
+    return {
+        'organisateur': organisateur,
+        'equipe_ids': equipe_ids,
+        'tournois': tournois_crees,
+    }
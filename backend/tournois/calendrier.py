@@ -0,0 +1,256 @@
+# tournois/calendrier.py
+"""
+Flux iCalendar des rencontres, par équipe, joueur, arbitre ou tournoi.
+
+Les applications de calendrier interrogent ces flux en boucle. Chaque
+flux a une date de mise à jour gardée dans le cache ; elle ne change
+que lorsqu'une rencontre du flux change de date, de terrain, de statut
+(ou apparaît / disparaît). Elle sert d'ETag et de Last-Modified, de
+sorte qu'un abonné à jour reçoit un 304 sans requête SQL. Le corps est
+généré en streaming à partir d'un itérateur, puis gardé en cache pour
+les appels suivants.
+
+L'URL d'un flux ne contient pas ses identifiants mais un jeton signé,
+propre à chaque abonné (jeton()) : elle ne se devine pas, et le jeton
+se vérifie sans requête.
+"""
+import hashlib
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from operator import itemgetter
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from . import shards
+from .models import JoueurEquipe, Rencontre
+
+TYPES_FLUX = ('equipe', 'joueur', 'arbitre', 'tournoi')
+# Champs dont la modification change le contenu d'un flux
+CHAMPS_CALENDRIER = ('date_heure', 'terrain', 'statut', 'nom', 'duree')
+DUREE_CACHE = 24 * 3600
+HISTORIQUE = timedelta(days=90)
+DUREE_PAR_DEFAUT = 60  # minutes
+PRODID = '-//SmartSport VT//Calendrier des rencontres//FR'
+SEL = 'tournois.calendrier'
+
+
+# Jetons d'abonnement
+
+def jeton(type_flux, objet_id, abonne_id):
+    """Jeton d'un utilisateur pour un flux, à placer dans l'URL du flux."""
+    return signing.Signer(salt=SEL).sign_object(
+        [type_flux, objet_id, abonne_id])
+
+
+def flux_du_jeton(valeur):
+    """(type_flux, objet_id) d'un jeton, None s'il n'est pas valide."""
+    try:
+        type_flux, objet_id, _ = signing.Signer(salt=SEL).unsign_object(valeur)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if type_flux not in TYPES_FLUX or not isinstance(objet_id, int):
+        return None
+    return type_flux, objet_id
+
+
+class JetonCalendrier:
+    """Convertisseur d'URL : <calendrier:flux> reçoit (type_flux,
+    objet_id) ; un jeton invalide ne correspond à aucune route (404)."""
+    regex = r'[-\w.:]+'
+
+    def to_python(self, valeur):
+        flux = flux_du_jeton(valeur)
+        if flux is None:
+            raise ValueError(valeur)
+        return flux
+
+    def to_url(self, valeur):
+        return valeur
+
+
+# Dates de mise à jour des flux
+
+def _cle_maj(type_flux, objet_id):
+    return f'calendrier:maj:{type_flux}:{objet_id}'
+
+
+def _dates_maj(cles):
+    """Dates de mise à jour (ms) ; une entrée absente du cache est
+    initialisée à maintenant, ce qui invalide les copies existantes."""
+    dates = cache.get_many(cles)
+    manquantes = {cle: int(time.time() * 1000) for cle in cles if cle not in dates}
+    if manquantes:
+        cache.set_many(manquantes, DUREE_CACHE)
+        dates.update(manquantes)
+    return [dates[cle] for cle in cles]
+
+
+def invalider(flux):
+    """Marque comme modifiés des flux [(type_flux, objet_id), ...]."""
+    maintenant = int(time.time() * 1000)
+    cache.set_many({_cle_maj(type_flux, objet_id): maintenant
+                    for type_flux, objet_id in flux
+                    if objet_id is not None}, DUREE_CACHE)
+
+
+def flux_de_rencontre(etat):
+    """Flux qui contiennent une rencontre ; `etat` est un dict de champs
+    (tournoi_id, equipe1_id, equipe2_id, arbitre_id). Les flux joueur
+    dépendent de ceux de leurs équipes (voir version())."""
+    return [
+        ('tournoi', etat.get('tournoi_id')),
+        ('equipe', etat.get('equipe1_id')),
+        ('equipe', etat.get('equipe2_id')),
+        ('arbitre', etat.get('arbitre_id')),
+    ]
+
+
+def changement_visible(avant, apres):
+    """Vrai si un flux doit être régénéré entre deux états."""
+    if avant is None or apres is None:
+        return True
+    champs = CHAMPS_CALENDRIER + (
+        'tournoi_id', 'equipe1_id', 'equipe2_id', 'arbitre_id')
+    return any(avant.get(champ) != apres.get(champ) for champ in champs)
+
+
+def _equipes_sur_la_base(joueur_id):
+    return list(JoueurEquipe.objects.filter(
+        joueur_id=joueur_id).values_list('equipe_id', flat=True))
+
+
+def _equipes_du_joueur(joueur_id):
+    """Équipes d'un joueur, sur tous les shards sans shard courant."""
+    return sorted(itertools.chain.from_iterable(
+        shards.rassembler_si_disperse(_equipes_sur_la_base, joueur_id)))
+
+
+def version(type_flux, objet_id):
+    """(etag, dernière modification) d'un flux.
+
+    Un flux joueur combine sa propre date (changement d'effectif) avec
+    celles de ses équipes : une seule requête, indexée, sur JoueurEquipe.
+    """
+    cles = [_cle_maj(type_flux, objet_id)]
+    if type_flux == 'joueur':
+        cles += [_cle_maj('equipe', equipe_id)
+                 for equipe_id in _equipes_du_joueur(objet_id)]
+    dates = _dates_maj(cles)
+    empreinte = hashlib.sha1(
+        '|'.join(f'{cle}={date}' for cle, date in zip(cles, dates)).encode()
+    ).hexdigest()[:20]
+    derniere = datetime.fromtimestamp(max(dates) / 1000, tz=dt_timezone.utc)
+    return empreinte, derniere
+
+
+# Génération
+
+def _queryset(type_flux, objet_id):
+    depuis = timezone.now() - HISTORIQUE
+    queryset = Rencontre.objects.filter(date_heure__gte=depuis)
+    if type_flux == 'equipe':
+        queryset = queryset.filter(Q(equipe1_id=objet_id) | Q(equipe2_id=objet_id))
+    elif type_flux == 'joueur':
+        equipe_ids = _equipes_sur_la_base(objet_id)
+        queryset = queryset.filter(
+            Q(equipe1_id__in=equipe_ids) | Q(equipe2_id__in=equipe_ids))
+    elif type_flux == 'arbitre':
+        queryset = queryset.filter(arbitre_id=objet_id)
+    else:
+        queryset = queryset.filter(tournoi_id=objet_id)
+    return queryset.order_by('date_heure').values_list('pk', *CHAMPS_CALENDRIER)
+
+
+def _rencontres(type_flux, objet_id):
+    """Lignes du flux par date. Les flux joueur et arbitre n'ont pas de
+    shard : sans shard courant, chaque shard est lu et les lignes
+    fusionnées."""
+    if shards.disperse():
+        return heapq.merge(*shards.rassembler(
+            lambda: list(_queryset(type_flux, objet_id))), key=itemgetter(1))
+    return _queryset(type_flux, objet_id).iterator(chunk_size=500)
+
+
+def _echapper(texte):
+    return (texte.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _plier(ligne):
+    """Coupe une ligne à 75 octets (RFC 5545, 3.1)."""
+    octets = ligne.encode()
+    if len(octets) <= 75:
+        return ligne + '\r\n'
+    morceaux, courant = [], ''
+    for caractere in ligne:
+        limite = 75 if not morceaux else 74
+        if len((courant + caractere).encode()) > limite:
+            morceaux.append(courant)
+            courant = ''
+        courant += caractere
+    morceaux.append(courant)
+    return '\r\n '.join(morceaux) + '\r\n'
+
+
+def _date_ical(valeur):
+    return valeur.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+STATUTS_ICAL = {
+    'annule': 'CANCELLED',
+    'reporte': 'TENTATIVE',
+}
+
+
+def _evenement(ligne, horodatage):
+    pk, date_heure, terrain, statut, nom, duree = ligne
+    fin = date_heure + timedelta(minutes=duree or DUREE_PAR_DEFAUT)
+    lignes = [
+        'BEGIN:VEVENT',
+        f'UID:rencontre-{pk}@smartsport-vt',
+        f'DTSTAMP:{horodatage}',
+        f'DTSTART:{_date_ical(date_heure)}',
+        f'DTEND:{_date_ical(fin)}',
+        f'SUMMARY:{_echapper(nom)}',
+        f'STATUS:{STATUTS_ICAL.get(statut, "CONFIRMED")}',
+    ]
+    if terrain:
+        lignes.append(f'LOCATION:{_echapper(terrain)}')
+    lignes.append('END:VEVENT')
+    return ''.join(_plier(ligne) for ligne in lignes).encode()
+
+
+def generer(type_flux, objet_id, derniere_maj):
+    """Générateur du corps iCalendar, morceau par morceau."""
+    horodatage = _date_ical(derniere_maj)
+    yield (
+        'BEGIN:VCALENDAR\r\nVERSION:2.0\r\n'
+        f'PRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\n'
+        f'X-WR-CALNAME:{type_flux} {objet_id}\r\n'
+    ).encode()
+    for ligne in _rencontres(type_flux, objet_id):
+        yield _evenement(ligne, horodatage)
+    yield b'END:VCALENDAR\r\n'
+
+
+def _cle_corps(type_flux, objet_id, etag):
+    return f'calendrier:corps:{type_flux}:{objet_id}:{etag}'
+
+
+def corps_en_cache(type_flux, objet_id, etag):
+    return cache.get(_cle_corps(type_flux, objet_id, etag))
+
+
+def generer_et_cacher(type_flux, objet_id, etag, derniere_maj):
+    """Diffuse le flux et le met en cache une fois entièrement produit."""
+    morceaux = []
+    for morceau in generer(type_flux, objet_id, derniere_maj):
+        morceaux.append(morceau)
+        yield morceau
+    cache.set(_cle_corps(type_flux, objet_id, etag), b''.join(morceaux),
+              DUREE_CACHE)
@@ -0,0 +1,250 @@
+# tournois/changements.py
+"""
+Journal des changements (change data capture).
+
+Chaque création, modification ou suppression d'un Tournoi, d'une
+Rencontre, d'une Equipe, d'un JoueurEquipe ou d'un Paiement ajoute une
+ligne à Changement, dans la transaction de l'écriture : un changement
+annulé n'apparaît jamais, un changement validé apparaît toujours. Les
+écritures qui ne passent pas par save() (bulk_create, bulk_update) sont
+consignées par le module qui les fait, avec enregistrer(). Un objet
+déplacé vers les archives (archivage.py) n'est pas supprimé : il est
+consigné comme 'archivage'.
+
+Les consommateurs (caches, classements, index de recherche,
+notifications, frontend) lisent le journal après leur dernière
+séquence (GET /api/changements/?since=<seq>) au lieu de relire les
+tables. Le journal est propre à chaque base : avec des shards, un
+consommateur garde une séquence par base (?base=<alias>).
+
+La séquence croît à l'insertion, pas au commit : une transaction
+encore en cours peut détenir une séquence plus petite que celle d'une
+ligne déjà visible. lire() s'arrête donc au premier trou de séquence
+tant qu'il peut encore se remplir :
+
+- suivi d'une ligne de moins de CHANGEMENTS_DELAI secondes, le trou
+  est gardé (l'insertion qui le remplira peut être en cours) ;
+- au-delà, lire() insère à la place des séquences manquantes des
+  lignes 'annulation', jamais renvoyées. L'insertion attend la
+  transaction qui les détient, au plus CHANGEMENTS_ATTENTE_VERROU
+  secondes : elle réussit si la transaction a été annulée (le trou est
+  comblé pour tous les lecteurs), échoue sur un doublon si elle a été
+  validée (ses lignes sont lues au passage suivant) et expire si elle
+  est toujours en cours (le trou reste ouvert) ;
+- suivi d'une ligne de plus de CHANGEMENTS_RETENTION jours, le trou
+  vient d'une compaction et n'est pas sondé.
+
+compacter() (manage.py compacter_changements) ne garde, au-delà de
+CHANGEMENTS_RETENTION jours, que le dernier changement de chaque
+objet, et oublie les suppressions (et archivages) de plus de
+CHANGEMENTS_RETENTION_SUPPRESSIONS jours : un consommateur en retard
+de plus de ce délai doit relire les tables.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connections, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Changement, Equipe, JoueurEquipe, Paiement, Rencontre, Tournoi
+
+MODELES = {
+    modele._meta.model_name: modele
+    for modele in (Tournoi, Rencontre, Equipe, JoueurEquipe, Paiement)
+}
+# Opérations après lesquelles l'objet n'est plus dans sa table
+OPERATIONS_SANS_DONNEES = ('suppression', 'archivage')
+LIMITE_MAX = 5000
+TAILLE_LOT = 1000
+
+_local = threading.local()
+
+
+@contextmanager
+def suspendre():
+    """Désactive le journal, par exemple pour un chargement initial que
+    les consommateurs liront dans les tables."""
+    precedent = est_suspendu()
+    _local.suspendu = True
+    try:
+        yield
+    finally:
+        _local.suspendu = precedent
+
+
+def est_suspendu():
+    return getattr(_local, 'suspendu', False)
+
+
+def _parametre(nom, defaut):
+    return getattr(settings, f'CHANGEMENTS_{nom}', defaut)
+
+
+def donnees(instance):
+    """Colonnes d'une instance, telles qu'enregistrées."""
+    return {champ.attname: champ.value_from_object(instance)
+            for champ in instance._meta.concrete_fields}
+
+
+def enregistrer(operation, instances, using):
+    """Consigne des écritures de la base `using` ; à appeler dans leur
+    transaction."""
+    if est_suspendu():
+        return
+    Changement.objects.using(using).bulk_create([
+        Changement(modele=instance._meta.model_name, objet_id=instance.pk,
+                   operation=operation,
+                   donnees=None if operation in OPERATIONS_SANS_DONNEES
+                   else donnees(instance))
+        for instance in instances
+    ], batch_size=TAILLE_LOT)
+
+
+# Lecture
+
+# Attente d'un verrou, par moteur : (lecture, écriture, valeur en secondes)
+_ATTENTE_VERROU = {
+    'sqlite': ('PRAGMA busy_timeout', 'PRAGMA busy_timeout = {}',
+               lambda secondes: int(secondes * 1000)),
+    'mysql': ('SELECT @@SESSION.innodb_lock_wait_timeout',
+              'SET SESSION innodb_lock_wait_timeout = {}',
+              lambda secondes: max(1, round(secondes))),
+    'postgresql': ('SHOW lock_timeout', "SET lock_timeout = '{}'",
+                   lambda secondes: f'{int(secondes * 1000)}ms'),
+}
+
+
+@contextmanager
+def _attente_verrou(connexion):
+    """Limite à CHANGEMENTS_ATTENTE_VERROU l'attente des verrous de la
+    connexion, le temps d'un bloc hors transaction."""
+    requetes = _ATTENTE_VERROU.get(connexion.vendor)
+    if requetes is None:
+        yield
+        return
+    lecture, ecriture, valeur = requetes
+    with connexion.cursor() as curseur:
+        curseur.execute(lecture)
+        precedente = curseur.fetchone()[0]
+        curseur.execute(ecriture.format(valeur(_parametre('ATTENTE_VERROU', 1))))
+    try:
+        yield
+    finally:
+        with connexion.cursor() as curseur:
+            curseur.execute(ecriture.format(precedente))
+
+
+def _sonder(manquantes, using):
+    """Comble un trou par des lignes 'annulation' ; vrai si ses
+    séquences étaient celles de transactions annulées."""
+    try:
+        with _attente_verrou(connections[using]), transaction.atomic(using=using):
+            Changement.objects.using(using).bulk_create([
+                Changement(sequence=sequence, modele='', objet_id=0,
+                           operation='annulation')
+                for sequence in manquantes
+            ], batch_size=TAILLE_LOT)
+    except IntegrityError:
+        return False  # validée entre-temps
+    except OperationalError:
+        return False  # toujours en cours (délai d'attente dépassé)
+    return True
+
+
+def _trou_definitif(manquantes, suivante, using):
+    age = timezone.now() - suivante.date
+    if age > timedelta(days=_parametre('RETENTION', 7)):
+        return True
+    if age < timedelta(seconds=_parametre('DELAI', 5)):
+        return False
+    return _sonder(manquantes, using)
+
+
+def _sans_trou_ouvert(lignes, since, using):
+    """Lignes jusqu'au premier trou de séquence qui peut encore se
+    remplir (exclu)."""
+    precedente = since
+    for i, ligne in enumerate(lignes):
+        if (precedente and ligne.sequence != precedente + 1
+                and not _trou_definitif(range(precedente + 1, ligne.sequence),
+                                        ligne, using)):
+            return lignes[:i]
+        precedente = ligne.sequence
+    return lignes
+
+
+def _format(changement):
+    return {
+        'sequence': changement.sequence,
+        'modele': changement.modele,
+        'objet_id': changement.objet_id,
+        'operation': changement.operation,
+        'donnees': changement.donnees,
+        'date': changement.date,
+    }
+
+
+def lire(since=0, using='default', modeles=None, limite=500, attente=0):
+    """Changements de la base `using` après la séquence `since`.
+
+    Retourne {'sequence': prochaine valeur de since, 'changements': [...]}.
+    Avec `attente` (secondes), attend qu'un changement arrive s'il n'y
+    en a aucun (long-poll). `modeles` filtre les changements renvoyés ;
+    la séquence avance quand même au-delà des autres.
+    """
+    inconnus = set(modeles or ()) - set(MODELES)
+    if inconnus:
+        raise ValueError(f"Modèle inconnu: {', '.join(sorted(inconnus))} "
+                         f"(possibles: {', '.join(MODELES)})")
+    limite = max(1, min(limite, LIMITE_MAX))
+    fin_attente = time.monotonic() + min(attente, _parametre('ATTENTE_MAX', 25))
+    while True:
+        lignes = _sans_trou_ouvert(list(
+            Changement.objects.using(using).filter(sequence__gt=since)
+            .order_by('sequence')[:limite]), since, using)
+        if lignes or time.monotonic() >= fin_attente:
+            break
+        time.sleep(_parametre('INTERVALLE', 0.5))
+    return {
+        'sequence': lignes[-1].sequence if lignes else since,
+        'changements': [_format(ligne) for ligne in lignes
+                        if ligne.operation != 'annulation'
+                        and (not modeles or ligne.modele in modeles)],
+    }
+
+
+# Compaction
+
+def _supprimer_par_lots(queryset, using):
+    total = 0
+    while True:
+        ids = list(queryset.order_by('sequence').values_list(
+            'sequence', flat=True)[:TAILLE_LOT])
+        if not ids:
+            return total
+        Changement.objects.using(using).filter(sequence__in=ids).delete()
+        total += len(ids)
+
+
+def compacter(using='default', retention=None, retention_suppressions=None):
+    """Compacte le journal d'une base ; retourne (remplacés, suppressions
+    oubliées)."""
+    maintenant = timezone.now()
+    retention = _parametre('RETENTION', 7) if retention is None else retention
+    if retention_suppressions is None:
+        retention_suppressions = _parametre('RETENTION_SUPPRESSIONS', 30)
+    journal = Changement.objects.using(using)
+    plus_recent = journal.filter(
+        modele=OuterRef('modele'), objet_id=OuterRef('objet_id'),
+        sequence__gt=OuterRef('sequence'))
+    remplaces = _supprimer_par_lots(journal.filter(
+        date__lt=maintenant - timedelta(days=retention)).filter(
+        Exists(plus_recent)), using)
+    oubliees = _supprimer_par_lots(journal.filter(
+        operation__in=OPERATIONS_SANS_DONNEES,
+        date__lt=maintenant - timedelta(days=retention_suppressions)), using)
+    return remplaces, oubliees
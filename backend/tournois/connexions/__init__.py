@@ -0,0 +1,272 @@
+# tournois/connexions/__init__.py
+"""
+Pool de connexions borné, par processus.
+
+Les moteurs 'tournois.connexions.mysql' et 'tournois.connexions.sqlite3'
+(ce dernier pour le développement et les tests, sans serveur MySQL)
+reprennent ceux de Django, à une différence près : une connexion n'est
+plus fermée à la fin de la requête mais rendue au pool, et la requête
+suivante la reprend, quel que soit son thread. C'est ce qui permet de
+garder des connexions persistantes sous ASGI : chaque requête y est
+servie par un nouveau thread, et donc, avec le moteur de Django, par
+une nouvelle connexion (jamais réutilisée, fermée au mieux par le
+ramasse-miettes).
+
+Réglages (DATABASES et settings) :
+- CONN_MAX_AGE : durée de vie d'une connexion, en secondes (None :
+  illimitée, 0 : pas de réutilisation) ;
+- CONN_HEALTH_CHECKS : une connexion restée libre plus de
+  POOL_CONTROLE_APRES secondes est testée avant d'être reprise ; si
+  elle ne répond plus, elle est remplacée (une reconnexion) ;
+- POOL_TAILLE : connexions ouvertes au plus, par base et par processus ;
+- POOL_ATTENTE : attente maximale d'une connexion libre, en secondes,
+  avant PoolEpuise.
+
+metriques() donne, par base, les prises, attentes, reconnexions... du
+processus courant (GET /api/metriques/connexions/).
+
+Une base SQLite en mémoire (celle des tests, par défaut) n'a pas de
+pool : Django ne ferme jamais sa connexion, qui n'y retournerait pas.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+
+class PoolEpuise(Exception):
+    """Aucune connexion libérée dans le délai imparti."""
+
+    def __init__(self, alias, attente):
+        self.alias = alias
+        super().__init__(
+            f"Aucune connexion libre sur '{alias}' après {attente} s")
+
+
+def _parametre(nom, defaut):
+    return getattr(settings, f'POOL_{nom}', defaut)
+
+
+class Pool:
+    def __init__(self, alias, taille, attente, duree_vie, controle_apres):
+        self.alias = alias
+        self.taille = taille
+        self.attente = attente
+        self.duree_vie = duree_vie
+        self.controle_apres = controle_apres
+        self._libres = deque()  # (connexion, créée à, rendue à)
+        self._creees = {}  # id(connexion) -> créée à
+        self._condition = threading.Condition()
+        self.ouvertes = 0
+        self.compteurs = dict.fromkeys((
+            'prises', 'attentes', 'epuisements', 'creations', 'reconnexions',
+            'expirees', 'rejetees'), 0)
+        self.attente_totale = 0.0
+        self.attente_max = 0.0
+
+    def _perimee(self, creee_a, maintenant):
+        return self.duree_vie is not None and maintenant - creee_a >= self.duree_vie
+
+    def _fermer(self, connexion):
+        self._creees.pop(id(connexion), None)
+        try:
+            connexion.close()
+        except Exception:
+            pass
+
+    def prendre(self, creer, utilisable=None):
+        """Connexion libre, ou nouvelle si le pool n'est pas plein ; sinon
+        attend qu'une connexion soit rendue."""
+        debut = time.monotonic()
+        limite = debut + self.attente
+        a_fermer = []
+        with self._condition:
+            trouvee = None
+            while True:
+                maintenant = time.monotonic()
+                while self._libres:
+                    # La plus récemment rendue : les autres peuvent expirer
+                    connexion, creee_a, rendue_a = self._libres.pop()
+                    if self._perimee(creee_a, maintenant):
+                        self.ouvertes -= 1
+                        self.compteurs['expirees'] += 1
+                        a_fermer.append(connexion)
+                        continue
+                    trouvee = (connexion, rendue_a)
+                    break
+                if trouvee or self.ouvertes < self.taille:
+                    break
+                if maintenant >= limite:
+                    self.compteurs['epuisements'] += 1
+                    raise PoolEpuise(self.alias, self.attente)
+                self._condition.wait(limite - maintenant)
+            if not trouvee:
+                self.ouvertes += 1  # place réservée pour la création
+            attendu = time.monotonic() - debut
+            self.compteurs['prises'] += 1
+            if attendu > 0.001:
+                self.compteurs['attentes'] += 1
+            self.attente_totale += attendu
+            self.attente_max = max(self.attente_max, attendu)
+        for connexion in a_fermer:
+            self._fermer(connexion)
+
+        if trouvee:
+            connexion, rendue_a = trouvee
+            if (utilisable is None or self.controle_apres is None
+                    or time.monotonic() - rendue_a < self.controle_apres
+                    or utilisable(connexion)):
+                return connexion
+            self._fermer(connexion)
+            self.compteurs['reconnexions'] += 1
+        try:
+            connexion = creer()
+        except Exception:
+            with self._condition:
+                self.ouvertes -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.compteurs['creations'] += 1
+            self._creees[id(connexion)] = time.monotonic()
+        return connexion
+
+    def rendre(self, connexion, saine=True):
+        maintenant = time.monotonic()
+        creee_a = self._creees.get(id(connexion), maintenant)
+        garder = saine and not self._perimee(creee_a, maintenant)
+        with self._condition:
+            if garder:
+                self._libres.append((connexion, creee_a, maintenant))
+            else:
+                self.ouvertes -= 1
+                self.compteurs['expirees' if saine else 'rejetees'] += 1
+            self._condition.notify()
+        if not garder:
+            self._fermer(connexion)
+
+    def vider(self):
+        """Ferme les connexions libres (celles en service restent
+        comptées et seront fermées à leur retour si elles ont expiré)."""
+        with self._condition:
+            libres = [connexion for connexion, _, _ in self._libres]
+            self._libres.clear()
+            self.ouvertes -= len(libres)
+            self._condition.notify_all()
+        for connexion in libres:
+            self._fermer(connexion)
+
+    def metriques(self):
+        with self._condition:
+            prises = self.compteurs['prises']
+            return {
+                'taille': self.taille,
+                'ouvertes': self.ouvertes,
+                'libres': len(self._libres),
+                'en_service': self.ouvertes - len(self._libres),
+                **self.compteurs,
+                'attente_moyenne_ms': round(
+                    self.attente_totale * 1000 / prises, 3) if prises else 0.0,
+                'attente_max_ms': round(self.attente_max * 1000, 3),
+            }
+
+
+_pools = {}
+_verrou = threading.Lock()
+
+
+def pool(wrapper):
+    """Pool de la base d'un DatabaseWrapper (un par alias et par base
+    réelle : la base de test n'est pas celle de production)."""
+    reglages = wrapper.settings_dict
+    cle = (wrapper.alias, reglages['NAME'], reglages.get('HOST'),
+           reglages.get('PORT'))
+    with _verrou:
+        if cle not in _pools:
+            _pools[cle] = Pool(
+                wrapper.alias,
+                taille=_parametre('TAILLE', 10),
+                attente=_parametre('ATTENTE', 5),
+                duree_vie=reglages['CONN_MAX_AGE'],
+                controle_apres=_parametre('CONTROLE_APRES', 5)
+                if reglages['CONN_HEALTH_CHECKS'] else None)
+        return _pools[cle]
+
+
+def vider():
+    """Ferme toutes les connexions libres (avant un fork, par exemple)."""
+    with _verrou:
+        pools = list(_pools.values())
+    for p in pools:
+        p.vider()
+
+
+def metriques():
+    with _verrou:
+        pools = list(_pools.items())
+    resultat = {}
+    for (alias, nom, _, _), p in pools:
+        resultat.setdefault(alias, {})[str(nom)] = p.metriques()
+    return resultat
+
+
+def _apres_fork():
+    # Les connexions héritées du parent ne doivent être ni reprises ni
+    # fermées (la fermeture couperait aussi celle du parent)
+    global _verrou
+    _pools.clear()
+    _verrou = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_apres_fork)
+
+
+class PoolMixin:
+    """À placer avant le DatabaseWrapper d'un moteur de Django."""
+    _pool_saine = True
+    _pool_reprise = False
+
+    def _pool_utilisable(self, connexion):
+        raise NotImplementedError
+
+    def _pool_actif(self):
+        return True
+
+    def get_new_connection(self, conn_params):
+        creer = super().get_new_connection
+        if not self._pool_actif():
+            self._pool_reprise = False
+            return creer(conn_params)
+        self._pool_reprise = True
+
+        def nouvelle():
+            self._pool_reprise = False
+            return creer(conn_params)
+        return pool(self).prendre(nouvelle, self._pool_utilisable)
+
+    def init_connection_state(self):
+        # Une connexion reprise au pool a déjà été initialisée
+        if not self._pool_reprise:
+            super().init_connection_state()
+
+    def _close(self):
+        if not self._pool_actif():
+            return super()._close()
+        # Une transaction ouverte n'est pas rendue au pool
+        saine = self._pool_saine and not self.in_atomic_block
+        self._pool_saine = True
+        if self.connection is not None:
+            pool(self).rendre(self.connection, saine)
+
+    def close_if_unusable_or_obsolete(self):
+        if not self._pool_actif():
+            return super().close_if_unusable_or_obsolete()
+        # Début et fin de requête : la connexion retourne au pool
+        if self.connection is None:
+            return
+        if (self.get_autocommit() != self.settings_dict['AUTOCOMMIT']
+                or (self.errors_occurred and not self.is_usable())):
+            self._pool_saine = False
+        self.close()
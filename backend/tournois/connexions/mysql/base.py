@@ -0,0 +1,15 @@
+# tournois/connexions/mysql/base.py
+from django.db.backends.mysql.base import *  # noqa: F401,F403
+from django.db.backends.mysql.base import Database
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLWrapper
+
+from tournois.connexions import PoolMixin
+
+
+class DatabaseWrapper(PoolMixin, MySQLWrapper):
+    def _pool_utilisable(self, connexion):
+        try:
+            connexion.ping()
+        except Database.Error:
+            return False
+        return True
@@ -0,0 +1,20 @@
+# tournois/connexions/sqlite3/base.py
+"""Pool sur SQLite, pour le développement et les tests."""
+from django.db.backends.sqlite3.base import *  # noqa: F401,F403
+from django.db.backends.sqlite3.base import Database
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteWrapper
+
+from tournois.connexions import PoolMixin
+
+
+class DatabaseWrapper(PoolMixin, SQLiteWrapper):
+    def _pool_actif(self):
+        # close() ne ferme jamais une base en mémoire
+        return not self.is_in_memory_db()
+
+    def _pool_utilisable(self, connexion):
+        try:
+            connexion.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
@@ -0,0 +1,101 @@
+# tournois/demarrage.py
+"""
+Démarrage des workers.
+
+Les URLconf déclarent leurs vues avec vue('module.Vue') : le module de
+la vue (et DRF, les sérialiseurs, les renderers... qu'il importe) n'est
+chargé qu'au premier appel. Un worker démarre donc sans importer les
+vues, et une commande de gestion qui résout les URL non plus.
+
+Avec un serveur prefork (gunicorn --preload), PRECHARGEMENT = True fait
+l'inverse dans le processus maître, avant le fork : precharger() importe
+toutes les vues, compile le résolveur d'URL, charge les classes DRF
+configurées puis gèle le ramasse-miettes (gc.freeze) ; les workers
+héritent de tout cela et servent leur première requête sans rien
+importer. Mesures : manage.py profiler_imports.
+"""
+import gc
+
+from django.conf import settings
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import translation
+from django.utils.module_loading import import_string
+
+from . import connexions
+
+
+class VueDifferee:
+    """Vue importée au premier appel. Une classe (APIView, View) est
+    instanciée par as_view()."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._vue = None
+        # Chemin pointé de la vue, lu par URLPattern.lookup_str (que
+        # reverse() calcule pour toutes les routes) et par ResolverMatch
+        self.__module__, _, self.__name__ = chemin.rpartition('.')
+        self.__qualname__ = self.__name__
+
+    def charger(self):
+        if self._vue is None:
+            vue = import_string(self.chemin)
+            self._vue = vue.as_view() if hasattr(vue, 'as_view') else vue
+        return self._vue
+
+    def __call__(self, request, *args, **kwargs):
+        return self.charger()(request, *args, **kwargs)
+
+    def __getattr__(self, nom):
+        # Attributs lus par Django sur la vue (csrf_exempt...). view_class
+        # et cls ne servent avant le premier appel qu'à nommer la vue :
+        # absents tant qu'elle n'est pas chargée, le nom vient de __name__
+        if nom in ('chemin', '_vue'):
+            raise AttributeError(nom)
+        if nom in ('view_class', 'cls') and self._vue is None:
+            raise AttributeError(nom)
+        return getattr(self.charger(), nom)
+
+    def __repr__(self):
+        return f'<VueDifferee {self.chemin}>'
+
+
+def vue(chemin):
+    return VueDifferee(chemin)
+
+
+def _vues(motifs):
+    for motif in motifs:
+        if isinstance(motif, URLResolver):
+            yield from _vues(motif.url_patterns)
+        elif isinstance(motif, URLPattern) and isinstance(
+                motif.callback, VueDifferee):
+            yield motif.callback
+
+
+def precharger():
+    """Charge avant le fork ce que la première requête chargerait."""
+    resolver = get_resolver()
+    for differee in _vues(resolver.url_patterns):
+        differee.charger()
+    # Compile les expressions de toutes les routes (reverse() et resolve())
+    resolver.reverse_dict
+
+    # Classes DRF importées à la première requête
+    from rest_framework.settings import api_settings
+    for nom in ('DEFAULT_AUTHENTICATION_CLASSES', 'DEFAULT_PERMISSION_CLASSES',
+                'DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES'):
+        getattr(api_settings, nom)
+
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+
+    # Les workers ne doivent pas partager les connexions du maître :
+    # close_all() les rend au pool, vider() les ferme
+    connections.close_all()
+    connexions.vider()
+    # Les objets chargés jusqu'ici ne sont plus parcourus par le ramasse-
+    # miettes : leurs pages mémoire restent partagées avec les workers
+    # au lieu d'être copiées au premier passage
+    gc.collect()
+    gc.freeze()
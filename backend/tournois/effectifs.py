@@ -0,0 +1,205 @@
+# tournois/effectifs.py
+"""
+Import en masse des effectifs (joueur -> équipe, avec rôle), depuis un
+tableur exporté en CSV :
+
+    email,equipe,role
+    alice@exemple.fr,Les Aigles,capitaine
+    bob@exemple.fr,Les Aigles,membre
+
+`equipe` est le nom ou l'identifiant d'une équipe de l'organisateur ;
+`role` vaut capitaine, membre (par défaut) ou remplacant.
+
+Les lignes sont lues au fil de l'eau et traitées par lots de TAILLE_LOT :
+par lot, une requête résout les adresses e-mail en joueurs, une autre
+lit les affectations existantes, puis un seul INSERT ... ON CONFLICT
+(bulk_create avec update_conflicts sur unique_joueur_equipe) crée les
+affectations et met à jour les rôles. Chaque lot est validé dans sa
+propre transaction.
+
+Règles, sur l'ensemble de l'import :
+- un seul capitaine par équipe : le premier désigné l'emporte, les
+  suivants sont refusés ; le capitaine en place, s'il est remplacé,
+  redevient membre ;
+- une même affectation n'est importée qu'une fois (première ligne).
+
+Chaque ligne reçoit un résultat : cree, modifie, inchange ou erreur
+(avec un message). Les numéros sont ceux du fichier, l'en-tête étant
+la ligne 1.
+"""
+import csv
+from collections import Counter
+from itertools import islice
+
+from django.db import connections, transaction
+from django.db.models import Q
+
+from . import calendrier, changements, instantanes, shards
+from .models import Equipe, Joueur, JoueurEquipe
+
+TAILLE_LOT = 5000
+ROLES = {role for role, _ in JoueurEquipe.ROLE_CHOICES}
+
+
+def lire_csv(fichier):
+    """Lignes d'un fichier CSV texte (en-tête email,equipe,role)."""
+    return csv.DictReader(fichier)
+
+
+def _equipes(organisateur_id, references, connues):
+    """Complète `connues` ({référence: equipe_id}) avec les équipes de
+    l'organisateur désignées par leur nom ou leur identifiant."""
+    references = references - connues.keys()
+    if not references:
+        return
+    ids = [int(ref) for ref in references if ref.isdigit()]
+    for pk, nom in Equipe.objects.filter(organisateur_id=organisateur_id).filter(
+            Q(pk__in=ids) | Q(nom__in=references)).values_list('pk', 'nom'):
+        if nom in references:
+            connues[nom] = pk
+        if str(pk) in references:
+            connues[str(pk)] = pk
+
+
+def _ecrire(affectations):
+    """Crée ou met à jour les affectations {(joueur, equipe): role} ;
+    retourne leur statut."""
+    existantes = {
+        (joueur_id, equipe_id): role
+        for joueur_id, equipe_id, role in JoueurEquipe.objects.filter(
+            joueur_id__in={joueur_id for joueur_id, _ in affectations},
+            equipe_id__in={equipe_id for _, equipe_id in affectations},
+        ).values_list('joueur_id', 'equipe_id', 'role')
+        if (joueur_id, equipe_id) in affectations
+    }
+
+    # Le capitaine en place d'une équipe qui en reçoit un nouveau
+    # redevient membre
+    capitaines = {equipe_id: joueur_id
+                  for (joueur_id, equipe_id), role in affectations.items()
+                  if role == 'capitaine'}
+    remplaces = []
+    if capitaines:
+        remplaces = [
+            pk for pk, joueur_id, equipe_id in JoueurEquipe.objects.filter(
+                equipe_id__in=capitaines, role='capitaine',
+            ).values_list('pk', 'joueur_id', 'equipe_id')
+            if capitaines[equipe_id] != joueur_id
+        ]
+        JoueurEquipe.objects.filter(pk__in=remplaces).update(role='membre')
+
+    a_ecrire = [
+        JoueurEquipe(joueur_id=joueur_id, equipe_id=equipe_id, role=role)
+        for (joueur_id, equipe_id), role in affectations.items()
+        if existantes.get((joueur_id, equipe_id)) != role
+    ]
+    # MySQL (ON DUPLICATE KEY) n'accepte pas de cible de conflit
+    cible = (['joueur', 'equipe'] if connections[shards.base()].features
+             .supports_update_conflicts_with_target else None)
+    JoueurEquipe.objects.bulk_create(
+        a_ecrire, batch_size=1000, update_conflicts=True,
+        unique_fields=cible, update_fields=['role'])
+
+    # bulk_create ne déclenche pas les signaux (voir signals.py)
+    if remplaces:
+        changements.enregistrer(
+            'modification', JoueurEquipe.objects.filter(pk__in=remplaces),
+            shards.base())
+    if a_ecrire:
+        equipe_ids = {affectation.equipe_id for affectation in a_ecrire}
+        joueur_ids = {affectation.joueur_id for affectation in a_ecrire}
+        # Relues : MySQL ne renvoie pas les identifiants créés
+        ecrites = {(a.joueur_id, a.equipe_id) for a in a_ecrire}
+        par_operation = {'creation': [], 'modification': []}
+        for affectation in JoueurEquipe.objects.filter(
+                joueur_id__in=joueur_ids, equipe_id__in=equipe_ids):
+            paire = (affectation.joueur_id, affectation.equipe_id)
+            if paire in ecrites:
+                par_operation['modification' if paire in existantes
+                              else 'creation'].append(affectation)
+        for operation, affectations_ecrites in par_operation.items():
+            changements.enregistrer(operation, affectations_ecrites,
+                                    shards.base())
+        instantanes.marquer(
+            instantanes.tournois_des_equipes(equipe_ids), ['equipes'])
+        transaction.on_commit(lambda: calendrier.invalider(
+            [('joueur', joueur_id) for joueur_id in joueur_ids]),
+            using=shards.base())
+
+    return {
+        paire: ('cree' if paire not in existantes
+                else 'inchange' if existantes[paire] == role else 'modifie')
+        for paire, role in affectations.items()
+    }
+
+
+def _importer_lot(organisateur_id, lot, etat):
+    resultats = []
+    valides = []
+    for numero, ligne in lot:
+        email = (ligne.get('email') or '').strip()
+        equipe = (ligne.get('equipe') or '').strip()
+        role = (ligne.get('role') or '').strip().lower() or 'membre'
+        if not email or not equipe:
+            resultats.append((numero, 'erreur',
+                              "Les colonnes email et equipe sont obligatoires"))
+        elif role not in ROLES:
+            resultats.append((numero, 'erreur', f"Rôle inconnu: {role}"))
+        else:
+            valides.append((numero, email, equipe, role))
+
+    joueurs = dict(Joueur.objects.filter(
+        utilisateur__email__in={email for _, email, _, _ in valides},
+    ).values_list('utilisateur__email', 'pk'))
+    _equipes(organisateur_id, {equipe for _, _, equipe, _ in valides},
+             etat['equipes'])
+
+    affectations, numeros = {}, {}
+    for numero, email, equipe, role in valides:
+        joueur_id = joueurs.get(email)
+        equipe_id = etat['equipes'].get(equipe)
+        paire = (joueur_id, equipe_id)
+        if joueur_id is None:
+            resultats.append((numero, 'erreur',
+                              f"Aucun joueur avec l'adresse {email}"))
+        elif equipe_id is None:
+            resultats.append((numero, 'erreur', f"Équipe inconnue: {equipe}"))
+        elif paire in etat['paires']:
+            resultats.append((numero, 'erreur',
+                              f"Doublon de la ligne {etat['paires'][paire]}"))
+        elif role == 'capitaine' and equipe_id in etat['capitaines']:
+            resultats.append((
+                numero, 'erreur', "L'équipe a déjà un capitaine "
+                f"(ligne {etat['capitaines'][equipe_id]})"))
+        else:
+            etat['paires'][paire] = numero
+            if role == 'capitaine':
+                etat['capitaines'][equipe_id] = numero
+            affectations[paire] = role
+            numeros[paire] = numero
+
+    if affectations:
+        with transaction.atomic(using=shards.base()):
+            statuts = _ecrire(affectations)
+        resultats += [(numeros[paire], statut, None)
+                      for paire, statut in statuts.items()]
+    return resultats
+
+
+def importer(organisateur_id, lignes, taille_lot=TAILLE_LOT):
+    """Importe les lignes ({'email', 'equipe', 'role'}) dans les équipes
+    de l'organisateur. Retourne (résumé par statut, résultats par ligne)."""
+    etat = {'equipes': {}, 'capitaines': {}, 'paires': {}}
+    numerotees = enumerate(lignes, start=2)
+    resultats = []
+    while True:
+        lot = list(islice(numerotees, taille_lot))
+        if not lot:
+            break
+        resultats += sorted(_importer_lot(organisateur_id, lot, etat))
+    resume = Counter(statut for _, statut, _ in resultats)
+    return dict(resume), [
+        {'ligne': numero, 'statut': statut, **({'message': message}
+                                               if message else {})}
+        for numero, statut, message in resultats
+    ]
@@ -0,0 +1,155 @@
+# tournois/inclusions.py
+"""
+Planificateur de ?include= pour les endpoints de lecture.
+
+    ?include=equipe1,equipe2,arbitre.utilisateur,tournoi.organisateur
+
+Chaque chemin demandé est validé contre une liste blanche propre au
+modèle racine et une profondeur maximale, puis traduit :
+
+- une suite de relations mono-valuées (ForeignKey, OneToOne) devient un
+  select_related, donc une jointure dans la même requête ;
+- une relation multi-valuée (ForeignKey inverse, ManyToMany) devient un
+  Prefetch dont le queryset porte à son tour le select_related de la
+  suite du chemin. Avec le partitionnement (shards.py), une relation
+  entre une table partitionnée et une table globale est aussi un
+  Prefetch : la jointure est impossible entre deux bases.
+
+Le nombre de requêtes vaut donc 1 + le nombre de Prefetch du plan,
+quel que soit le nombre de lignes : Plan.nb_requetes_max.
+"""
+from dataclasses import dataclass, field
+
+from django.db.models import Prefetch
+
+from . import shards
+from .models import Equipe, Rencontre, Utilisateur
+
+PROFONDEUR_MAX = 3
+
+INCLUSIONS_AUTORISEES = {
+    Rencontre: {
+        'tournoi', 'tournoi.organisateur', 'tournoi.organisateur.utilisateur',
+        'equipe1', 'equipe2', 'equipe1.organisateur', 'equipe2.organisateur',
+        'arbitre', 'arbitre.utilisateur',
+    },
+    Equipe: {
+        'organisateur', 'organisateur.utilisateur',
+        'joueurequipe_set', 'joueurequipe_set.joueur',
+        'joueurequipe_set.joueur.utilisateur',
+    },
+}
+
+# Champs jamais exposés, même inclus
+CHAMPS_MASQUES = {
+    Utilisateur: {'motDePasse', 'email', 'telephone'},
+}
+
+
+class InclusionInvalide(ValueError):
+    pass
+
+
+@dataclass
+class Plan:
+    select_related: list = field(default_factory=list)
+    prefetch_related: list = field(default_factory=list)
+    arbre: dict = field(default_factory=dict)
+    # 1 requête principale + 1 par Prefetch, imbriqués compris
+    nb_requetes_max: int = 1
+
+    def appliquer(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
+def analyser(modele, valeur):
+    """Valide ?include= et retourne l'arbre des relations demandées."""
+    autorises = INCLUSIONS_AUTORISEES.get(modele, set())
+    arbre = {}
+    for chemin in filter(None, (c.strip() for c in (valeur or '').split(','))):
+        segments = chemin.split('.')
+        if len(segments) > PROFONDEUR_MAX:
+            raise InclusionInvalide(
+                f"'{chemin}' dépasse la profondeur maximale ({PROFONDEUR_MAX})")
+        if chemin not in autorises:
+            raise InclusionInvalide(f"Inclusion non autorisée: '{chemin}'")
+        noeud = arbre
+        for segment in segments:
+            noeud = noeud.setdefault(segment, {})
+    return arbre
+
+
+def _relations(modele):
+    """Relations du modèle par nom d'accès (joueurequipe_set, ...)."""
+    relations = {}
+    for champ in modele._meta.get_fields():
+        if not champ.is_relation:
+            continue
+        nom = champ.get_accessor_name() if champ.auto_created else champ.name
+        if nom:
+            relations[nom] = champ
+    return relations
+
+
+def _planifier(modele, arbre):
+    """Retourne (select_related, prefetch_related, nombre de Prefetch)."""
+    select, prefetch, nb_prefetch = [], [], 0
+    relations = _relations(modele)
+    for nom, sous_arbre in arbre.items():
+        champ = relations[nom]
+        sous_select, sous_prefetch, sous_nb = _planifier(
+            champ.related_model, sous_arbre)
+        nb_prefetch += sous_nb
+        if (champ.many_to_one or champ.one_to_one) and not shards.separes(
+                modele, champ.related_model):
+            select.append(nom)
+            select += [f'{nom}__{chemin}' for chemin in sous_select]
+            prefetch += [
+                Prefetch(f'{nom}__{p.prefetch_through}', queryset=p.queryset)
+                for p in sous_prefetch
+            ]
+        else:
+            queryset = champ.related_model._default_manager.all()
+            if sous_select:
+                queryset = queryset.select_related(*sous_select)
+            if sous_prefetch:
+                queryset = queryset.prefetch_related(*sous_prefetch)
+            prefetch.append(Prefetch(nom, queryset=queryset))
+            nb_prefetch += 1
+    return select, prefetch, nb_prefetch
+
+
+def planifier(modele, valeur):
+    """Plan d'inclusion pour `modele` à partir de la valeur de ?include=."""
+    arbre = analyser(modele, valeur)
+    select, prefetch, nb_prefetch = _planifier(modele, arbre)
+    return Plan(select_related=select, prefetch_related=prefetch,
+                arbre=arbre, nb_requetes_max=1 + nb_prefetch)
+
+
+def serialiser(objet, arbre):
+    """Dictionnaire d'un objet et de ses relations incluses.
+
+    Comme avec un ModelSerializer, une clé étrangère non incluse est
+    exposée par son identifiant sous le nom du champ.
+    """
+    masques = CHAMPS_MASQUES.get(type(objet), set())
+    donnees = {
+        champ.name: champ.value_from_object(objet)
+        for champ in objet._meta.concrete_fields
+        if champ.name not in masques
+    }
+    relations = _relations(type(objet)) if arbre else {}
+    for nom, sous_arbre in arbre.items():
+        champ = relations[nom]
+        if champ.many_to_one or champ.one_to_one:
+            cible = getattr(objet, nom, None)
+            donnees[nom] = serialiser(cible, sous_arbre) if cible else None
+        else:
+            donnees[nom] = [serialiser(lie, sous_arbre)
+                            for lie in getattr(objet, nom).all()]
+    return donnees
@@ -0,0 +1,173 @@
+# tournois/inscriptions.py
+"""
+Inscription des équipes aux tournois, avec limite de places.
+
+La place est prise par un seul UPDATE conditionnel sur le compteur du
+tournoi (PlacesTournoi) :
+
+    UPDATE places_tournoi SET occupees = occupees + 1
+    WHERE tournoi_id = %s AND (capacite IS NULL OR occupees < capacite)
+
+Une ligne modifiée : la place est acquise ; aucune : le tournoi est
+complet. Il n'y a ni lecture préalable ni COUNT, donc pas de fenêtre
+entre la vérification et l'écriture, et la contrainte
+check_places_capacite le garantit aussi en base. L'UPDATE vient en
+dernier dans la transaction : le verrou sur le compteur n'est tenu que
+le temps du commit, ce qui laisse passer des centaines d'inscriptions
+par seconde sur un même tournoi. Le compteur est tenu aussi pour un
+tournoi sans limite : fixer une capacité est un UPDATE conditionnel
+sur la même ligne, sans recompter les inscriptions.
+
+Une inscription payante crée le Paiement associé et reste en attente
+jusqu'à ce qu'il soit payé ; un paiement refusé libère la place.
+"""
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import shards
+from .models import Inscription, JoueurEquipe, Paiement, PlacesTournoi, Tournoi
+
+
+class TournoiComplet(Exception):
+    """Plus aucune place disponible."""
+
+    def __init__(self, tournoi_id):
+        self.tournoi_id = tournoi_id
+        super().__init__(f"Le tournoi {tournoi_id} est complet")
+
+
+def creer_compteurs(tournoi_ids, using=None):
+    """Compteurs de places, sans limite, de tournois qui viennent d'être
+    créés."""
+    PlacesTournoi.objects.db_manager(using).bulk_create(
+        [PlacesTournoi(tournoi_id=tournoi_id) for tournoi_id in tournoi_ids],
+        ignore_conflicts=True)
+
+
+def _prendre_place(tournoi_id):
+    if PlacesTournoi.objects.filter(
+            Q(capacite__isnull=True) | Q(occupees__lt=F('capacite')),
+            pk=tournoi_id).update(occupees=F('occupees') + 1):
+        return True
+    # Aucune ligne modifiée : complet, ou tournoi créé sans save()
+    # (bulk_create) et donc sans compteur ni limite
+    return not PlacesTournoi.objects.filter(pk=tournoi_id).exists()
+
+
+def _liberer_place(tournoi_id):
+    PlacesTournoi.objects.filter(pk=tournoi_id, occupees__gt=0).update(
+        occupees=F('occupees') - 1)
+
+
+def _capitaine(equipe_id):
+    return JoueurEquipe.objects.filter(
+        equipe_id=equipe_id, role='capitaine').values_list(
+        'joueur_id', flat=True).first()
+
+
+def inscrire(tournoi_id, equipe_id, joueur_id=None, methode='carte'):
+    """Inscrit une équipe ; le paiement éventuel est au nom de `joueur_id`
+    (le capitaine par défaut). Lève ValidationError ou TournoiComplet."""
+    tournoi = Tournoi.objects.filter(pk=tournoi_id).values(
+        'statut', 'prix_inscription', 'organisateur_id').first()
+    if tournoi is None:
+        raise ValidationError("Tournoi introuvable")
+    if tournoi['statut'] != 'planifie':
+        raise ValidationError("Les inscriptions sont closes")
+    payant = tournoi['prix_inscription'] > 0
+    if joueur_id is not None and not JoueurEquipe.objects.filter(
+            equipe_id=equipe_id, joueur_id=joueur_id).exists():
+        raise ValidationError("Le payeur n'est pas membre de l'équipe")
+    if payant and joueur_id is None:
+        joueur_id = _capitaine(equipe_id)
+        if joueur_id is None:
+            raise ValidationError("Aucun capitaine pour régler l'inscription")
+
+    try:
+        # Le paiement est dans la base globale, l'inscription dans le
+        # shard du tournoi (les deux sont la même base sans partitionnement)
+        with transaction.atomic(using=shards.base()), \
+                transaction.atomic(using=DEFAULT_DB_ALIAS):
+            paiement = Paiement.objects.create(
+                joueur_id=joueur_id, montant=tournoi['prix_inscription'],
+                methode=methode, tournoi_id=tournoi_id,
+                organisateur_id=tournoi['organisateur_id']) if payant else None
+            valeurs = {'paiement': paiement,
+                       'statut': 'en_attente' if payant else 'confirmee'}
+            # Une inscription annulée est réactivée plutôt que recréée
+            if not Inscription.objects.filter(
+                    tournoi_id=tournoi_id, equipe_id=equipe_id,
+                    statut='annulee').update(
+                    date_inscription=timezone.now(), **valeurs):
+                Inscription.objects.create(
+                    tournoi_id=tournoi_id, equipe_id=equipe_id, **valeurs)
+            if not _prendre_place(tournoi_id):
+                raise TournoiComplet(tournoi_id)
+    except IntegrityError:
+        raise ValidationError("L'équipe est déjà inscrite à ce tournoi")
+    return Inscription.objects.get(tournoi_id=tournoi_id, equipe_id=equipe_id)
+
+
+def annuler(inscription_id):
+    """Annule une inscription et libère sa place ; False si elle l'était
+    déjà."""
+    with transaction.atomic(using=shards.base()):
+        tournoi_id = Inscription.objects.filter(pk=inscription_id).values_list(
+            'tournoi_id', flat=True).first()
+        if tournoi_id is None or not Inscription.objects.filter(
+                pk=inscription_id).exclude(statut='annulee').update(
+                statut='annulee'):
+            return False
+        _liberer_place(tournoi_id)
+    return True
+
+
+def paiement_modifie(paiement_id, statut):
+    """Répercute le statut d'un paiement sur l'inscription qu'il règle."""
+    if statut == 'paye':
+        Inscription.objects.filter(
+            paiement_id=paiement_id, statut='en_attente').update(
+            statut='confirmee')
+    elif statut in ('refuse', 'rembourse'):
+        inscription_id = Inscription.objects.filter(
+            paiement_id=paiement_id).values_list('pk', flat=True).first()
+        if inscription_id is not None:
+            annuler(inscription_id)
+
+
+def definir_capacite(tournoi_id, capacite):
+    """Fixe (ou supprime, avec None) la capacité d'un tournoi ; refuse de
+    descendre sous le nombre de places déjà prises."""
+    with transaction.atomic(using=shards.base()):
+        # Comparé au compteur dans le même UPDATE qu'une inscription
+        # concurrente attend ou précède
+        suffisante = Q() if capacite is None else Q(occupees__lte=capacite)
+        if PlacesTournoi.objects.filter(suffisante, pk=tournoi_id).update(
+                capacite=capacite):
+            return PlacesTournoi.objects.get(pk=tournoi_id)
+        if PlacesTournoi.objects.filter(pk=tournoi_id).exists():
+            raise ValidationError(
+                "La capacité est inférieure au nombre d'équipes inscrites")
+        # Tournoi créé sans save() : le compteur part des inscriptions
+        occupees = Inscription.objects.filter(tournoi_id=tournoi_id).exclude(
+            statut='annulee').count()
+        if capacite is not None and occupees > capacite:
+            raise ValidationError(
+                "La capacité est inférieure au nombre d'équipes inscrites")
+        return PlacesTournoi.objects.create(
+            tournoi_id=tournoi_id, capacite=capacite, occupees=occupees)
+
+
+def places(tournoi_id):
+    """{'capacite', 'occupees', 'restantes'} ; capacite None sans limite."""
+    ligne = PlacesTournoi.objects.filter(pk=tournoi_id).values(
+        'capacite', 'occupees').first()
+    if ligne is None:
+        occupees = Inscription.objects.filter(tournoi_id=tournoi_id).exclude(
+            statut='annulee').count()
+        return {'capacite': None, 'occupees': occupees, 'restantes': None}
+    if ligne['capacite'] is None:
+        return {**ligne, 'restantes': None}
+    return {**ligne, 'restantes': ligne['capacite'] - ligne['occupees']}
@@ -0,0 +1,198 @@
+# tournois/instantanes.py
+"""
+Instantanés dénormalisés des pages de tournoi.
+
+La page d'un tournoi agrège Tournoi, Organisateur, les Rencontre avec
+leurs Equipe et Arbitre, et les effectifs (JoueurEquipe). Le document
+est stocké dans InstantaneTournoi et servi par une lecture sur clé
+primaire. Les signaux marquent la section touchée par un changement ;
+elle est reconstruite après le commit de la transaction, une seule fois
+même si plusieurs lignes changent dans la même transaction.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import shards
+from .models import (
+    Equipe,
+    InstantaneTournoi,
+    JoueurEquipe,
+    Rencontre,
+    Tournoi,
+)
+
+SECTIONS = ('tournoi', 'rencontres', 'equipes')
+
+
+def _avec_utilisateur(queryset, relation):
+    """Charge `relation` (organisateur, arbitre, joueur) et son
+    utilisateur avec les lignes : par jointure, ou avec des shards par
+    une requête dans 'default', où restent les profils (les tables ne
+    sont pas dans la même base)."""
+    profil = queryset.model._meta.get_field(relation).related_model
+    if shards.separes(queryset.model, profil):
+        return queryset.prefetch_related(f'{relation}__utilisateur')
+    return queryset.select_related(f'{relation}__utilisateur')
+
+
+def _section_tournoi(tournoi_id):
+    tournoi = _avec_utilisateur(
+        Tournoi.objects.all(), 'organisateur').get(pk=tournoi_id)
+    organisateur = tournoi.organisateur
+    return {
+        'id': tournoi.pk,
+        'nom': tournoi.nom,
+        'description': tournoi.description,
+        'type': tournoi.type,
+        'regles': tournoi.regles,
+        'date_debut': tournoi.date_debut,
+        'date_fin': tournoi.date_fin,
+        'prix_inscription': tournoi.prix_inscription,
+        'statut': tournoi.statut,
+        'organisateur': {
+            'id': organisateur.pk,
+            'nom_organisation': organisateur.nom_organisation,
+            'nom': organisateur.utilisateur.nom,
+        },
+    }
+
+
+def _section_rencontres(tournoi_id):
+    """Rencontres du tournoi ; les équipes sont référencées par id et
+    décrites dans la section 'equipes'."""
+    rencontres = _avec_utilisateur(
+        Rencontre.objects.filter(tournoi_id=tournoi_id), 'arbitre'
+    ).order_by('date_heure', 'pk')
+    return [
+        {
+            'id': rencontre.pk,
+            'nom': rencontre.nom,
+            'date_heure': rencontre.date_heure,
+            'duree': rencontre.duree,
+            'terrain': rencontre.terrain,
+            'statut': rencontre.statut,
+            'score1': rencontre.score1,
+            'score2': rencontre.score2,
+            'equipe1_id': rencontre.equipe1_id,
+            'equipe2_id': rencontre.equipe2_id,
+            'arbitre': {
+                'id': rencontre.arbitre_id,
+                'nom': rencontre.arbitre.utilisateur.nom,
+            } if rencontre.arbitre_id else None,
+        }
+        for rencontre in rencontres
+    ]
+
+
+def _section_equipes(tournoi_id):
+    """Équipes engagées dans le tournoi, avec leur effectif."""
+    paires = Rencontre.objects.filter(tournoi_id=tournoi_id).values_list(
+        'equipe1_id', 'equipe2_id')
+    equipe_ids = {equipe_id for paire in paires for equipe_id in paire}
+    equipes = {
+        str(equipe.pk): {'id': equipe.pk, 'nom': equipe.nom, 'effectif': []}
+        for equipe in Equipe.objects.filter(pk__in=equipe_ids)
+    }
+    membres = _avec_utilisateur(
+        JoueurEquipe.objects.filter(equipe_id__in=equipe_ids), 'joueur'
+    ).order_by('equipe_id', 'pk')
+    for membre in membres:
+        equipes[str(membre.equipe_id)]['effectif'].append({
+            'joueur_id': membre.joueur_id,
+            'nom': membre.joueur.utilisateur.nom,
+            'role': membre.role,
+        })
+    return equipes
+
+
+_CONSTRUCTEURS = {
+    'tournoi': _section_tournoi,
+    'rencontres': _section_rencontres,
+    'equipes': _section_equipes,
+}
+
+
+def construire(tournoi_id, sections=SECTIONS):
+    """Construit les sections demandées à partir des tables normalisées."""
+    return {section: _CONSTRUCTEURS[section](tournoi_id) for section in sections}
+
+
+def reconstruire(tournoi_id, sections=None):
+    """Met à jour l'instantané d'un tournoi.
+
+    Sans `sections`, le document complet est (re)créé. Avec `sections`,
+    seules celles-ci sont remplacées, et rien n'est fait si l'instantané
+    n'existe pas encore : il sera construit à la première lecture.
+    """
+    with transaction.atomic(using=shards.base()):
+        if not Tournoi.objects.filter(pk=tournoi_id).exists():
+            InstantaneTournoi.objects.filter(tournoi_id=tournoi_id).delete()
+            return None
+        instantane = InstantaneTournoi.objects.select_for_update().filter(
+            tournoi_id=tournoi_id).first()
+        if instantane is None:
+            if sections is not None:
+                return None
+            instantane = InstantaneTournoi(tournoi_id=tournoi_id)
+        instantane.document.update(construire(tournoi_id, sections or SECTIONS))
+        instantane.version += 1
+        instantane.save()
+        return instantane
+
+
+def lire(tournoi_id):
+    """Document d'un tournoi, construit à la demande (None si inconnu)."""
+    document = InstantaneTournoi.objects.filter(
+        tournoi_id=tournoi_id).values_list('document', flat=True).first()
+    if document is None:
+        instantane = reconstruire(tournoi_id)
+        document = instantane.document if instantane else None
+    return document
+
+
+# Invalidation différée
+
+_local = threading.local()
+
+
+def _vider_attente():
+    en_attente, _local.en_attente = getattr(_local, 'en_attente', {}), {}
+    for tournoi_id, sections in en_attente.items():
+        with shards.pour_id(tournoi_id):
+            reconstruire(tournoi_id, sorted(sections))
+
+
+def marquer(tournoi_ids, sections):
+    """Programme la reconstruction de `sections` pour ces tournois après
+    le commit de la transaction courante."""
+    en_attente = getattr(_local, 'en_attente', None)
+    if en_attente is None:
+        en_attente = _local.en_attente = {}
+    for tournoi_id in tournoi_ids:
+        en_attente.setdefault(tournoi_id, set()).update(sections)
+    # Le premier rappel exécuté vide toute la file, les suivants ne font
+    # rien ; après un rollback la file est traitée au commit suivant.
+    transaction.on_commit(_vider_attente, using=shards.base())
+
+
+def tournois_des_equipes(equipe_ids):
+    equipe_ids = list(equipe_ids)
+    return set(Rencontre.objects.filter(
+        Q(equipe1_id__in=equipe_ids) | Q(equipe2_id__in=equipe_ids)
+    ).values_list('tournoi_id', flat=True).distinct())
+
+
+def tournois_de_l_utilisateur(utilisateur_id):
+    """Tournois dont une section affiche le nom de cet utilisateur,
+    regroupés par section."""
+    equipe_ids = JoueurEquipe.objects.filter(
+        joueur_id=utilisateur_id).values_list('equipe_id', flat=True)
+    return {
+        'tournoi': set(Tournoi.objects.filter(
+            organisateur_id=utilisateur_id).values_list('pk', flat=True)),
+        'rencontres': set(Rencontre.objects.filter(
+            arbitre_id=utilisateur_id).values_list('tournoi_id', flat=True)),
+        'equipes': tournois_des_equipes(equipe_ids),
+    }
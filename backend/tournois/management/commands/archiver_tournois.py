@@ -0,0 +1,49 @@
+# tournois/management/commands/archiver_tournois.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tournois import archivage, shards
+
+
+class Command(BaseCommand):
+    help = ("Déplace les tournois terminés (et leurs rencontres) vers les "
+            "tables d'archive, par lots courts.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours', type=int, default=90,
+            help="Archiver les tournois terminés depuis plus de N jours")
+        parser.add_argument(
+            '--lot', type=int, default=archivage.TAILLE_LOT,
+            help="Nombre de lignes déplacées par transaction")
+        parser.add_argument(
+            '--paiements-jours', type=int, default=None,
+            help="Archiver aussi les paiements définitifs de plus de N jours")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Affiche les tournois éligibles sans rien déplacer")
+
+    def handle(self, *args, **options):
+        avant = timezone.now() - timedelta(days=options['jours'])
+        if options['dry_run']:
+            total = 0
+            for alias in shards.bases():
+                with shards.sur(alias):
+                    eligibles = list(archivage.tournois_archivables(avant))
+                for tournoi in eligibles:
+                    self.stdout.write(f"{alias}\t{tournoi.pk}\t{tournoi.nom}")
+                total += len(eligibles)
+            self.stdout.write(f"{total} tournoi(s) éligible(s)")
+            return
+
+        paiements_avant = None
+        if options['paiements_jours'] is not None:
+            paiements_avant = timezone.now() - timedelta(
+                days=options['paiements_jours'])
+        resume = archivage.archiver(
+            avant, taille_lot=options['lot'], paiements_avant=paiements_avant)
+        self.stdout.write(self.style.SUCCESS(
+            "Archivés: {tournois} tournoi(s), {rencontres} rencontre(s), "
+            "{paiements} paiement(s)".format(**resume)))
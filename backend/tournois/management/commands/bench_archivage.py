@@ -0,0 +1,56 @@
+# tournois/management/commands/bench_archivage.py
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+from tournois import archivage, bench
+from tournois.models import Rencontre
+
+
+class Command(BaseCommand):
+    help = ("Mesure la latence des requêtes sur les tables chaudes avant et "
+            "après archivage, sur des données générées puis annulées.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tournois', type=int, default=200)
+        parser.add_argument('--rencontres', type=int, default=100,
+                            help="Rencontres par tournoi")
+        parser.add_argument('--ratio-termines', type=float, default=0.8)
+        parser.add_argument('--repetitions', type=int, default=30)
+
+    def _mesurer(self, repetitions):
+        maintenant = timezone.now()
+        requetes = {
+            'prochaines_rencontres': lambda: list(
+                Rencontre.objects.filter(
+                    statut='planifie', date_heure__gte=maintenant
+                ).order_by('date_heure')[:50]),
+            'rencontres_par_statut': lambda: list(
+                Rencontre.objects.order_by().values('statut').annotate(
+                    nombre=Count('pk'))),
+            'compte_en_cours': lambda: Rencontre.objects.filter(
+                tournoi__statut__in=('planifie', 'en_cours')).count(),
+        }
+        return {nom: bench.chronometrer(requete, repetitions)
+                for nom, requete in requetes.items()}
+
+    def handle(self, *args, **options):
+        with bench.donnees_temporaires():
+            bench.generer(
+                tournois=options['tournois'],
+                rencontres_par_tournoi=options['rencontres'],
+                ratio_termines=options['ratio_termines'])
+            avant = self._mesurer(options['repetitions'])
+            debut = timezone.now()
+            resume = archivage.archiver(avant=timezone.now())
+            duree = (timezone.now() - debut).total_seconds()
+            apres = self._mesurer(options['repetitions'])
+
+        self.stdout.write(
+            f"Archivage: {resume['tournois']} tournoi(s), "
+            f"{resume['rencontres']} rencontre(s) en {duree:.2f}s")
+        self.stdout.write(f"{'requête':<25}{'avant (ms)':>12}{'après (ms)':>12}")
+        for nom in avant:
+            self.stdout.write(
+                f"{nom:<25}{avant[nom]['mediane_ms']:>12}"
+                f"{apres[nom]['mediane_ms']:>12}")
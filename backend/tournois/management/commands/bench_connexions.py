@@ -0,0 +1,127 @@
+# tournois/management/commands/bench_connexions.py
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.test.utils import override_settings
+
+from tournois import connexions
+
+# Alias -> (moteur, CONN_MAX_AGE)
+MODES = {
+    'sans': ('django.db.backends.sqlite3', 0),
+    'persistantes': ('django.db.backends.sqlite3', None),
+    'pool': ('tournois.connexions.sqlite3', None),
+}
+
+
+def _ajouter_base(alias, chemin, moteur, duree_vie):
+    config = {'ENGINE': moteur, 'NAME': chemin, 'CONN_MAX_AGE': duree_vie,
+              'CONN_HEALTH_CHECKS': True}
+    connections.settings[alias] = connections.configure_settings(
+        {**settings.DATABASES, alias: config})[alias]
+    settings.DATABASES[alias] = connections.settings[alias]
+
+
+def _retirer_base(alias):
+    connections[alias].close()
+    del connections[alias]
+    connections.settings.pop(alias, None)
+    settings.DATABASES.pop(alias, None)
+
+
+def _requete(alias):
+    """Ce que fait le gestionnaire de requêtes de Django autour d'une vue
+    qui lit une ligne (request_started / request_finished)."""
+    close_old_connections()
+    with connections[alias].cursor() as curseur:
+        curseur.execute('SELECT valeur FROM bench_connexions WHERE id = 1')
+        curseur.fetchone()
+    close_old_connections()
+
+
+class Command(BaseCommand):
+    help = ("Compare la latence d'une requête sans connexions persistantes, "
+            "avec les connexions persistantes de Django et avec le pool, "
+            "en WSGI (threads de longue durée) et en ASGI (un thread par "
+            "requête), sur une base SQLite temporaire.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requetes', type=int, default=2000,
+                            help="Requêtes par thread")
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--taille', type=int, default=4,
+                            help="Taille du pool (POOL_TAILLE)")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'mode':<14}{'serveur':<6}"
+                          f"{'médiane ms':>12}{'p95 ms':>10}{'req/s':>10}")
+        with tempfile.TemporaryDirectory() as dossier, override_settings(
+                POOL_TAILLE=options['taille']):
+            chemin = os.path.join(dossier, 'bench.sqlite3')
+            for mode, (moteur, duree_vie) in MODES.items():
+                _ajouter_base(f'bench_{mode}', chemin, moteur, duree_vie)
+            try:
+                with connections['bench_sans'].cursor() as curseur:
+                    curseur.execute('CREATE TABLE bench_connexions '
+                                    '(id INTEGER PRIMARY KEY, valeur TEXT)')
+                    curseur.execute("INSERT INTO bench_connexions VALUES (1, 'x')")
+                connections['bench_sans'].close()
+
+                for mode in MODES:
+                    for serveur in ('wsgi', 'asgi'):
+                        self._mesurer(f'bench_{mode}', mode, serveur, options)
+                metriques = connexions.metriques()['bench_pool'][chemin]
+                self.stdout.write("\nPool (toutes mesures) : " + ", ".join(
+                    f"{nom}={valeur}" for nom, valeur in metriques.items()))
+            finally:
+                for mode in MODES:
+                    _retirer_base(f'bench_{mode}')
+                connexions.vider()
+
+    def _mesurer(self, alias, mode, serveur, options):
+        durees = []
+        verrou = threading.Lock()
+
+        def chronometrer(locales):
+            debut = time.perf_counter()
+            _requete(alias)
+            locales.append((time.perf_counter() - debut) * 1000)
+
+        def travailler():
+            locales = []
+            for _ in range(options['requetes']):
+                if serveur == 'asgi':
+                    # Le gestionnaire ASGI de Django exécute chaque requête
+                    # dans un nouveau thread, donc avec un nouveau
+                    # DatabaseWrapper (connections est local au thread)
+                    requete = threading.Thread(target=chronometrer,
+                                               args=(locales,))
+                    requete.start()
+                    requete.join()
+                else:
+                    chronometrer(locales)
+            # Fin du thread : les connexions persistantes sont fermées
+            connections[alias].close()
+            with verrou:
+                durees.extend(locales)
+
+        threads = [threading.Thread(target=travailler)
+                   for _ in range(options['threads'])]
+        debut = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = time.perf_counter() - debut
+
+        durees.sort()
+        self.stdout.write(
+            f"{mode:<14}{serveur:<6}{statistics.median(durees):>12.3f}"
+            f"{durees[int(len(durees) * 0.95) - 1]:>10.3f}"
+            f"{len(durees) / total:>10.0f}")
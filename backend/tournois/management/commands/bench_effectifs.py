@@ -0,0 +1,69 @@
+# tournois/management/commands/bench_effectifs.py
+import csv
+import io
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournois import bench, effectifs
+
+
+class Command(BaseCommand):
+    help = ("Importe N affectations joueur -> équipe depuis un CSV généré, "
+            "puis les réimporte avec des rôles modifiés.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lignes', type=int, default=100000)
+        parser.add_argument('--joueurs-par-equipe', type=int, default=20)
+        parser.add_argument('--lot', type=int, default=effectifs.TAILLE_LOT)
+
+    def _csv(self, prefixe, equipe_ids, n, taille, roles):
+        fichier = io.StringIO()
+        ecrivain = csv.writer(fichier)
+        ecrivain.writerow(['email', 'equipe', 'role'])
+        for i in range(n):
+            ecrivain.writerow([f'{prefixe}-{i}@bench.local',
+                               equipe_ids[i // taille], roles(i)])
+        # Erreurs attendues : adresse inconnue, second capitaine, doublon
+        ecrivain.writerow(['inconnu@bench.local', equipe_ids[0], 'membre'])
+        ecrivain.writerow([f'{prefixe}-1@bench.local', equipe_ids[0], 'capitaine'])
+        ecrivain.writerow([f'{prefixe}-2@bench.local', equipe_ids[0], 'membre'])
+        fichier.seek(0)
+        return fichier
+
+    def _importer(self, organisateur_id, fichier, lot):
+        debut = time.perf_counter()
+        resume, _ = effectifs.importer(
+            organisateur_id, effectifs.lire_csv(fichier), taille_lot=lot)
+        return resume, time.perf_counter() - debut
+
+    def handle(self, *args, **options):
+        n = options['lignes']
+        taille = options['joueurs_par_equipe']
+        prefixe = 'bench-effectifs'
+        with bench.donnees_temporaires():
+            donnees = bench.generer(
+                tournois=0, equipes=-(-n // taille), rencontres_par_tournoi=0,
+                prefixe=prefixe)
+            organisateur_id = donnees['organisateur'].pk
+            equipe_ids = donnees['equipe_ids']
+            bench.joueurs(f'{prefixe}-joueur', n)
+            joueurs = f'{prefixe}-joueur'
+
+            passes = [
+                ('import initial', lambda i: 'capitaine' if i % taille == 0
+                 else 'membre'),
+                ('réimport identique', lambda i: 'capitaine' if i % taille == 0
+                 else 'membre'),
+                ('rôles modifiés', lambda i: 'capitaine' if i % taille == 1
+                 else 'remplacant' if i % 5 == 0 else 'membre'),
+            ]
+            self.stdout.write(f"{n} lignes, lots de {options['lot']}")
+            for nom, roles in passes:
+                fichier = self._csv(joueurs, equipe_ids, n, taille, roles)
+                resume, duree = self._importer(
+                    organisateur_id, fichier, options['lot'])
+                self.stdout.write(
+                    f"{nom:<20}{duree:>8.1f} s{n / duree:>10.0f} lignes/s  "
+                    + ", ".join(f"{statut} {nombre}"
+                                for statut, nombre in sorted(resume.items())))
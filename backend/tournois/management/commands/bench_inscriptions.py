@@ -0,0 +1,79 @@
+# tournois/management/commands/bench_inscriptions.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from tournois import bench, inscriptions
+from tournois.models import Inscription, Paiement, PlacesTournoi, Utilisateur
+
+
+class Command(BaseCommand):
+    help = ("Lance N inscriptions concurrentes sur un tournoi de capacité C "
+            "et vérifie qu'aucune place n'est attribuée en trop.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipes', type=int, default=500)
+        parser.add_argument('--capacite', type=int, default=128)
+        parser.add_argument('--threads', type=int, default=32)
+
+    def handle(self, *args, **options):
+        # Les threads ont chacun leur connexion : les données doivent être
+        # validées, elles sont supprimées à la fin.
+        prefixe = f'bench-inscriptions-{int(time.time())}'
+        donnees = bench.generer(tournois=1, equipes=options['equipes'],
+                                rencontres_par_tournoi=0, joueurs_par_equipe=1,
+                                ratio_termines=0, prefixe=prefixe)
+        tournoi_id = donnees['tournois'][0].pk
+        try:
+            inscriptions.definir_capacite(tournoi_id, options['capacite'])
+            resultats = {'acceptees': 0, 'complet': 0, 'erreurs': 0}
+            verrou = threading.Lock()
+
+            def inscrire(equipe_id):
+                try:
+                    inscriptions.inscrire(tournoi_id, equipe_id)
+                    resultat = 'acceptees'
+                except inscriptions.TournoiComplet:
+                    resultat = 'complet'
+                except (ValidationError, OperationalError):
+                    resultat = 'erreurs'
+                finally:
+                    connection.close()
+                with verrou:
+                    resultats[resultat] += 1
+
+            debut = time.perf_counter()
+            with ThreadPoolExecutor(options['threads']) as executeur:
+                list(executeur.map(inscrire, donnees['equipe_ids']))
+            duree = time.perf_counter() - debut
+
+            places = PlacesTournoi.objects.get(pk=tournoi_id)
+            inscrites = Inscription.objects.filter(
+                tournoi_id=tournoi_id).exclude(statut='annulee').count()
+        finally:
+            Paiement.objects.filter(
+                inscription__tournoi_id=tournoi_id).delete()
+            Utilisateur.objects.filter(
+                email__startswith=f'{prefixe}-',
+                email__endswith='@bench.local').delete()
+
+        self.stdout.write(f"{options['equipes']} inscriptions, "
+                          f"{options['threads']} threads, "
+                          f"capacité {options['capacite']}")
+        self.stdout.write(f"acceptées {resultats['acceptees']}, "
+                          f"refusées (complet) {resultats['complet']}, "
+                          f"erreurs {resultats['erreurs']}")
+        self.stdout.write(f"compteur {places.occupees}/{places.capacite}, "
+                          f"inscriptions en base {inscrites}")
+        self.stdout.write(f"{duree * 1000:.0f} ms, "
+                          f"{options['equipes'] / duree:.0f} inscriptions/s")
+        surreservation = max(0, inscrites - places.capacite)
+        if surreservation or inscrites != places.occupees:
+            self.stderr.write(self.style.ERROR(
+                f"Surréservation: {surreservation} place(s)"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Aucune surréservation"))
@@ -0,0 +1,45 @@
+# tournois/management/commands/bench_instantanes.py
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tournois import bench, instantanes
+
+
+class Command(BaseCommand):
+    help = ("Compare le service d'une page de tournoi depuis l'instantané "
+            "et depuis les tables normalisées.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rencontres', type=int, default=120,
+                            help="Rencontres dans le tournoi mesuré")
+        parser.add_argument('--equipes', type=int, default=32)
+        parser.add_argument('--joueurs', type=int, default=8,
+                            help="Joueurs par équipe")
+        parser.add_argument('--repetitions', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with bench.donnees_temporaires():
+            donnees = bench.generer(
+                tournois=1, equipes=options['equipes'],
+                rencontres_par_tournoi=options['rencontres'],
+                joueurs_par_equipe=options['joueurs'], ratio_termines=0)
+            tournoi_id = donnees['tournois'][0].pk
+            instantanes.reconstruire(tournoi_id)
+
+            chemins = {
+                'normalisé': lambda: instantanes.construire(tournoi_id),
+                'instantané': lambda: instantanes.lire(tournoi_id),
+            }
+            resultats = {}
+            for nom, chemin in chemins.items():
+                with CaptureQueriesContext(connection) as requetes:
+                    chemin()
+                resultats[nom] = (len(requetes),
+                                  bench.chronometrer(chemin, options['repetitions']))
+
+        self.stdout.write(f"{'chemin':<12}{'requêtes':>10}{'médiane (ms)':>15}{'p95 (ms)':>12}")
+        for nom, (nb_requetes, mesure) in resultats.items():
+            self.stdout.write(
+                f"{nom:<12}{nb_requetes:>10}{mesure['mediane_ms']:>15}"
+                f"{mesure['p95_ms']:>12}")
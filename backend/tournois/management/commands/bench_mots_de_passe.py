@@ -0,0 +1,82 @@
+# tournois/management/commands/bench_mots_de_passe.py
+import os
+import time
+
+from django.contrib.auth.hashers import get_hashers, make_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from tournois import bench, mots_de_passe
+from tournois.models import Utilisateur
+
+
+def _debit(fonction, nombre):
+    """Appels par seconde de `fonction` sur `nombre` appels."""
+    debut = time.perf_counter()
+    for i in range(nombre):
+        fonction(i)
+    return nombre / (time.perf_counter() - debut)
+
+
+class Command(BaseCommand):
+    help = ("Mesure le débit de hachage (hachages/s par cœur) de chaque "
+            "algorithme configuré et le débit des inscriptions et "
+            "connexions, rehachage compris.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hachages', type=int, default=20,
+                            help="Hachages par mesure")
+        parser.add_argument('--utilisateurs', type=int, default=20)
+
+    def handle(self, *args, **options):
+        coeurs = os.cpu_count() or 1
+        self.stdout.write(f"{coeurs} cœur(s)\n")
+        self._algorithmes(options['hachages'])
+        self._parcours(options['utilisateurs'])
+
+    def _algorithmes(self, nombre):
+        self.stdout.write(f"{'algorithme':<16}{'hachages/s par cœur':>20}"
+                          f"{'ms par hachage':>16}")
+        for hacheur in get_hashers():
+            try:
+                debit = _debit(lambda i: make_password(
+                    f'mot-{i}', hasher=hacheur.algorithm), nombre)
+            except (ValueError, TypeError) as e:
+                # Bibliothèque absente (argon2-cffi, bcrypt...)
+                self.stdout.write(f"{hacheur.algorithm:<16}{'indisponible':>20}"
+                                  f"  ({e})")
+                continue
+            self.stdout.write(f"{hacheur.algorithm:<16}{debit:>20.1f}"
+                              f"{1000 / debit:>16.1f}")
+
+    def _parcours(self, nombre):
+        """Inscription (save() hache) et connexions : à un coût réduit,
+        puis après le retour au coût des settings (la première connexion
+        rehache, les suivantes non)."""
+        iterations = mots_de_passe.PBKDF2Hacheur().iterations
+        reduit = iterations // 2
+        self.stdout.write(f"\n{'parcours':<34}{'par seconde':>12}")
+        with bench.donnees_temporaires():
+            with override_settings(HACHAGE_PBKDF2_ITERATIONS=reduit):
+                inscriptions = _debit(lambda i: Utilisateur.objects.create(
+                    nom=f'bench {i}', email=f'bench-mdp-{i}@bench.local',
+                    motDePasse=f'mot-{i}', role='joueur'), nombre)
+                utilisateurs = list(Utilisateur.objects.filter(
+                    email__startswith='bench-mdp-').order_by('pk'))
+                connexions = _debit(lambda i: mots_de_passe.verifier(
+                    utilisateurs[i], f'mot-{i}'), nombre)
+            rehachages = _debit(lambda i: mots_de_passe.verifier(
+                utilisateurs[i], f'mot-{i}'), nombre)
+            apres = _debit(lambda i: mots_de_passe.verifier(
+                utilisateurs[i], f'mot-{i}'), nombre)
+            rehaches = sum(
+                u.motDePasse.startswith(f'pbkdf2_sha256${iterations}$')
+                for u in Utilisateur.objects.filter(
+                    email__startswith='bench-mdp-'))
+        for nom, debit in (
+                (f"inscription ({reduit} itér.)", inscriptions),
+                (f"connexion ({reduit} itér.)", connexions),
+                (f"1re connexion -> {iterations} itér.", rehachages),
+                (f"connexion ({iterations} itér.)", apres)):
+            self.stdout.write(f"{nom:<34}{debit:>12.1f}")
+        self.stdout.write(f"{rehaches}/{nombre} mots de passe rehachés")
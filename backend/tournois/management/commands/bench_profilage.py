@@ -0,0 +1,46 @@
+# tournois/management/commands/bench_profilage.py
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from tournois import bench, profilage
+from tournois.views import RencontresAPI
+
+
+class Command(BaseCommand):
+    help = ("Mesure le coût de ProfilageMiddleware sur GET /api/rencontres/ : "
+            "sans le middleware, middleware inactif, requête profilée.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rencontres', type=int, default=200)
+        parser.add_argument('--repetitions', type=int, default=200)
+
+    def handle(self, *args, **options):
+        usine = RequestFactory()
+        vue = RencontresAPI.as_view()
+        middleware = profilage.ProfilageMiddleware(vue)
+        jeton = profilage.jeton(0)
+        chemin = f"/api/rencontres/?limit={options['rencontres']}"
+
+        with bench.donnees_temporaires(), override_settings(
+                PROFILAGE_ECHANTILLON=0):
+            bench.generer(tournois=1, rencontres_par_tournoi=options['rencontres'])
+            mesures = {
+                'sans middleware': lambda: vue(usine.get(chemin)),
+                'middleware inactif': lambda: middleware(usine.get(chemin)),
+                'requête profilée': lambda: middleware(
+                    usine.get(chemin, HTTP_X_PROFILAGE=jeton)),
+            }
+            resultats = {nom: bench.chronometrer(mesure, options['repetitions'])
+                         for nom, mesure in mesures.items()}
+            dernier = profilage.profils()[0]
+
+        reference = resultats['sans middleware']['mediane_ms']
+        self.stdout.write(f"{options['rencontres']} rencontres par requête")
+        self.stdout.write(f"{'':<20}{'médiane (ms)':>14}{'p95 (ms)':>10}{'surcoût':>10}")
+        for nom, mesure in resultats.items():
+            surcout = mesure['mediane_ms'] / reference - 1
+            self.stdout.write(f"{nom:<20}{mesure['mediane_ms']:>14}"
+                              f"{mesure['p95_ms']:>10}{surcout:>10.1%}")
+        self.stdout.write(f"dernier profil : {dernier['nb_requetes']} requête(s) "
+                          f"SQL, {dernier['duree_ms']} ms")
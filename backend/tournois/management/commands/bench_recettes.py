@@ -0,0 +1,132 @@
+# tournois/management/commands/bench_recettes.py
+import random
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tournois import bench, recettes
+from tournois.models import Paiement, RecettesJour
+
+# Répartition des méthodes et des statuts des paiements générés
+METHODES = ['carte'] * 8 + ['virement', 'especes']
+STATUTS = ['paye'] * 7 + ['en_attente', 'refuse', 'rembourse']
+PERIODES = (7, 30, 365)
+REGROUPEMENTS = ((), ('organisateur',), ('jour', 'methode'), ('tournoi',))
+
+
+class Command(BaseCommand):
+    help = ("Compare les recettes lues dans les agrégats journaliers et par "
+            "GROUP BY sur les paiements, et mesure le coût de la mise à jour "
+            "incrémentale, sur des données générées puis annulées.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paiements', type=int, default=200000)
+        parser.add_argument('--tournois', type=int, default=100)
+        parser.add_argument('--organisateurs', type=int, default=20)
+        parser.add_argument('--fenetre', type=int, default=14,
+                            help="Jours de paiement par tournoi")
+        parser.add_argument('--transitions', type=int, default=500)
+        parser.add_argument('--repetitions', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with bench.donnees_temporaires():
+            debut = time.perf_counter()
+            self._generer(options)
+            generation = time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            recettes.verifier(corriger=True)
+            construction = time.perf_counter() - debut
+            self.stdout.write(
+                f"{options['paiements']} paiements générés en {generation:.1f}s, "
+                f"{RecettesJour.objects.count()} lignes d'agrégats construites "
+                f"en {construction:.1f}s")
+
+            self._lectures(options['repetitions'])
+            self._transitions(options['transitions'])
+
+            ecarts = recettes.verifier()
+            if ecarts:
+                self.stderr.write(self.style.ERROR(
+                    f"{len(ecarts)} écart(s) après les transitions"))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    "Agrégats identiques au recalcul complet"))
+
+    def _generer(self, options):
+        """Paiements répartis sur l'année passée : ceux d'un tournoi
+        tombent dans les `fenetre` jours qui précèdent son début."""
+        aleatoire = random.Random(0)
+        joueur_ids = bench.joueurs('bench-recettes', 200)
+        tournois = [(aleatoire.randrange(options['fenetre'], 365),
+                     10 ** 9 + i, 10 ** 9 + i % options['organisateurs'])
+                    for i in range(options['tournois'])]
+        # date_paiement (auto_now_add) est fixée après coup, par jour
+        par_jour = {}
+        for _ in range(options['paiements']):
+            fin, tournoi_id, organisateur_id = aleatoire.choice(tournois)
+            jour = fin - aleatoire.randrange(options['fenetre'])
+            par_jour.setdefault(jour, []).append(Paiement(
+                joueur_id=aleatoire.choice(joueur_ids),
+                montant=Decimal(aleatoire.choice((10, 15, 25, 40))),
+                methode=aleatoire.choice(METHODES),
+                statut=aleatoire.choice(STATUTS),
+                tournoi_id=tournoi_id, organisateur_id=organisateur_id))
+        maintenant = timezone.now()
+        for jour, paiements in par_jour.items():
+            premier = Paiement.objects.order_by('-pk').values_list(
+                'pk', flat=True).first() or 0
+            Paiement.objects.bulk_create(paiements, batch_size=1000)
+            Paiement.objects.filter(pk__gt=premier).update(
+                date_paiement=maintenant - timedelta(days=jour))
+
+    def _lectures(self, repetitions):
+        aujourd_hui = timezone.localdate()
+        self.stdout.write(f"\n{'période':>8} {'regroupement':<14}"
+                          f"{'agrégats ms':>12}{'GROUP BY ms':>12}{'gain':>8}")
+        for jours in PERIODES:
+            periode = {'debut': aujourd_hui - timedelta(days=jours - 1),
+                       'fin': aujourd_hui}
+            for par in REGROUPEMENTS:
+                incremental = bench.chronometrer(
+                    lambda: recettes.recettes(par=par, **periode), repetitions)
+                complet = bench.chronometrer(
+                    lambda: recettes.balayage(par=par, **periode), repetitions)
+                if (recettes.recettes(par=par, **periode)
+                        != recettes.balayage(par=par, **periode)):
+                    self.stderr.write(self.style.ERROR(
+                        f"Résultats différents ({jours} j, {par})"))
+                self.stdout.write(
+                    f"{jours:>6} j {','.join(par) or 'total':<14}"
+                    f"{incremental['mediane_ms']:>12.2f}"
+                    f"{complet['mediane_ms']:>12.2f}"
+                    f"{complet['mediane_ms'] / incremental['mediane_ms']:>7.1f}x")
+
+    def _transitions(self, nombre):
+        """Coût d'un passage en_attente -> paye par save(), avec et sans
+        la mise à jour des agrégats."""
+        en_attente = list(Paiement.objects.filter(statut='en_attente')[:2 * nombre])
+        durees = {}
+        for nom, paiements in (('sans', en_attente[:nombre]),
+                               ('avec', en_attente[nombre:])):
+            with ExitStack() as pile:
+                if nom == 'sans':
+                    pile.enter_context(recettes.suspendre())
+                debut = time.perf_counter()
+                for paiement in paiements:
+                    paiement.statut = 'paye'
+                    paiement.save()
+                durees[nom] = ((time.perf_counter() - debut) * 1000
+                               / max(len(paiements), 1))
+            if nom == 'sans':
+                # Agrégats remis d'aplomb : la vérification finale porte
+                # sur les transitions incrémentales
+                recettes.verifier(corriger=True)
+        self.stdout.write(
+            f"\nTransition en_attente -> paye : "
+            f"{durees['avec']:.2f} ms avec agrégats, "
+            f"{durees['sans']:.2f} ms sans (par paiement)")
@@ -0,0 +1,64 @@
+# tournois/management/commands/bench_serialisation.py
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from tournois import bench, renderers
+from tournois.models import Rencontre
+from tournois.serializers import RencontreValeursSerializer
+
+
+class RencontreSerializer(serializers.ModelSerializer):
+    """Référence mesurée : ModelSerializer classique, restreint à `fields`."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for nom in set(self.fields) - set(fields):
+                self.fields.pop(nom)
+
+    class Meta:
+        model = Rencontre
+        fields = tuple(RencontreValeursSerializer.champs)
+        read_only_fields = fields
+
+
+class Command(BaseCommand):
+    help = ("Sérialise N rencontres avec ModelSerializer + JSONRenderer et "
+            "avec le chemin dictionnaire + orjson / MessagePack.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rencontres', type=int, default=10000)
+        parser.add_argument('--repetitions', type=int, default=5)
+        parser.add_argument('--fields', default='id,date_heure,statut,score1,score2',
+                            help="Sous-ensemble mesuré en plus des champs complets")
+
+    def handle(self, *args, **options):
+        n = options['rencontres']
+        champs = options['fields'].split(',')
+        with bench.donnees_temporaires():
+            bench.generer(tournois=max(1, n // 1000),
+                          rencontres_par_tournoi=min(n, 1000), ratio_termines=0.5)
+            queryset = Rencontre.objects.order_by('pk')[:n]
+
+            chemins = {
+                'ModelSerializer + JSONRenderer': lambda: JSONRenderer().render(
+                    RencontreSerializer(queryset, many=True).data),
+                'ModelSerializer ?fields + JSON': lambda: JSONRenderer().render(
+                    RencontreSerializer(queryset, many=True, fields=champs).data),
+                'valeurs + orjson': lambda: renderers.ORJSONRenderer().render(
+                    RencontreValeursSerializer().serialiser(queryset)),
+                'valeurs ?fields + orjson': lambda: renderers.ORJSONRenderer().render(
+                    RencontreValeursSerializer(champs).serialiser(queryset)),
+            }
+            if renderers.msgpack is not None:
+                chemins['valeurs + MessagePack'] = lambda: renderers.MessagePackRenderer().render(
+                    RencontreValeursSerializer().serialiser(queryset))
+
+            resultats = {nom: (len(chemin()), bench.chronometrer(
+                chemin, options['repetitions'])) for nom, chemin in chemins.items()}
+
+        self.stdout.write(f"{n} rencontres")
+        self.stdout.write(f"{'chemin':<34}{'octets':>10}{'médiane (ms)':>15}")
+        for nom, (taille, mesure) in resultats.items():
+            self.stdout.write(f"{nom:<34}{taille:>10}{mesure['mediane_ms']:>15}")
@@ -0,0 +1,139 @@
+# tournois/management/commands/bench_shards.py
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from tournois import bench, shards
+from tournois.models import Equipe, Organisateur, Rencontre, Tournoi, Utilisateur
+
+
+def _ecrire(lot):
+    """Crée une rencontre par numéro du lot, chacune dans sa transaction,
+    dans le shard de son organisateur ; retourne (réussies, erreurs)."""
+    prefixe, tournois, numeros = lot
+    ok = erreurs = 0
+    for n in numeros:
+        organisateur_id, tournoi_id, equipe_ids = random.choice(tournois)
+        e1, e2 = random.sample(equipe_ids, 2)
+        try:
+            with shards.pour_organisateur(organisateur_id):
+                with transaction.atomic(using=shards.base()):
+                    Rencontre.objects.create(
+                        tournoi_id=tournoi_id, nom=f'{prefixe} {n}',
+                        date_heure=timezone.now() + timedelta(hours=n),
+                        equipe1_id=e1, equipe2_id=e2)
+            ok += 1
+        except OperationalError:
+            erreurs += 1
+    connections.close_all()
+    return ok, erreurs
+
+
+class Command(BaseCommand):
+    help = ("Mesure le débit d'écriture et la latence d'une lecture sur tous "
+            "les shards, pour 1, 2, 4... shards SQLite temporaires.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shards', default='1,2,4',
+                            help="Nombres de shards à comparer")
+        parser.add_argument('--organisateurs', type=int, default=16)
+        parser.add_argument('--ecritures', type=int, default=2000)
+        parser.add_argument('--processus', type=int, default=8)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'shards':>6} {'écritures/s':>12} {'erreurs':>8} "
+                          f"{'lecture médiane ms':>19} {'p95 ms':>8}")
+        for nombre in [int(n) for n in options['shards'].split(',')]:
+            with tempfile.TemporaryDirectory() as dossier:
+                aliases = [f'bench_shard_{nombre}_{i}' for i in range(nombre)]
+                for alias in aliases:
+                    bench.ajouter_base(alias, os.path.join(dossier, f'{alias}.sqlite3'))
+                try:
+                    with override_settings(SHARDS=aliases):
+                        resultat = self._mesurer(nombre, options)
+                finally:
+                    for alias in aliases:
+                        bench.retirer_base(alias)
+            self.stdout.write(
+                f"{nombre:>6} {resultat['debit']:>12.0f} "
+                f"{resultat['erreurs']:>8} "
+                f"{resultat['lecture']['mediane_ms']:>19.2f} "
+                f"{resultat['lecture']['p95_ms']:>8.2f}")
+
+    def _mesurer(self, nombre, options):
+        for alias in settings.SHARDS:
+            call_command('migrate', database=alias, run_syncdb=True,
+                         verbosity=0)
+        call_command('preparer_shards', stdout=open(os.devnull, 'w'))
+
+        # Données globales validées dans 'default', supprimées à la fin
+        prefixe = f'bench-shards-{nombre}-{int(time.time())}'
+        Utilisateur.objects.bulk_create([
+            Utilisateur(nom=f'{prefixe} {i}', email=f'{prefixe}-{i}@bench.local',
+                        motDePasse='!', role='organisateur')
+            for i in range(options['organisateurs'])
+        ])
+        try:
+            tournois = self._preparer(prefixe)
+            # Des processus et non des threads : l'écriture via l'ORM est
+            # surtout du Python, les threads se partageraient un seul cœur
+            connections.close_all()
+            lots = [(prefixe, tournois, range(i, options['ecritures'],
+                                              options['processus']))
+                    for i in range(options['processus'])]
+            debut = time.perf_counter()
+            with multiprocessing.get_context('fork').Pool(
+                    options['processus']) as pool:
+                comptes = pool.map(_ecrire, lots)
+            duree = time.perf_counter() - debut
+            resultats = {'ecritures': sum(ok for ok, _ in comptes),
+                         'erreurs': sum(erreurs for _, erreurs in comptes)}
+
+            def prochaines():
+                return list(Rencontre.objects.filter(
+                    statut='planifie').order_by('date_heure', 'pk').values(
+                    'pk', 'date_heure')[:100])
+            lecture = bench.chronometrer(
+                lambda: shards.rassembler(prochaines), repetitions=50)
+        finally:
+            Utilisateur.objects.filter(
+                email__startswith=f'{prefixe}-',
+                email__endswith='@bench.local').delete()
+        return {'debit': resultats['ecritures'] / duree,
+                'erreurs': resultats['erreurs'], 'lecture': lecture}
+
+    def _preparer(self, prefixe):
+        """Un organisateur, un tournoi et 8 équipes par utilisateur créé ;
+        retourne [(organisateur_id, tournoi_id, equipe_ids)]."""
+        maintenant = timezone.now()
+        tournois = []
+        for utilisateur_id in Utilisateur.objects.filter(
+                email__startswith=f'{prefixe}-').values_list('pk', flat=True):
+            organisateur_id = Organisateur.objects.create(
+                utilisateur_id=utilisateur_id).pk
+            # Attribution du shard avant la mesure
+            with shards.pour_organisateur(organisateur_id):
+                tournoi = Tournoi.objects.create(
+                    nom=f'{prefixe} tournoi', description='', type='round-robin',
+                    date_debut=maintenant, date_fin=maintenant + timedelta(days=7),
+                    prix_inscription=Decimal('0'), organisateur_id=organisateur_id)
+                Equipe.objects.bulk_create([
+                    Equipe(nom=f'{prefixe} {organisateur_id} equipe {i}',
+                           organisateur_id=organisateur_id)
+                    for i in range(8)
+                ])
+                equipe_ids = list(Equipe.objects.filter(
+                    organisateur_id=organisateur_id).values_list('pk', flat=True))
+            tournois.append((organisateur_id, tournoi.pk, equipe_ids))
+        return tournois
@@ -0,0 +1,77 @@
+# tournois/management/commands/bench_suisse.py
+import random
+
+from django.core.management.base import BaseCommand
+
+from tournois import bench, suisse
+from tournois.models import Rencontre
+
+
+class Command(BaseCommand):
+    help = ("Déroule un tournoi mixte de N équipes (résultats aléatoires) et "
+            "mesure l'appariement seul puis la génération complète de chaque "
+            "ronde (lecture de l'index, bulk_create).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipes', type=int, default=1000)
+        parser.add_argument('--rondes', type=int, default=None)
+        parser.add_argument('--qualifies', type=int, default=8)
+        parser.add_argument('--repetitions', type=int, default=20)
+        parser.add_argument('--graine', type=int, default=0)
+
+    def _jouer(self, tournoi_id, aleatoire):
+        rencontres = list(Rencontre.objects.filter(
+            tournoi_id=tournoi_id, statut='planifie'))
+        for rencontre in rencontres:
+            rencontre.score1 = aleatoire.randint(0, 4)
+            rencontre.score2 = aleatoire.randint(0, 4)
+            if rencontre.phase == 'elimination' and rencontre.score1 == rencontre.score2:
+                rencontre.score1 += 1
+            rencontre.statut = 'termine'
+        Rencontre.objects.bulk_update(
+            rencontres, ['score1', 'score2', 'statut'], batch_size=1000)
+
+    def handle(self, *args, **options):
+        aleatoire = random.Random(options['graine'])
+        lignes = []
+        with bench.donnees_temporaires():
+            donnees = bench.generer(tournois=1, equipes=options['equipes'],
+                                    rencontres_par_tournoi=0, ratio_termines=0)
+            tournoi = donnees['tournois'][0]
+            tournoi.type = 'mixte'
+            format_mixte, _ = suisse.demarrer(
+                tournoi, donnees['equipe_ids'], nb_rondes=options['rondes'],
+                nb_qualifies=options['qualifies'])
+
+            while True:
+                self._jouer(tournoi.pk, aleatoire)
+                participants, adversaires, exemptes, stats = suisse._index(
+                    tournoi.pk)
+                ordre = suisse.classer(participants, adversaires, stats)
+                mesure = bench.chronometrer(
+                    lambda: suisse.apparier(ordre, adversaires, exemptes),
+                    options['repetitions'])
+                ronde = format_mixte.ronde_courante + 1
+                debut = bench.time.perf_counter()
+                creees = suisse.avancer(tournoi.pk)
+                total_ms = (bench.time.perf_counter() - debut) * 1000
+                if not creees:
+                    break
+                format_mixte.refresh_from_db()
+                if format_mixte.phase == 'suisse':
+                    revanches = sum(
+                        r.equipe2_id in adversaires.get(r.equipe1_id, ())
+                        for r in creees)
+                    lignes.append((f'suisse {ronde}', len(creees), revanches,
+                                   mesure['mediane_ms'], round(total_ms, 1)))
+                else:
+                    lignes.append((f'élimination {format_mixte.ronde_courante}',
+                                   len(creees), '-', '-', round(total_ms, 1)))
+
+        self.stdout.write(f"{options['equipes']} équipes, "
+                          f"{format_mixte.nb_rondes} rondes suisses")
+        self.stdout.write(f"{'ronde':<16}{'rencontres':>12}{'revanches':>11}"
+                          f"{'appariement (ms)':>18}{'ronde (ms)':>12}")
+        for nom, nombre, revanches, appariement, total in lignes:
+            self.stdout.write(f"{nom:<16}{nombre:>12}{revanches:>11}"
+                              f"{appariement:>18}{total:>12}")
@@ -0,0 +1,29 @@
+# tournois/management/commands/compacter_changements.py
+from django.core.management.base import BaseCommand
+
+from tournois import changements, shards
+
+
+class Command(BaseCommand):
+    help = ("Compacte le journal des changements de chaque base : au-delà "
+            "de la rétention, seul le dernier changement d'un objet est "
+            "gardé (à lancer chaque nuit).")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention', type=int, default=None,
+            help="Jours conservés intégralement (CHANGEMENTS_RETENTION)")
+        parser.add_argument(
+            '--retention-suppressions', type=int, default=None,
+            help="Jours au bout desquels une suppression est oubliée "
+                 "(CHANGEMENTS_RETENTION_SUPPRESSIONS)")
+
+    def handle(self, *args, **options):
+        for alias in shards.bases():
+            remplaces, oubliees = changements.compacter(
+                alias, options['retention'],
+                options['retention_suppressions'])
+            self.stdout.write(
+                f"{alias}: {remplaces} changement(s) remplacé(s), "
+                f"{oubliees} suppression(s) oubliée(s)")
+        self.stdout.write(self.style.SUCCESS("Journal compacté"))
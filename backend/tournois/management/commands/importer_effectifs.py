@@ -0,0 +1,28 @@
+# tournois/management/commands/importer_effectifs.py
+from django.core.management.base import BaseCommand
+
+from tournois import effectifs, shards
+
+
+class Command(BaseCommand):
+    help = ("Importe un fichier CSV d'effectifs (email,equipe,role) dans les "
+            "équipes d'un organisateur ; affiche les lignes refusées.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier')
+        parser.add_argument('--organisateur', type=int, required=True)
+        parser.add_argument('--lot', type=int, default=effectifs.TAILLE_LOT,
+                            help="Lignes traitées par transaction")
+
+    def handle(self, *args, **options):
+        with open(options['fichier'], encoding='utf-8-sig', newline='') as fichier, \
+                shards.pour_organisateur(options['organisateur']):
+            resume, resultats = effectifs.importer(
+                options['organisateur'], effectifs.lire_csv(fichier),
+                taille_lot=options['lot'])
+        for resultat in resultats:
+            if resultat['statut'] == 'erreur':
+                self.stderr.write(
+                    f"ligne {resultat['ligne']}: {resultat['message']}")
+        self.stdout.write(self.style.SUCCESS(", ".join(
+            f"{statut} {nombre}" for statut, nombre in sorted(resume.items()))))
@@ -0,0 +1,25 @@
+# tournois/management/commands/planifier_notifications.py
+from django.core.management.base import BaseCommand
+
+from tournois import notifications, shards
+
+
+class Command(BaseCommand):
+    help = ("Planificateur des rappels de rencontres (24 h et 1 h avant) et "
+            "des avis de changement de terrain ou d'horaire. Processus "
+            "unique, à laisser tourner.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalle', type=int, default=30,
+            help="Secondes entre deux tours")
+        parser.add_argument(
+            '--shard', default=None,
+            help="Avec le partitionnement, shard suivi (un processus par shard)")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Planificateur démarré (tour toutes les "
+                          f"{options['intervalle']} s)")
+        alias = options['shard'] or shards.bases()[0]
+        with shards.sur(alias):
+            notifications.Planificateur().executer(options['intervalle'])
@@ -0,0 +1,63 @@
+# tournois/management/commands/preparer_shards.py
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tournois import shards
+
+
+def _tables():
+    """Tables partitionnées à clé auto-incrémentée, avec leur colonne
+    de clé."""
+    for label in sorted(shards.PARTITIONNES):
+        model = apps.get_model(label)
+        if model._meta.pk.get_internal_type() in ('AutoField', 'BigAutoField'):
+            yield model._meta.db_table, model._meta.pk.column
+
+
+def _demarrer_a(connexion, table, colonne, debut):
+    """Les prochains identifiants de `table` partent de `debut` (jamais
+    en dessous des identifiants déjà attribués)."""
+    nom = connexion.ops.quote_name
+    with connexion.cursor() as curseur:
+        curseur.execute(f'SELECT MAX({nom(colonne)}) FROM {nom(table)}')
+        debut = max(debut, (curseur.fetchone()[0] or 0) + 1)
+        if connexion.vendor == 'sqlite':
+            # sqlite_sequence contient la dernière valeur attribuée
+            curseur.execute(
+                'UPDATE sqlite_sequence SET seq = %s WHERE name = %s',
+                [debut - 1, table])
+            if not curseur.rowcount:
+                curseur.execute(
+                    'INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                    [table, debut - 1])
+        elif connexion.vendor == 'mysql':
+            curseur.execute(f'ALTER TABLE {nom(table)} '
+                            f'AUTO_INCREMENT = {int(debut)}')
+        elif connexion.vendor == 'postgresql':
+            curseur.execute(
+                "SELECT setval(pg_get_serial_sequence(%s, %s), %s, false)",
+                [table, colonne, debut])
+        else:
+            raise CommandError(f"Base non prise en charge: {connexion.vendor}")
+    return debut
+
+
+class Command(BaseCommand):
+    help = ("Place les identifiants des tables partitionnées de chaque shard "
+            "dans la plage du shard (à lancer après migrate --database sur "
+            "un nouveau shard).")
+
+    def handle(self, *args, **options):
+        if not shards.actif():
+            raise CommandError("settings.SHARDS est vide")
+        for alias in settings.SHARDS:
+            debut = shards.debut_plage(alias)
+            if not debut:
+                continue  # premier shard : plage de départ
+            connexion = connections[alias]
+            for table, colonne in _tables():
+                _demarrer_a(connexion, table, colonne, debut)
+            self.stdout.write(f"{alias}: identifiants à partir de {debut}")
+        self.stdout.write(self.style.SUCCESS("Shards prêts"))
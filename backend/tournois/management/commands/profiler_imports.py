@@ -0,0 +1,153 @@
+# tournois/management/commands/profiler_imports.py
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Ce que fait un worker avant sa première requête
+DEMARRAGE = """
+import django
+django.setup()
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+# Mode préchargement (voir tournois/demarrage.py)
+PRECHARGEMENT = """
+import django
+django.setup()
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+from tournois.demarrage import precharger
+precharger()
+"""
+
+LIGNE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# En dessous, un écart avec la référence est du bruit de mesure
+ECART_MIN_MS = 5
+
+
+def _mesurer(script):
+    """Lance `script` dans un nouvel interpréteur avec -X importtime ;
+    retourne (durée totale ms, {module: (propre ms, cumulé ms)})."""
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(p for p in sys.path if p),
+           'DJANGO_SETTINGS_MODULE': os.environ.get(
+               'DJANGO_SETTINGS_MODULE', 'backend.settings')}
+    debut = time.perf_counter()
+    resultat = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+    duree = (time.perf_counter() - debut) * 1000
+    modules, erreurs = {}, []
+    for ligne in resultat.stderr.splitlines():
+        trouve = LIGNE.match(ligne)
+        if trouve:
+            propre, cumule, _, module = trouve.groups()
+            modules[module] = (int(propre) / 1000, int(cumule) / 1000)
+        elif not ligne.startswith('import time:'):
+            erreurs.append(ligne)
+    if resultat.returncode:
+        raise CommandError('\n'.join(erreurs[-20:]))
+    return duree, modules
+
+
+def _paquet(module):
+    return module.split('.')[0]
+
+
+class Command(BaseCommand):
+    help = ("Mesure le temps d'import au démarrage d'un worker (python -X "
+            "importtime) et le compare à une mesure de référence.")
+    # La mesure se fait dans un nouvel interpréteur
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repetitions', type=int, default=3)
+        parser.add_argument('--top', type=int, default=20,
+                            help="Nombre de modules affichés")
+        parser.add_argument('--prechargement', action='store_true',
+                            help="Mesure le mode préchargement (PRECHARGEMENT)")
+        parser.add_argument('--reference', metavar='FICHIER',
+                            help="Mesure de référence (JSON)")
+        parser.add_argument('--ecrire-reference', action='store_true',
+                            help="Enregistre la mesure dans --reference")
+        parser.add_argument('--tolerance', type=float, default=10,
+                            help="Dépassement admis de la référence, en %%")
+
+    def handle(self, *args, **options):
+        script = PRECHARGEMENT if options['prechargement'] else DEMARRAGE
+        mesures = [_mesurer(script) for _ in range(options['repetitions'])]
+
+        # Médianes sur les répétitions, module par module
+        noms = set().union(*(modules for _, modules in mesures))
+        modules = {
+            nom: tuple(statistics.median(m[nom][i] for _, m in mesures if nom in m)
+                       for i in (0, 1))
+            for nom in noms
+        }
+        paquets = defaultdict(float)
+        for nom, (propre, _) in modules.items():
+            paquets[_paquet(nom)] += propre
+        mesure = {
+            'duree_ms': round(statistics.median(d for d, _ in mesures), 1),
+            'imports_ms': round(sum(propre for propre, _ in modules.values()), 1),
+            'modules': len(modules),
+            'paquets': {nom: round(ms, 1) for nom, ms in sorted(
+                paquets.items(), key=lambda p: p[1], reverse=True)},
+        }
+
+        self.stdout.write(
+            f"Processus: {mesure['duree_ms']} ms, imports: "
+            f"{mesure['imports_ms']} ms, {mesure['modules']} modules")
+        self.stdout.write(f"\n{'cumulé ms':>10} {'propre ms':>10}  module")
+        for nom, (propre, cumule) in sorted(
+                modules.items(), key=lambda m: m[1][1],
+                reverse=True)[:options['top']]:
+            self.stdout.write(f"{cumule:>10.1f} {propre:>10.1f}  {nom}")
+        self.stdout.write(f"\n{'propre ms':>10}  paquet")
+        for nom, ms in list(mesure['paquets'].items())[:options['top']]:
+            self.stdout.write(f"{ms:>10.1f}  {nom}")
+
+        if not options['reference']:
+            if options['ecrire_reference']:
+                raise CommandError("--ecrire-reference demande --reference")
+            return
+        if options['ecrire_reference']:
+            with open(options['reference'], 'w') as fichier:
+                json.dump(mesure, fichier, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f"Référence écrite dans {options['reference']}"))
+            return
+        self._comparer(mesure, options['reference'], options['tolerance'])
+
+    def _comparer(self, mesure, chemin, tolerance):
+        try:
+            with open(chemin) as fichier:
+                reference = json.load(fichier)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Référence illisible: {e}")
+
+        self.stdout.write(f"\nPar rapport à {chemin} :")
+        for nom, ms in mesure['paquets'].items():
+            avant = reference['paquets'].get(nom, 0)
+            if ms - avant > max(ECART_MIN_MS, avant * tolerance / 100):
+                self.stdout.write(self.style.WARNING(
+                    f"  {nom}: {avant} -> {ms} ms"))
+        limite = reference['imports_ms'] * (1 + tolerance / 100)
+        self.stdout.write(
+            f"  imports: {reference['imports_ms']} -> {mesure['imports_ms']} ms "
+            f"(limite {limite:.1f} ms)")
+        if mesure['imports_ms'] > max(limite, reference['imports_ms']
+                                      + ECART_MIN_MS):
+            raise CommandError("Temps d'import au-delà de la référence")
+        self.stdout.write(self.style.SUCCESS("Temps d'import dans la référence"))
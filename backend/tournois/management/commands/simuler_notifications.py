@@ -0,0 +1,140 @@
+# tournois/management/commands/simuler_notifications.py
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tournois import bench, notifications
+from tournois.models import Arbitre, Notification, Rencontre, Utilisateur
+
+
+class Command(BaseCommand):
+    help = ("Déroule le planificateur de notifications sur une horloge "
+            "simulée : rencontres réparties sur deux jours, un changement de "
+            "terrain, un changement d'horaire, une annulation et un "
+            "redémarrage ; vérifie les envois attendus et l'absence de "
+            "doublons.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rencontres', type=int, default=40)
+        parser.add_argument('--joueurs', type=int, default=5,
+                            help="Joueurs par équipe")
+        parser.add_argument('--heures', type=int, default=50)
+        parser.add_argument('--pas', type=int, default=1, help="Minutes par tour")
+
+    def handle(self, *args, **options):
+        with bench.donnees_temporaires():
+            resultat = self._simuler(options)
+        self._rapport(resultat)
+
+    def _simuler(self, options):
+        n = options['rencontres']
+        horloge = notifications.HorlogeSimulee()
+        debut = horloge()
+        donnees = bench.generer(tournois=1, equipes=2 * n, rencontres_par_tournoi=0,
+                                joueurs_par_equipe=options['joueurs'],
+                                ratio_termines=0, prefixe='simulation')
+        arbitre = Arbitre.objects.get(utilisateur=Utilisateur.objects.create(
+            nom='Arbitre simulation', email='arbitre@simulation.local',
+            motDePasse='!', role='arbitre'))
+        equipes = donnees['equipe_ids']
+        ecart = timedelta(hours=options['heures'] - 4) / n
+        rencontres = [
+            Rencontre.objects.create(
+                tournoi=donnees['tournois'][0], equipe1_id=equipes[2 * i],
+                equipe2_id=equipes[2 * i + 1], arbitre=arbitre,
+                date_heure=debut + timedelta(hours=2) + i * ecart,
+                terrain='Terrain A')
+            for i in range(n)
+        ]
+
+        def changer_terrain():
+            rencontres[0].terrain = 'Terrain B'
+            rencontres[0].save()
+
+        def deplacer():
+            rencontres[1].date_heure += timedelta(hours=3)
+            rencontres[1].save()
+
+        def annuler():
+            rencontres[2].statut = 'annule'
+            rencontres[2].save()
+
+        scenario = {
+            timedelta(minutes=30): changer_terrain,
+            timedelta(hours=1): deplacer,
+            timedelta(hours=2): annuler,
+        }
+        redemarrage = timedelta(hours=25)
+
+        envois = []
+        planificateur = notifications.Planificateur(
+            horloge, envoyer=lambda lots: envois.append(lots))
+        requetes, duree, tours = 0, 0.0, 0
+        pas = timedelta(minutes=options['pas'])
+        while horloge() - debut <= timedelta(hours=options['heures']):
+            ecoule = horloge() - debut
+            if ecoule in scenario:
+                scenario[ecoule]()
+            if ecoule == redemarrage:
+                planificateur = notifications.Planificateur(
+                    horloge, envoyer=lambda lots: envois.append(lots))
+            with CaptureQueriesContext(connection) as capture:
+                depart = time.perf_counter()
+                planificateur.tour()
+                duree += time.perf_counter() - depart
+            requetes += len(capture.captured_queries)
+            tours += 1
+            horloge.avancer(pas)
+        fin = horloge()
+
+        # Envois attendus, d'après l'état final des rencontres
+        attendus = Counter()
+        par_rencontre = notifications._destinataires(
+            Rencontre.objects.filter(pk__in=[r.pk for r in rencontres]).values(
+                *notifications.CHAMPS))
+        for rencontre in Rencontre.objects.filter(
+                pk__in=[r.pk for r in rencontres], statut='planifie'):
+            for type_notification, avance in notifications.RAPPELS:
+                instant = rencontre.date_heure - avance
+                if debut - notifications.RETARD_MAX <= instant <= fin:
+                    attendus[type_notification] += len(par_rencontre[rencontre.pk])
+        attendus['modification'] = sum(
+            len(par_rencontre[r.pk]) for r in rencontres[:2])
+
+        return {
+            'tours': tours, 'requetes': requetes, 'duree': duree,
+            'attendus': attendus,
+            'enregistrees': Counter(Notification.objects.values_list(
+                'type', flat=True)),
+            'messages_envoyes': sum(len(m) for lots in envois for m in lots.values()),
+            'envois': sum(len(lots) for lots in envois),
+            'doublons': Notification.objects.count() - len(set(
+                Notification.objects.values_list('utilisateur_id', 'cle'))),
+        }
+
+    def _rapport(self, resultat):
+        self.stdout.write(
+            f"{resultat['tours']} tours, "
+            f"{resultat['requetes'] / resultat['tours']:.2f} requêtes/tour, "
+            f"{resultat['duree'] * 1000 / resultat['tours']:.2f} ms/tour")
+        self.stdout.write(f"{'type':<14}{'attendues':>10}{'envoyées':>10}")
+        ok = True
+        for type_notification, _ in Notification.TYPE_CHOICES:
+            attendu = resultat['attendus'][type_notification]
+            envoye = resultat['enregistrees'][type_notification]
+            ok &= attendu == envoye
+            self.stdout.write(f"{type_notification:<14}{attendu:>10}{envoye:>10}")
+        total = sum(resultat['enregistrees'].values())
+        self.stdout.write(f"{resultat['messages_envoyes']} messages en "
+                          f"{resultat['envois']} envois groupés")
+        ok &= resultat['messages_envoyes'] == total and not resultat['doublons']
+        if ok:
+            self.stdout.write(self.style.SUCCESS(
+                "Envois conformes, aucun doublon"))
+        else:
+            self.stderr.write(self.style.ERROR("Envois non conformes"))
+            raise SystemExit(1)
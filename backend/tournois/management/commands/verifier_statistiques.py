@@ -0,0 +1,38 @@
+# tournois/management/commands/verifier_statistiques.py
+from django.core.management.base import BaseCommand
+
+from tournois import shards, statistiques
+
+
+class Command(BaseCommand):
+    help = ("Compare les agrégats de statistiques avec un recalcul complet "
+            "des rencontres terminées (à lancer chaque nuit).")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corriger', action='store_true',
+            help="Reconstruit les agrégats si des écarts sont trouvés")
+        parser.add_argument(
+            '--details', type=int, default=10,
+            help="Nombre d'écarts affichés par table")
+
+    def handle(self, *args, **options):
+        total = 0
+        for alias in shards.bases():
+            with shards.sur(alias):
+                ecarts = statistiques.verifier(corriger=options['corriger'])
+            for table, lignes in ecarts.items():
+                total += len(lignes)
+                self.stdout.write(f"{alias}/{table}: {len(lignes)} écart(s)")
+                for cle, attendu, en_base in lignes[:options['details']]:
+                    self.stdout.write(
+                        f"  {cle}: attendu={attendu} en_base={en_base}")
+
+        if not total:
+            self.stdout.write(self.style.SUCCESS("Statistiques cohérentes"))
+        elif options['corriger']:
+            self.stdout.write(self.style.WARNING("Agrégats reconstruits"))
+        else:
+            self.stderr.write(self.style.ERROR(
+                "Écarts détectés, relancer avec --corriger"))
+            raise SystemExit(1)
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0002_utilisateur_supabase_uid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueEquipeJour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('matchs_joues', models.IntegerField(default=0)),
+                ('victoires', models.IntegerField(default=0)),
+                ('nuls', models.IntegerField(default=0)),
+                ('defaites', models.IntegerField(default=0)),
+                ('buts_pour', models.IntegerField(default=0)),
+                ('buts_contre', models.IntegerField(default=0)),
+                ('equipe', models.ForeignKey(db_column='equipe_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.equipe')),
+                ('tournoi', models.ForeignKey(db_column='tournoi_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.tournoi')),
+            ],
+            options={
+                'db_table': 'statistique_equipe_jour',
+                'indexes': [models.Index(fields=['equipe', 'jour'], name='stat_equipe_jour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('equipe', 'tournoi', 'jour'), name='unique_statistique_equipe_jour')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistiqueJoueurJour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('matchs_joues', models.IntegerField(default=0)),
+                ('victoires', models.IntegerField(default=0)),
+                ('nuls', models.IntegerField(default=0)),
+                ('defaites', models.IntegerField(default=0)),
+                ('buts_pour', models.IntegerField(default=0)),
+                ('buts_contre', models.IntegerField(default=0)),
+                ('joueur', models.ForeignKey(db_column='joueur_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.joueur')),
+                ('tournoi', models.ForeignKey(db_column='tournoi_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.tournoi')),
+            ],
+            options={
+                'db_table': 'statistique_joueur_jour',
+                'indexes': [models.Index(fields=['joueur', 'jour'], name='stat_joueur_jour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('joueur', 'tournoi', 'jour'), name='unique_statistique_joueur_jour')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='rencontre',
+            index=models.Index(fields=['equipe1', 'statut', 'date_heure'], name='rencontre_equipe1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rencontre',
+            index=models.Index(fields=['equipe2', 'statut', 'date_heure'], name='rencontre_equipe2_idx'),
+        ),
+    ]
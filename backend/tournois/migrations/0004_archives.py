@@ -0,0 +1,83 @@
+# Generated by Django 5.2.1
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0003_statistiques'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaiementArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('joueur_id', models.BigIntegerField(db_index=True)),
+                ('montant', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date_paiement', models.DateTimeField()),
+                ('methode', models.CharField(choices=[('carte', 'Carte bancaire'), ('virement', 'Virement bancaire'), ('especes', 'Espèces'), ('autre', 'Autre')], max_length=20)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('paye', 'Payé'), ('refuse', 'Refusé'), ('rembourse', 'Remboursé')], max_length=20)),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'paiement_archive',
+                'ordering': ['-date_paiement'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RencontreArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tournoi_id', models.BigIntegerField(db_index=True)),
+                ('nom', models.CharField(blank=True, max_length=100)),
+                ('date_heure', models.DateTimeField()),
+                ('duree', models.PositiveIntegerField(blank=True, null=True)),
+                ('score1', models.IntegerField(blank=True, null=True)),
+                ('score2', models.IntegerField(blank=True, null=True)),
+                ('statut', models.CharField(choices=[('planifie', 'Planifié'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('annule', 'Annulé'), ('reporte', 'Reporté')], max_length=20)),
+                ('equipe1_id', models.BigIntegerField()),
+                ('equipe2_id', models.BigIntegerField()),
+                ('arbitre_id', models.BigIntegerField(blank=True, null=True)),
+                ('terrain', models.CharField(blank=True, max_length=100)),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'rencontre_archive',
+                'indexes': [models.Index(fields=['equipe1_id', 'date_heure'], name='rencontre_arch_equipe1_idx'), models.Index(fields=['equipe2_id', 'date_heure'], name='rencontre_arch_equipe2_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TournoiArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('nom', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('type', models.CharField(choices=[('elimination', 'Élimination simple'), ('round-robin', 'Round Robin'), ('mixte', 'Format mixte')], max_length=20)),
+                ('regles', models.TextField(blank=True)),
+                ('date_debut', models.DateTimeField()),
+                ('date_fin', models.DateTimeField()),
+                ('prix_inscription', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('statut', models.CharField(choices=[('planifie', 'Planifié'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('annule', 'Annulé')], max_length=20)),
+                ('organisateur_id', models.BigIntegerField(db_index=True)),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Tournoi archivé',
+                'verbose_name_plural': 'Tournois archivés',
+                'db_table': 'tournoi_archive',
+            },
+        ),
+        migrations.AlterField(
+            model_name='statistiqueequipejour',
+            name='tournoi',
+            field=models.ForeignKey(db_column='tournoi_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='tournois.tournoi'),
+        ),
+        migrations.AlterField(
+            model_name='statistiquejoueurjour',
+            name='tournoi',
+            field=models.ForeignKey(db_column='tournoi_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='tournois.tournoi'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0004_archives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantaneTournoi',
+            fields=[
+                ('tournoi', models.OneToOneField(db_column='tournoi_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='tournois.tournoi')),
+                ('document', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Instantané de tournoi',
+                'verbose_name_plural': 'Instantanés de tournoi',
+                'db_table': 'instantane_tournoi',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0005_instantanetournoi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rencontre',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0006_rencontre_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rencontre',
+            name='phase',
+            field=models.CharField(blank=True, choices=[('suisse', 'Phase suisse'), ('elimination', 'Élimination')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='rencontre',
+            name='ronde',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='rencontre',
+            index=models.Index(fields=['tournoi', 'phase', 'ronde'], name='rencontre_ronde_idx'),
+        ),
+        migrations.CreateModel(
+            name='FormatMixte',
+            fields=[
+                ('tournoi', models.OneToOneField(db_column='tournoi_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='tournois.tournoi')),
+                ('nb_rondes', models.PositiveSmallIntegerField()),
+                ('nb_qualifies', models.PositiveSmallIntegerField(default=8)),
+                ('intervalle_rondes', models.DurationField(default=datetime.timedelta(days=1))),
+                ('phase', models.CharField(choices=[('suisse', 'Phase suisse'), ('elimination', 'Élimination'), ('termine', 'Terminé')], default='suisse', max_length=20)),
+                ('ronde_courante', models.PositiveSmallIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Format mixte',
+                'verbose_name_plural': 'Formats mixtes',
+                'db_table': 'format_mixte',
+            },
+        ),
+        migrations.CreateModel(
+            name='Exemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ronde', models.PositiveSmallIntegerField()),
+                ('equipe', models.ForeignKey(db_column='equipe_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.equipe')),
+                ('tournoi', models.ForeignKey(db_column='tournoi_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.tournoi')),
+            ],
+            options={
+                'db_table': 'exemption',
+                'constraints': [models.UniqueConstraint(fields=('tournoi', 'ronde'), name='unique_exemption_ronde')],
+            },
+        ),
+    ]
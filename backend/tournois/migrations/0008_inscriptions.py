@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0007_format_mixte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlacesTournoi',
+            fields=[
+                ('tournoi', models.OneToOneField(db_column='tournoi_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='tournois.tournoi')),
+                ('capacite', models.PositiveIntegerField()),
+                ('occupees', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Places de tournoi',
+                'verbose_name_plural': 'Places de tournoi',
+                'db_table': 'places_tournoi',
+                'constraints': [models.CheckConstraint(condition=models.Q(('occupees__lte', models.F('capacite'))), name='check_places_capacite')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Inscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente de paiement'), ('confirmee', 'Confirmée'), ('annulee', 'Annulée')], default='en_attente', max_length=20)),
+                ('date_inscription', models.DateTimeField(auto_now_add=True)),
+                ('equipe', models.ForeignKey(db_column='equipe_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.equipe')),
+                ('paiement', models.OneToOneField(blank=True, db_column='paiement_id', db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='tournois.paiement')),
+                ('tournoi', models.ForeignKey(db_column='tournoi_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.tournoi')),
+            ],
+            options={
+                'db_table': 'inscription',
+                'indexes': [models.Index(fields=['tournoi', 'statut', 'date_inscription'], name='inscription_tournoi_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tournoi', 'equipe'), name='unique_inscription_equipe')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0008_inscriptions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rencontre',
+            name='date_maj',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='rencontre',
+            index=models.Index(fields=['date_heure'], name='rencontre_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rencontre',
+            index=models.Index(fields=['date_maj'], name='rencontre_maj_idx'),
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('rappel_24h', 'Rappel 24 heures avant'), ('rappel_1h', 'Rappel 1 heure avant'), ('modification', "Changement de terrain ou d'horaire")], max_length=20)),
+                ('cle', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('lue', models.BooleanField(default=False)),
+                ('rencontre', models.ForeignKey(db_column='rencontre_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.rencontre')),
+                ('utilisateur', models.ForeignKey(db_column='utilisateur_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.utilisateur')),
+            ],
+            options={
+                'db_table': 'notification',
+                'indexes': [models.Index(fields=['utilisateur', 'lue', 'date_creation'], name='notification_utilisateur_idx')],
+                'constraints': [models.UniqueConstraint(fields=('utilisateur', 'cle'), name='unique_notification_cle')],
+            },
+        ),
+    ]
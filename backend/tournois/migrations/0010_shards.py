@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0009_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organisateur',
+            name='shard',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='equipe',
+            name='organisateur',
+            field=models.ForeignKey(db_column='organisateur_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='tournois.organisateur'),
+        ),
+        migrations.AlterField(
+            model_name='joueurequipe',
+            name='joueur',
+            field=models.ForeignKey(db_column='joueur_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='tournois.joueur'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='utilisateur',
+            field=models.ForeignKey(db_column='utilisateur_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='tournois.utilisateur'),
+        ),
+        migrations.AlterField(
+            model_name='rencontre',
+            name='arbitre',
+            field=models.ForeignKey(blank=True, db_column='arbitre_id', db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tournois.arbitre'),
+        ),
+        migrations.AlterField(
+            model_name='statistiquejoueurjour',
+            name='joueur',
+            field=models.ForeignKey(db_column='joueur_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='tournois.joueur'),
+        ),
+        migrations.AlterField(
+            model_name='tournoi',
+            name='organisateur',
+            field=models.ForeignKey(db_column='organisateur_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='tournois.organisateur'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.1
+
+from django.db import migrations, models
+
+
+def recopier_inscriptions(apps, schema_editor):
+    """Renseigne tournoi_id / organisateur_id des paiements existants
+    depuis les inscriptions de la même base."""
+    Inscription = apps.get_model('tournois', 'Inscription')
+    Paiement = apps.get_model('tournois', 'Paiement')
+    alias = schema_editor.connection.alias
+    lignes = Inscription.objects.using(alias).filter(
+        paiement_id__isnull=False).values_list(
+        'paiement_id', 'tournoi_id', 'tournoi__organisateur_id')
+    for paiement_id, tournoi_id, organisateur_id in lignes.iterator():
+        Paiement.objects.using(alias).filter(pk=paiement_id).update(
+            tournoi_id=tournoi_id, organisateur_id=organisateur_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0010_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paiement',
+            name='tournoi_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='paiement',
+            name='organisateur_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='paiementarchive',
+            name='tournoi_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='paiementarchive',
+            name='organisateur_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='RecettesJour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organisateur_id', models.BigIntegerField(default=0)),
+                ('tournoi_id', models.BigIntegerField(default=0)),
+                ('jour', models.DateField()),
+                ('methode', models.CharField(choices=[('carte', 'Carte bancaire'), ('virement', 'Virement bancaire'), ('especes', 'Espèces'), ('autre', 'Autre')], max_length=20)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('paye', 'Payé'), ('refuse', 'Refusé'), ('rembourse', 'Remboursé')], max_length=20)),
+                ('nombre', models.IntegerField(default=0)),
+                ('montant', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'recettes_jour',
+                'indexes': [models.Index(fields=['jour'], name='recettes_jour_idx'), models.Index(fields=['tournoi_id', 'jour'], name='recettes_tournoi_idx')],
+                'constraints': [models.UniqueConstraint(fields=('organisateur_id', 'tournoi_id', 'jour', 'methode', 'statut'), name='unique_recettes_jour')],
+            },
+        ),
+        migrations.RunPython(recopier_inscriptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0011_recettes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Changement',
+            fields=[
+                ('sequence', models.BigAutoField(primary_key=True, serialize=False)),
+                ('modele', models.CharField(max_length=30)),
+                ('objet_id', models.BigIntegerField()),
+                ('operation', models.CharField(choices=[('creation', 'Création'), ('modification', 'Modification'), ('suppression', 'Suppression')], max_length=20)),
+                ('donnees', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('date', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'changements',
+                'indexes': [models.Index(fields=['modele', 'objet_id'], name='changements_objet_idx'), models.Index(fields=['date'], name='changements_date_idx')],
+            },
+        ),
+    ]
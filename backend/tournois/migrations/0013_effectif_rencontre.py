@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1
+
+from django.db import migrations, models
+
+
+def photographier_effectifs(apps, schema_editor):
+    """Fige l'effectif actuel des équipes pour les rencontres terminées
+    existantes : l'effectif de leur fin n'est plus connu."""
+    EffectifRencontre = apps.get_model('tournois', 'EffectifRencontre')
+    JoueurEquipe = apps.get_model('tournois', 'JoueurEquipe')
+    alias = schema_editor.connection.alias
+    membres = {}
+    for equipe_id, joueur_id in JoueurEquipe.objects.using(alias).values_list(
+            'equipe_id', 'joueur_id').iterator():
+        membres.setdefault(equipe_id, []).append(joueur_id)
+    lignes = []
+    for nom in ('Rencontre', 'RencontreArchive'):
+        rencontres = apps.get_model('tournois', nom).objects.using(alias).filter(
+            statut='termine').values_list('id', 'equipe1_id', 'equipe2_id')
+        for rencontre_id, *equipe_ids in rencontres.iterator():
+            for equipe_id in equipe_ids:
+                lignes.extend(
+                    EffectifRencontre(rencontre_id=rencontre_id,
+                                      equipe_id=equipe_id, joueur_id=joueur_id)
+                    for joueur_id in membres.get(equipe_id) or [None])
+    EffectifRencontre.objects.using(alias).bulk_create(
+        lignes, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0012_changements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectifRencontre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rencontre_id', models.BigIntegerField()),
+                ('equipe_id', models.BigIntegerField()),
+                ('joueur_id', models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'effectif_rencontre',
+                'constraints': [models.UniqueConstraint(fields=('rencontre_id', 'equipe_id', 'joueur_id'), name='unique_effectif_rencontre')],
+            },
+        ),
+        migrations.RunPython(photographier_effectifs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.1
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0013_effectif_rencontre'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExemptionArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tournoi_id', models.BigIntegerField(db_index=True)),
+                ('equipe_id', models.BigIntegerField()),
+                ('ronde', models.PositiveSmallIntegerField()),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'exemption_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='FormatMixteArchive',
+            fields=[
+                ('tournoi_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('nb_rondes', models.PositiveSmallIntegerField()),
+                ('nb_qualifies', models.PositiveSmallIntegerField()),
+                ('intervalle_rondes', models.DurationField()),
+                ('phase', models.CharField(choices=[('suisse', 'Phase suisse'), ('elimination', 'Élimination'), ('termine', 'Terminé')], max_length=20)),
+                ('ronde_courante', models.PositiveSmallIntegerField()),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'format_mixte_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='InscriptionArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tournoi_id', models.BigIntegerField(db_index=True)),
+                ('equipe_id', models.BigIntegerField(db_index=True)),
+                ('paiement_id', models.BigIntegerField(blank=True, null=True)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente de paiement'), ('confirmee', 'Confirmée'), ('annulee', 'Annulée')], max_length=20)),
+                ('date_inscription', models.DateTimeField()),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'inscription_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('utilisateur_id', models.BigIntegerField(db_index=True)),
+                ('rencontre_id', models.BigIntegerField()),
+                ('type', models.CharField(choices=[('rappel_24h', 'Rappel 24 heures avant'), ('rappel_1h', 'Rappel 1 heure avant'), ('modification', "Changement de terrain ou d'horaire")], max_length=20)),
+                ('cle', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('date_creation', models.DateTimeField()),
+                ('lue', models.BooleanField(default=False)),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'notification_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='PlacesTournoiArchive',
+            fields=[
+                ('tournoi_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('capacite', models.PositiveIntegerField()),
+                ('occupees', models.PositiveIntegerField()),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'places_tournoi_archive',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1
+
+from django.db import migrations, models
+
+
+def creer_compteurs(apps, schema_editor):
+    """Compteur sans limite pour les tournois qui n'en ont pas, à partir
+    de leurs inscriptions."""
+    Inscription = apps.get_model('tournois', 'Inscription')
+    PlacesTournoi = apps.get_model('tournois', 'PlacesTournoi')
+    Tournoi = apps.get_model('tournois', 'Tournoi')
+    alias = schema_editor.connection.alias
+    occupees = dict(Inscription.objects.using(alias).exclude(
+        statut='annulee').values('tournoi_id').annotate(
+        nombre=models.Count('pk')).values_list('tournoi_id', 'nombre'))
+    tournoi_ids = Tournoi.objects.using(alias).exclude(
+        pk__in=PlacesTournoi.objects.using(alias).values('tournoi_id')
+    ).values_list('pk', flat=True)
+    PlacesTournoi.objects.using(alias).bulk_create([
+        PlacesTournoi(tournoi_id=tournoi_id, capacite=None,
+                      occupees=occupees.get(tournoi_id, 0))
+        for tournoi_id in tournoi_ids.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0014_archives_dependances'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='placestournoi',
+            name='capacite',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='placestournoiarchive',
+            name='capacite',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(creer_compteurs, migrations.RunPython.noop),
+    ]
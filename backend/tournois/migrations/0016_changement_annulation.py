@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0015_places_sans_limite'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changement',
+            name='operation',
+            field=models.CharField(choices=[('creation', 'Création'), ('modification', 'Modification'), ('suppression', 'Suppression'), ('annulation', 'Transaction annulée')], max_length=20),
+        ),
+    ]
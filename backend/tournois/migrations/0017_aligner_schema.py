@@ -0,0 +1,331 @@
+# Generated by Django 5.2.1
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remplir_noms(apps, schema_editor):
+    """Reprend le prénom et le nom de l'ancien schéma dans Utilisateur.nom."""
+    Utilisateur = apps.get_model('tournois', 'Utilisateur')
+    alias = schema_editor.connection.alias
+    for utilisateur in Utilisateur.objects.using(alias).only(
+            'first_name', 'last_name', 'email'):
+        nom = f"{utilisateur.first_name} {utilisateur.last_name}".strip()
+        utilisateur.nom = nom or utilisateur.email
+        utilisateur.save(update_fields=['nom'])
+
+
+class Migration(migrations.Migration):
+    """Aligne l'état des migrations sur les modèles (tables sans préfixe,
+    colonnes de l'application) : 0001 décrivait encore l'ancien schéma
+    dérivé d'AbstractUser, si bien qu'une base créée par migrate n'avait
+    pas les tables que lisent les modèles.
+
+    Les bases créées directement avec le schéma des modèles l'appliquent
+    avec « migrate tournois 0017 --fake ».
+    """
+
+    dependencies = [
+        ('tournois', '0016_changement_annulation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='utilisateur',
+            name='nom',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.RunPython(remplir_noms, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='equipe',
+            options={'ordering': ['nom']},
+        ),
+        migrations.AlterModelOptions(
+            name='joueurequipe',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='paiement',
+            options={'ordering': ['-date_paiement']},
+        ),
+        migrations.AlterModelOptions(
+            name='rencontre',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='tournoi',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='utilisateur',
+            options={'ordering': ['-date_inscription'], 'verbose_name': 'Utilisateur', 'verbose_name_plural': 'Utilisateurs'},
+        ),
+        migrations.AlterModelManagers(
+            name='utilisateur',
+            managers=[
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='administrateur',
+            name='niveau_acces',
+        ),
+        migrations.RemoveField(
+            model_name='arbitre',
+            name='certification',
+        ),
+        migrations.RemoveField(
+            model_name='arbitre',
+            name='est_certifie',
+        ),
+        migrations.RemoveField(
+            model_name='arbitre',
+            name='experience',
+        ),
+        migrations.RemoveField(
+            model_name='arbitre',
+            name='specialite',
+        ),
+        migrations.RemoveField(
+            model_name='equipe',
+            name='jeu',
+        ),
+        migrations.RemoveField(
+            model_name='equipe',
+            name='logo',
+        ),
+        migrations.RemoveField(
+            model_name='equipe',
+            name='tag',
+        ),
+        migrations.RemoveField(
+            model_name='joueur',
+            name='bio',
+        ),
+        migrations.RemoveField(
+            model_name='joueur',
+            name='date_naissance',
+        ),
+        migrations.RemoveField(
+            model_name='joueurequipe',
+            name='est_actif',
+        ),
+        migrations.RemoveField(
+            model_name='organisateur',
+            name='est_verifie',
+        ),
+        migrations.RemoveField(
+            model_name='organisateur',
+            name='logo',
+        ),
+        migrations.RemoveField(
+            model_name='organisateur',
+            name='site_web',
+        ),
+        migrations.RemoveField(
+            model_name='paiement',
+            name='details',
+        ),
+        migrations.RemoveField(
+            model_name='paiement',
+            name='reference',
+        ),
+        migrations.RenameField(
+            model_name='rencontre',
+            old_name='score_equipe1',
+            new_name='score1',
+        ),
+        migrations.RenameField(
+            model_name='rencontre',
+            old_name='score_equipe2',
+            new_name='score2',
+        ),
+        migrations.RemoveField(
+            model_name='rencontre',
+            name='stream_url',
+        ),
+        migrations.RemoveField(
+            model_name='rencontre',
+            name='vod_url',
+        ),
+        migrations.RemoveField(
+            model_name='tournoi',
+            name='jeu',
+        ),
+        migrations.RemoveField(
+            model_name='tournoi',
+            name='logo',
+        ),
+        migrations.RemoveField(
+            model_name='tournoi',
+            name='nombre_equipes_max',
+        ),
+        migrations.RemoveField(
+            model_name='tournoi',
+            name='recompense',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='avatar',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='date_joined',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='first_name',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='groups',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='is_active',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='is_staff',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='is_superuser',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='last_login',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='last_name',
+        ),
+        migrations.RenameField(
+            model_name='utilisateur',
+            old_name='password',
+            new_name='motDePasse',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='supabase_uid',
+        ),
+        migrations.RemoveField(
+            model_name='utilisateur',
+            name='user_permissions',
+        ),
+        migrations.AlterField(
+            model_name='rencontre',
+            name='score1',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='rencontre',
+            name='score2',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='utilisateur',
+            name='motDePasse',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='administrateur',
+            name='utilisateur',
+            field=models.OneToOneField(db_column='id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='tournois.utilisateur'),
+        ),
+        migrations.AlterField(
+            model_name='arbitre',
+            name='utilisateur',
+            field=models.OneToOneField(db_column='id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='tournois.utilisateur'),
+        ),
+        migrations.AlterField(
+            model_name='joueur',
+            name='utilisateur',
+            field=models.OneToOneField(db_column='id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='tournois.utilisateur'),
+        ),
+        migrations.AlterField(
+            model_name='joueurequipe',
+            name='equipe',
+            field=models.ForeignKey(db_column='equipe_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.equipe'),
+        ),
+        migrations.AlterField(
+            model_name='organisateur',
+            name='utilisateur',
+            field=models.OneToOneField(db_column='id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='tournois.utilisateur'),
+        ),
+        migrations.AlterField(
+            model_name='paiement',
+            name='joueur',
+            field=models.ForeignKey(db_column='joueur_id', on_delete=django.db.models.deletion.PROTECT, to='tournois.joueur'),
+        ),
+        migrations.AlterField(
+            model_name='rencontre',
+            name='duree',
+            field=models.PositiveIntegerField(blank=True, help_text='Durée en minutes', null=True),
+        ),
+        migrations.AlterField(
+            model_name='rencontre',
+            name='equipe1',
+            field=models.ForeignKey(db_column='equipe1_id', on_delete=django.db.models.deletion.CASCADE, related_name='rencontres_equipe1', to='tournois.equipe'),
+        ),
+        migrations.AlterField(
+            model_name='rencontre',
+            name='equipe2',
+            field=models.ForeignKey(db_column='equipe2_id', on_delete=django.db.models.deletion.CASCADE, related_name='rencontres_equipe2', to='tournois.equipe'),
+        ),
+        migrations.AlterField(
+            model_name='rencontre',
+            name='tournoi',
+            field=models.ForeignKey(db_column='tournoi_id', on_delete=django.db.models.deletion.CASCADE, to='tournois.tournoi'),
+        ),
+        migrations.AlterField(
+            model_name='utilisateur',
+            name='email',
+            field=models.EmailField(max_length=254, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='utilisateur',
+            name='telephone',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AlterModelTable(
+            name='administrateur',
+            table='administrateur',
+        ),
+        migrations.AlterModelTable(
+            name='arbitre',
+            table='arbitre',
+        ),
+        migrations.AlterModelTable(
+            name='equipe',
+            table='equipe',
+        ),
+        migrations.AlterModelTable(
+            name='joueur',
+            table='joueur',
+        ),
+        migrations.AlterModelTable(
+            name='joueurequipe',
+            table='joueurequipe',
+        ),
+        migrations.AlterModelTable(
+            name='organisateur',
+            table='organisateur',
+        ),
+        migrations.AlterModelTable(
+            name='paiement',
+            table='paiement',
+        ),
+        migrations.AlterModelTable(
+            name='rencontre',
+            table='rencontre',
+        ),
+        migrations.AlterModelTable(
+            name='tournoi',
+            table='tournoi',
+        ),
+        migrations.AlterModelTable(
+            name='utilisateur',
+            table='utilisateur',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournois', '0017_aligner_schema'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rencontrearchive',
+            name='phase',
+            field=models.CharField(blank=True, choices=[('suisse', 'Phase suisse'), ('elimination', 'Élimination')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='rencontrearchive',
+            name='ronde',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='rencontrearchive',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='changement',
+            name='operation',
+            field=models.CharField(choices=[('creation', 'Création'), ('modification', 'Modification'), ('suppression', 'Suppression'), ('archivage', 'Archivage'), ('annulation', 'Transaction annulée')], max_length=20),
+        ),
+    ]
@@ -1,8 +1,30 @@
-from django.contrib.auth.hashers import make_password
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, router, transaction
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from django.db.models import CheckConstraint, Q, UniqueConstraint
 
+from . import mots_de_passe
+
+
+class Journalise(models.Model):
+    """Modèle dont les écritures sont consignées dans le journal des
+    changements (voir changements.py et signals.py).
+
+    save() ouvre une transaction : sans elle, en autocommit, la ligne
+    serait validée avant que post_save écrive le changement.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
 
 class Utilisateur(models.Model):
     ROLE_CHOICES = [
@@ -14,16 +36,34 @@ class Utilisateur(models.Model):
 
     nom = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
-    motDePasse = models.CharField(max_length=255)  # À hasher via make_password
+    # Haché par save() (voir mots_de_passe.py) ; bulk_create() attend des
+    # mots de passe déjà hachés (mots_de_passe.hacher)
+    motDePasse = models.CharField(max_length=255)
     telephone = models.CharField(max_length=20, blank=True, null=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     date_inscription = models.DateTimeField(auto_now_add=True)
 
+    # Hachage lu en base, pour savoir si motDePasse a été remplacé
+    _mot_de_passe_en_base = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        utilisateur = super().from_db(db, field_names, values)
+        utilisateur._mot_de_passe_en_base = utilisateur.__dict__.get('motDePasse')
+        return utilisateur
+
     def save(self, *args, **kwargs):
         # Hache le mot de passe seulement s'il est modifié ou nouveau
-        if not self.pk or 'motDePasse' in [field.name for field in self._meta.fields if field.value_from_object(self) != getattr(self, field.name)]:
-            self.motDePasse = make_password(self.motDePasse)
+        if ('motDePasse' not in self.get_deferred_fields()
+                and self.motDePasse != self._mot_de_passe_en_base):
+            self.motDePasse = mots_de_passe.hacher(self.motDePasse)
         super().save(*args, **kwargs)
+        self._mot_de_passe_en_base = self.__dict__.get('motDePasse')
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        if fields is None or 'motDePasse' in fields:
+            self._mot_de_passe_en_base = self.__dict__.get('motDePasse')
 
     class Meta:
         db_table = 'utilisateur'
@@ -71,6 +111,9 @@ class Organisateur(models.Model):
     )
     nom_organisation = models.CharField(max_length=100)
     description = models.TextField(blank=True)
+    # Base de ses tournois quand les données sont partitionnées
+    # (voir shards.py), attribuée à la première écriture
+    shard = models.CharField(max_length=50, blank=True, default='')
 
     class Meta:
         db_table = 'organisateur'
@@ -115,7 +158,7 @@ class Arbitre(models.Model):
         return f"Arbitre: {self.utilisateur.nom}"
 
 
-class Paiement(models.Model):
+class Paiement(Journalise):
     METHODE_CHOICES = [
         ('carte', 'Carte bancaire'),
         ('virement', 'Virement bancaire'),
@@ -143,6 +186,10 @@ class Paiement(models.Model):
     methode = models.CharField(max_length=20, choices=METHODE_CHOICES)
     statut = models.CharField(
         max_length=20, choices=STATUT_CHOICES, default='en_attente')
+    # Recopiés de l'inscription réglée, pour les recettes (voir
+    # recettes.py) : le tournoi peut être dans un shard ou archivé
+    tournoi_id = models.BigIntegerField(null=True, blank=True)
+    organisateur_id = models.BigIntegerField(null=True, blank=True)
 
     class Meta:
         db_table = 'paiement'
@@ -152,12 +199,14 @@ class Paiement(models.Model):
         return f"Paiement #{self.id} - {self.montant}€"
 
 
-class Equipe(models.Model):
+class Equipe(Journalise):
     nom = models.CharField(max_length=100, unique=True)
     date_creation = models.DateTimeField(auto_now_add=True)
+    # Sans contrainte : les équipes peuvent être dans un shard (voir shards.py)
     organisateur = models.ForeignKey(
         Organisateur,
         on_delete=models.CASCADE,
+        db_constraint=False,
         db_column='organisateur_id'
     )
 
@@ -169,16 +218,18 @@ class Equipe(models.Model):
         return self.nom
 
 
-class JoueurEquipe(models.Model):
+class JoueurEquipe(Journalise):
     ROLE_CHOICES = [
         ('capitaine', 'Capitaine'),
         ('membre', 'Membre'),
         ('remplacant', 'Remplaçant'),
     ]
 
+    # Sans contrainte : les effectifs peuvent être dans un shard
     joueur = models.ForeignKey(
         Joueur,
         on_delete=models.CASCADE,
+        db_constraint=False,
         db_column='joueur_id'
     )
     equipe = models.ForeignKey(
@@ -203,7 +254,7 @@ class JoueurEquipe(models.Model):
         return f"{self.joueur} dans {self.equipe}"
 
 
-class Tournoi(models.Model):
+class Tournoi(Journalise):
     TYPE_CHOICES = [
         ('elimination', 'Élimination simple'),
         ('round-robin', 'Round Robin'),
@@ -230,9 +281,11 @@ class Tournoi(models.Model):
     )
     statut = models.CharField(
         max_length=20, choices=STATUT_CHOICES, default='planifie')
+    # Sans contrainte : les tournois peuvent être dans un shard
     organisateur = models.ForeignKey(
         Organisateur,
         on_delete=models.CASCADE,
+        db_constraint=False,
         db_column='organisateur_id'
     )
 
@@ -249,7 +302,88 @@ class Tournoi(models.Model):
         return self.nom
 
 
-class Rencontre(models.Model):
+class PlacesTournoi(models.Model):
+    """Capacité d'un tournoi et compteur des places prises.
+
+    La ligne est créée avec le tournoi (voir signals.py) et le compteur
+    tenu même sans limite (capacite NULL) : fixer une capacité ne
+    demande pas de recompter les inscriptions. Le compteur n'est modifié
+    que par des UPDATE conditionnels (voir inscriptions.py) ; la
+    contrainte garantit en base qu'il ne dépasse jamais la capacité.
+    """
+    tournoi = models.OneToOneField(
+        Tournoi,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='tournoi_id'
+    )
+    # NULL : pas de limite
+    capacite = models.PositiveIntegerField(null=True, blank=True)
+    occupees = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'places_tournoi'
+        verbose_name = "Places de tournoi"
+        verbose_name_plural = "Places de tournoi"
+        constraints = [
+            CheckConstraint(
+                check=Q(occupees__lte=models.F('capacite')),
+                name='check_places_capacite'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.tournoi} - {self.occupees}/{self.capacite}"
+
+
+class Inscription(models.Model):
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente de paiement'),
+        ('confirmee', 'Confirmée'),
+        ('annulee', 'Annulée'),
+    ]
+
+    tournoi = models.ForeignKey(
+        Tournoi,
+        on_delete=models.CASCADE,
+        db_column='tournoi_id'
+    )
+    equipe = models.ForeignKey(
+        Equipe,
+        on_delete=models.CASCADE,
+        db_column='equipe_id'
+    )
+    # Sans contrainte : le paiement peut être archivé (même identifiant)
+    paiement = models.OneToOneField(
+        Paiement,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        db_column='paiement_id'
+    )
+    statut = models.CharField(
+        max_length=20, choices=STATUT_CHOICES, default='en_attente')
+    date_inscription = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'inscription'
+        constraints = [
+            UniqueConstraint(
+                fields=['tournoi', 'equipe'],
+                name='unique_inscription_equipe'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['tournoi', 'statut', 'date_inscription'],
+                         name='inscription_tournoi_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.equipe} inscrite à {self.tournoi}"
+
+
+class Rencontre(Journalise):
     STATUT_CHOICES = [
         ('planifie', 'Planifié'),
         ('en_cours', 'En cours'),
@@ -257,6 +391,10 @@ class Rencontre(models.Model):
         ('annule', 'Annulé'),
         ('reporte', 'Reporté'),
     ]
+    PHASE_CHOICES = [
+        ('suisse', 'Phase suisse'),
+        ('elimination', 'Élimination'),
+    ]
 
     tournoi = models.ForeignKey(
         Tournoi,
@@ -283,14 +421,23 @@ class Rencontre(models.Model):
         related_name='rencontres_equipe2',
         db_column='equipe2_id'
     )
+    # Sans contrainte : les rencontres peuvent être dans un shard
     arbitre = models.ForeignKey(
         Arbitre,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
+        db_constraint=False,
         db_column='arbitre_id'
     )
     terrain = models.CharField(max_length=100, blank=True)
+    # Concurrence optimiste : incrémenté à chaque modification
+    version = models.PositiveIntegerField(default=0)
+    # Rencontres générées par le format mixte (voir suisse.py)
+    phase = models.CharField(max_length=20, choices=PHASE_CHOICES, blank=True)
+    ronde = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Lu par le planificateur de notifications pour suivre les changements
+    date_maj = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'rencontre'
@@ -300,11 +447,497 @@ class Rencontre(models.Model):
                 name='check_equipes_differentes'
             )
         ]
+        indexes = [
+            # Forme récente d'une équipe (derniers matchs terminés)
+            models.Index(fields=['equipe1', 'statut', 'date_heure'],
+                         name='rencontre_equipe1_idx'),
+            models.Index(fields=['equipe2', 'statut', 'date_heure'],
+                         name='rencontre_equipe2_idx'),
+            models.Index(fields=['tournoi', 'phase', 'ronde'],
+                         name='rencontre_ronde_idx'),
+            # Fenêtre des rencontres à venir et changements récents
+            # (voir notifications.py)
+            models.Index(fields=['date_heure'], name='rencontre_date_idx'),
+            models.Index(fields=['date_maj'], name='rencontre_maj_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.nom:
             self.nom = f"{self.equipe1} vs {self.equipe2}"
+        if self.pk:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'version', 'date_maj'}
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.equipe1} vs {self.equipe2}"
+
+
+class StatistiqueEquipeJour(models.Model):
+    """Agrégat journalier des résultats d'une équipe dans un tournoi.
+
+    Maintenu de façon incrémentale à chaque fin de rencontre
+    (voir tournois/statistiques.py).
+    """
+    equipe = models.ForeignKey(
+        Equipe,
+        on_delete=models.CASCADE,
+        db_column='equipe_id'
+    )
+    # Sans contrainte : les agrégats survivent à l'archivage du tournoi
+    tournoi = models.ForeignKey(
+        Tournoi,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_column='tournoi_id'
+    )
+    jour = models.DateField()
+    matchs_joues = models.IntegerField(default=0)
+    victoires = models.IntegerField(default=0)
+    nuls = models.IntegerField(default=0)
+    defaites = models.IntegerField(default=0)
+    buts_pour = models.IntegerField(default=0)
+    buts_contre = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'statistique_equipe_jour'
+        constraints = [
+            UniqueConstraint(
+                fields=['equipe', 'tournoi', 'jour'],
+                name='unique_statistique_equipe_jour'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['equipe', 'jour'],
+                         name='stat_equipe_jour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.equipe} - {self.jour}"
+
+
+class StatistiqueJoueurJour(models.Model):
+    """Agrégat journalier des résultats d'un joueur (via ses équipes)."""
+    # Sans contrainte : les agrégats peuvent être dans un shard
+    joueur = models.ForeignKey(
+        Joueur,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        db_column='joueur_id'
+    )
+    # Sans contrainte : les agrégats survivent à l'archivage du tournoi
+    tournoi = models.ForeignKey(
+        Tournoi,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_column='tournoi_id'
+    )
+    jour = models.DateField()
+    matchs_joues = models.IntegerField(default=0)
+    victoires = models.IntegerField(default=0)
+    nuls = models.IntegerField(default=0)
+    defaites = models.IntegerField(default=0)
+    buts_pour = models.IntegerField(default=0)
+    buts_contre = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'statistique_joueur_jour'
+        constraints = [
+            UniqueConstraint(
+                fields=['joueur', 'tournoi', 'jour'],
+                name='unique_statistique_joueur_jour'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['joueur', 'jour'],
+                         name='stat_joueur_jour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.joueur} - {self.jour}"
+
+
+class EffectifRencontre(models.Model):
+    """Effectif d'une équipe au moment où une rencontre a compté dans
+    les statistiques (voir tournois/statistiques.py).
+
+    Les joueurs crédités d'un résultat restent ainsi les mêmes après un
+    changement d'effectif, pour une correction de score comme pour un
+    recalcul. Une ligne sans joueur note un effectif vide.
+    """
+    # Identifiants sans contrainte : l'effectif survit à l'archivage
+    rencontre_id = models.BigIntegerField()
+    equipe_id = models.BigIntegerField()
+    joueur_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'effectif_rencontre'
+        constraints = [
+            UniqueConstraint(
+                fields=['rencontre_id', 'equipe_id', 'joueur_id'],
+                name='unique_effectif_rencontre'
+            )
+        ]
+
+    def __str__(self):
+        return f"Rencontre {self.rencontre_id} - équipe {self.equipe_id}"
+
+
+class RecettesJour(models.Model):
+    """Agrégat journalier des paiements par organisateur, tournoi,
+    méthode et statut.
+
+    Maintenu de façon incrémentale à chaque changement d'un paiement
+    (voir tournois/recettes.py) ; le jour est celui du paiement.
+    """
+    # 0 : paiement sans inscription (la contrainte d'unicité ne
+    # s'appliquerait pas à NULL)
+    organisateur_id = models.BigIntegerField(default=0)
+    tournoi_id = models.BigIntegerField(default=0)
+    jour = models.DateField()
+    methode = models.CharField(max_length=20, choices=Paiement.METHODE_CHOICES)
+    statut = models.CharField(max_length=20, choices=Paiement.STATUT_CHOICES)
+    nombre = models.IntegerField(default=0)
+    montant = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'recettes_jour'
+        constraints = [
+            UniqueConstraint(
+                fields=['organisateur_id', 'tournoi_id', 'jour', 'methode',
+                        'statut'],
+                name='unique_recettes_jour'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['jour'], name='recettes_jour_idx'),
+            models.Index(fields=['tournoi_id', 'jour'],
+                         name='recettes_tournoi_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} - {self.methode} {self.statut}: {self.montant}€"
+
+
+class TournoiArchive(models.Model):
+    """Tournoi terminé déplacé hors des tables chaudes (voir archivage.py).
+
+    Les colonnes reprennent celles de Tournoi, identifiants compris ;
+    les clés étrangères sont de simples entiers.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    nom = models.CharField(max_length=100)
+    description = models.TextField()
+    type = models.CharField(max_length=20, choices=Tournoi.TYPE_CHOICES)
+    regles = models.TextField(blank=True)
+    date_debut = models.DateTimeField()
+    date_fin = models.DateTimeField()
+    prix_inscription = models.DecimalField(max_digits=10, decimal_places=2)
+    statut = models.CharField(max_length=20, choices=Tournoi.STATUT_CHOICES)
+    organisateur_id = models.BigIntegerField(db_index=True)
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tournoi_archive'
+        verbose_name = "Tournoi archivé"
+        verbose_name_plural = "Tournois archivés"
+
+    def __str__(self):
+        return self.nom
+
+
+class RencontreArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    tournoi_id = models.BigIntegerField(db_index=True)
+    nom = models.CharField(max_length=100, blank=True)
+    date_heure = models.DateTimeField()
+    duree = models.PositiveIntegerField(null=True, blank=True)
+    score1 = models.IntegerField(null=True, blank=True)
+    score2 = models.IntegerField(null=True, blank=True)
+    statut = models.CharField(max_length=20, choices=Rencontre.STATUT_CHOICES)
+    equipe1_id = models.BigIntegerField()
+    equipe2_id = models.BigIntegerField()
+    arbitre_id = models.BigIntegerField(null=True, blank=True)
+    terrain = models.CharField(max_length=100, blank=True)
+    version = models.PositiveIntegerField(default=0)
+    phase = models.CharField(max_length=20, choices=Rencontre.PHASE_CHOICES,
+                             blank=True)
+    ronde = models.PositiveSmallIntegerField(null=True, blank=True)
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'rencontre_archive'
+        indexes = [
+            models.Index(fields=['equipe1_id', 'date_heure'],
+                         name='rencontre_arch_equipe1_idx'),
+            models.Index(fields=['equipe2_id', 'date_heure'],
+                         name='rencontre_arch_equipe2_idx'),
+        ]
+
+    def __str__(self):
+        return self.nom
+
+
+class PaiementArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    joueur_id = models.BigIntegerField(db_index=True)
+    montant = models.DecimalField(max_digits=10, decimal_places=2)
+    date_paiement = models.DateTimeField()
+    methode = models.CharField(max_length=20, choices=Paiement.METHODE_CHOICES)
+    statut = models.CharField(max_length=20, choices=Paiement.STATUT_CHOICES)
+    tournoi_id = models.BigIntegerField(null=True, blank=True)
+    organisateur_id = models.BigIntegerField(null=True, blank=True)
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'paiement_archive'
+        ordering = ['-date_paiement']
+
+    def __str__(self):
+        return f"Paiement archivé #{self.id} - {self.montant}€"
+
+
+class InstantaneTournoi(models.Model):
+    """Document dénormalisé servant la page d'un tournoi en une lecture.
+
+    Sections du document : 'tournoi' (avec l'organisateur), 'rencontres'
+    (avec l'arbitre) et 'equipes' (avec les effectifs). Chaque section
+    est reconstruite séparément quand une ligne liée change
+    (voir instantanes.py).
+    """
+    tournoi = models.OneToOneField(
+        Tournoi,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='tournoi_id'
+    )
+    document = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    version = models.PositiveIntegerField(default=0)
+    date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'instantane_tournoi'
+        verbose_name = "Instantané de tournoi"
+        verbose_name_plural = "Instantanés de tournoi"
+
+    def __str__(self):
+        return f"Instantané {self.tournoi_id} v{self.version}"
+
+
+class FormatMixte(models.Model):
+    """Déroulement d'un tournoi 'mixte' : rondes suisses, puis tableau à
+    élimination directe des nb_qualifies premiers (voir suisse.py)."""
+    PHASE_CHOICES = Rencontre.PHASE_CHOICES + [('termine', 'Terminé')]
+
+    tournoi = models.OneToOneField(
+        Tournoi,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='tournoi_id'
+    )
+    nb_rondes = models.PositiveSmallIntegerField()
+    nb_qualifies = models.PositiveSmallIntegerField(default=8)
+    intervalle_rondes = models.DurationField(default=timedelta(days=1))
+    phase = models.CharField(
+        max_length=20, choices=PHASE_CHOICES, default='suisse')
+    ronde_courante = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        db_table = 'format_mixte'
+        verbose_name = "Format mixte"
+        verbose_name_plural = "Formats mixtes"
+
+    def __str__(self):
+        return f"{self.tournoi} - {self.phase} ronde {self.ronde_courante}"
+
+
+class Exemption(models.Model):
+    """Équipe exemptée (bye) d'une ronde suisse : compte comme une victoire."""
+    tournoi = models.ForeignKey(
+        Tournoi,
+        on_delete=models.CASCADE,
+        db_column='tournoi_id'
+    )
+    equipe = models.ForeignKey(
+        Equipe,
+        on_delete=models.CASCADE,
+        db_column='equipe_id'
+    )
+    ronde = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = 'exemption'
+        constraints = [
+            UniqueConstraint(
+                fields=['tournoi', 'ronde'],
+                name='unique_exemption_ronde'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.equipe} exemptée - ronde {self.ronde}"
+
+
+class Notification(models.Model):
+    """Notification envoyée à un utilisateur au sujet d'une rencontre.
+
+    `cle` identifie l'événement (rappel pour une date donnée, version
+    modifiée) : la contrainte d'unicité empêche tout doublon, même après
+    un redémarrage du planificateur (voir notifications.py).
+    """
+    TYPE_CHOICES = [
+        ('rappel_24h', 'Rappel 24 heures avant'),
+        ('rappel_1h', 'Rappel 1 heure avant'),
+        ('modification', 'Changement de terrain ou d\'horaire'),
+    ]
+
+    # Sans contrainte : les notifications peuvent être dans un shard
+    utilisateur = models.ForeignKey(
+        Utilisateur,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        db_column='utilisateur_id'
+    )
+    rencontre = models.ForeignKey(
+        Rencontre,
+        on_delete=models.CASCADE,
+        db_column='rencontre_id'
+    )
+    type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    cle = models.CharField(max_length=100)
+    message = models.TextField()
+    date_creation = models.DateTimeField(auto_now_add=True)
+    lue = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = 'notification'
+        constraints = [
+            UniqueConstraint(
+                fields=['utilisateur', 'cle'],
+                name='unique_notification_cle'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['utilisateur', 'lue', 'date_creation'],
+                         name='notification_utilisateur_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.type} - {self.rencontre} pour {self.utilisateur}"
+
+
+# Lignes dépendantes d'un tournoi archivé (voir archivage.py)
+
+class InscriptionArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    tournoi_id = models.BigIntegerField(db_index=True)
+    equipe_id = models.BigIntegerField(db_index=True)
+    paiement_id = models.BigIntegerField(null=True, blank=True)
+    statut = models.CharField(max_length=20, choices=Inscription.STATUT_CHOICES)
+    date_inscription = models.DateTimeField()
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'inscription_archive'
+
+    def __str__(self):
+        return f"Inscription archivée #{self.id}"
+
+
+class PlacesTournoiArchive(models.Model):
+    tournoi_id = models.BigIntegerField(primary_key=True)
+    capacite = models.PositiveIntegerField(null=True, blank=True)
+    occupees = models.PositiveIntegerField()
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'places_tournoi_archive'
+
+    def __str__(self):
+        return f"Tournoi archivé #{self.tournoi_id} - {self.occupees}/{self.capacite}"
+
+
+class FormatMixteArchive(models.Model):
+    tournoi_id = models.BigIntegerField(primary_key=True)
+    nb_rondes = models.PositiveSmallIntegerField()
+    nb_qualifies = models.PositiveSmallIntegerField()
+    intervalle_rondes = models.DurationField()
+    phase = models.CharField(max_length=20, choices=FormatMixte.PHASE_CHOICES)
+    ronde_courante = models.PositiveSmallIntegerField()
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'format_mixte_archive'
+
+    def __str__(self):
+        return f"Tournoi archivé #{self.tournoi_id} - {self.phase}"
+
+
+class ExemptionArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    tournoi_id = models.BigIntegerField(db_index=True)
+    equipe_id = models.BigIntegerField()
+    ronde = models.PositiveSmallIntegerField()
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'exemption_archive'
+
+    def __str__(self):
+        return f"Équipe {self.equipe_id} exemptée - ronde {self.ronde}"
+
+
+class NotificationArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    utilisateur_id = models.BigIntegerField(db_index=True)
+    rencontre_id = models.BigIntegerField()
+    type = models.CharField(max_length=20, choices=Notification.TYPE_CHOICES)
+    cle = models.CharField(max_length=100)
+    message = models.TextField()
+    date_creation = models.DateTimeField()
+    lue = models.BooleanField(default=False)
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_archive'
+
+    def __str__(self):
+        return f"{self.type} - rencontre {self.rencontre_id} (archivée)"
+
+
+class Changement(models.Model):
+    """Ligne du journal des changements (voir changements.py).
+
+    La séquence croît dans chaque base ; `donnees` contient les colonnes
+    de l'objet après l'écriture (rien pour une suppression ou un
+    archivage). Une ligne 'annulation' comble la séquence d'une
+    transaction annulée.
+    """
+    OPERATION_CHOICES = [
+        ('creation', 'Création'),
+        ('modification', 'Modification'),
+        ('suppression', 'Suppression'),
+        ('archivage', 'Archivage'),
+        ('annulation', 'Transaction annulée'),
+    ]
+
+    sequence = models.BigAutoField(primary_key=True)
+    modele = models.CharField(max_length=30)
+    objet_id = models.BigIntegerField()
+    operation = models.CharField(max_length=20, choices=OPERATION_CHOICES)
+    donnees = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'changements'
+        indexes = [
+            # Compaction : changements plus récents du même objet
+            models.Index(fields=['modele', 'objet_id'],
+                         name='changements_objet_idx'),
+            models.Index(fields=['date'], name='changements_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sequence} {self.operation} {self.modele} {self.objet_id}"
@@ -0,0 +1,66 @@
+# tournois/mots_de_passe.py
+"""
+Hachage des mots de passe (Utilisateur.motDePasse).
+
+L'algorithme est le premier de PASSWORD_HASHERS. Le coût se règle dans
+les settings, sans changer d'algorithme : HACHAGE_PBKDF2_ITERATIONS et
+HACHAGE_ARGON2 (argon2 demande le paquet argon2-cffi). Un hachage
+produit avec un autre algorithme ou un autre coût reste vérifiable ;
+il est recalculé à la connexion suivante (verifier()), le seul moment
+où le mot de passe en clair est connu. Pour PBKDF2, seulement vers un
+coût plus élevé : baisser HACHAGE_PBKDF2_ITERATIONS ne concerne que
+les nouveaux hachages, sans affaiblir ceux qui existent.
+
+Un hachage coûte volontairement des dizaines de millisecondes de CPU.
+Mesures : manage.py bench_mots_de_passe.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    check_password,
+    make_password,
+)
+
+
+class PBKDF2Hacheur(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 (le défaut de Django), itérations réglables."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'HACHAGE_PBKDF2_ITERATIONS',
+                       PBKDF2PasswordHasher.iterations)
+
+    def must_update(self, encoded):
+        return (super().must_update(encoded)
+                and self.decode(encoded)['iterations'] <= self.iterations)
+
+
+class Argon2Hacheur(Argon2PasswordHasher):
+    """Argon2id, coûts en temps et en mémoire réglables."""
+
+    def _parametre(self, nom):
+        return getattr(settings, 'HACHAGE_ARGON2', {}).get(
+            nom, getattr(Argon2PasswordHasher, nom))
+
+    time_cost = property(lambda self: self._parametre('time_cost'))
+    memory_cost = property(lambda self: self._parametre('memory_cost'))
+    parallelism = property(lambda self: self._parametre('parallelism'))
+
+
+def hacher(mot_de_passe):
+    return make_password(mot_de_passe)
+
+
+def verifier(utilisateur, mot_de_passe):
+    """Vérifie le mot de passe d'un Utilisateur ; si son hachage n'est
+    plus celui des settings (algorithme ou coût), le remplace."""
+    def rehacher(brut):
+        utilisateur.motDePasse = make_password(brut)
+        # Sans save() : pas de signaux de profil pour un changement de hachage
+        type(utilisateur).objects.filter(pk=utilisateur.pk).update(
+            motDePasse=utilisateur.motDePasse)
+        utilisateur._mot_de_passe_en_base = utilisateur.motDePasse
+
+    return check_password(mot_de_passe, utilisateur.motDePasse, rehacher)
+
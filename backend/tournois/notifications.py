@@ -0,0 +1,268 @@
+# tournois/notifications.py
+"""
+Rappels avant les rencontres (24 h et 1 h avant) et avis de changement
+de terrain ou d'horaire, pour les joueurs des deux équipes et l'arbitre.
+
+Le planificateur tourne dans son propre processus
+(manage.py planifier_notifications) :
+
+- il garde en mémoire les rencontres d'une fenêtre glissante
+  [maintenant, maintenant + FENETRE], lue sur l'index de date_heure :
+  la fenêtre entière au démarrage, ensuite seulement la tranche qui
+  vient d'y entrer ;
+- les échéances (rappels, début de la rencontre) sont dans un tas trié
+  par instant ; une entrée devenue obsolète (rencontre déplacée ou
+  sortie de la fenêtre) est ignorée quand elle sort du tas ;
+- les changements sont relus sur l'index de date_maj, depuis le dernier
+  changement vu, avec une marge pour les transactions validées en
+  retard : la table n'est jamais relue en entier ;
+- les messages dus à chaque tour sont regroupés par destinataire : un
+  seul envoi par utilisateur. Chaque notification porte une clé
+  d'événement, unique par utilisateur, ce qui évite les doublons, y
+  compris après un redémarrage.
+
+Seules les rencontres de la fenêtre donnent lieu à un avis de
+changement ; au-delà, le rappel 24 h donne déjà le nouvel horaire.
+
+L'horloge est injectable : avec HorlogeSimulee, des journées entières
+se déroulent en quelques secondes (manage.py simuler_notifications).
+"""
+import heapq
+import itertools
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import JoueurEquipe, Notification, Rencontre, Utilisateur
+
+logger = logging.getLogger(__name__)
+
+RAPPELS = (
+    ('rappel_24h', timedelta(hours=24)),
+    ('rappel_1h', timedelta(hours=1)),
+)
+FENETRE = timedelta(hours=25)
+# Un rappel en retard de plus (planificateur arrêté) n'est plus envoyé
+RETARD_MAX = timedelta(minutes=15)
+MARGE_CHANGEMENTS = timedelta(seconds=30)
+CHAMPS = ('pk', 'nom', 'date_heure', 'terrain', 'statut', 'version',
+          'date_maj', 'equipe1_id', 'equipe2_id', 'arbitre_id')
+ENVOI_PAR_DEFAUT = 'tournois.notifications.envoyer_emails'
+
+
+class HorlogeSimulee:
+    """Horloge avancée à la main, pour les simulations."""
+
+    def __init__(self, debut=None):
+        self.maintenant = debut or timezone.now()
+
+    def __call__(self):
+        return self.maintenant
+
+    def avancer(self, duree):
+        self.maintenant += duree
+
+
+# Contenu
+
+def _cle(type_notification, rencontre):
+    if type_notification == 'modification':
+        return f"modification:{rencontre['pk']}:{rencontre['version']}"
+    return (f"{type_notification}:{rencontre['pk']}:"
+            f"{rencontre['date_heure']:%Y%m%d%H%M}")
+
+
+def _message(type_notification, rencontre):
+    quand = timezone.localtime(rencontre['date_heure']).strftime(
+        '%d/%m/%Y à %H:%M')
+    lieu = f" ({rencontre['terrain']})" if rencontre['terrain'] else ''
+    if type_notification == 'modification':
+        return f"Changement : {rencontre['nom']} aura lieu le {quand}{lieu}."
+    delai = 'demain' if type_notification == 'rappel_24h' else 'dans une heure'
+    return f"Rappel : {rencontre['nom']} commence {delai}, le {quand}{lieu}."
+
+
+def _destinataires(rencontres):
+    """{rencontre_id: {utilisateur_id}} : joueurs des équipes et arbitre
+    (leur identifiant est celui de l'utilisateur)."""
+    equipe_ids = {r[champ] for r in rencontres
+                  for champ in ('equipe1_id', 'equipe2_id')}
+    joueurs = {}
+    for equipe_id, joueur_id in JoueurEquipe.objects.filter(
+            equipe_id__in=equipe_ids).values_list('equipe_id', 'joueur_id'):
+        joueurs.setdefault(equipe_id, set()).add(joueur_id)
+    return {
+        r['pk']: (joueurs.get(r['equipe1_id'], set())
+                  | joueurs.get(r['equipe2_id'], set())
+                  | ({r['arbitre_id']} if r['arbitre_id'] else set()))
+        for r in rencontres
+    }
+
+
+def envoyer_emails(lots):
+    """Envoi par défaut : un e-mail par utilisateur et par tour."""
+    adresses = dict(Utilisateur.objects.filter(
+        pk__in=lots).values_list('pk', 'email'))
+    messages = [
+        EmailMessage("SmartSport VT - vos rencontres", '\n'.join(lignes),
+                     to=[adresses[utilisateur_id]])
+        for utilisateur_id, lignes in lots.items()
+        if adresses.get(utilisateur_id)
+    ]
+    try:
+        get_connection().send_messages(messages)
+    except Exception:
+        logger.exception("Échec de l'envoi de %d e-mails", len(messages))
+
+
+# Planificateur
+
+class Planificateur:
+    def __init__(self, horloge=timezone.now, envoyer=None, fenetre=FENETRE):
+        self.horloge = horloge
+        self.envoyer = envoyer or import_string(
+            getattr(settings, 'NOTIFICATIONS_ENVOI', ENVOI_PAR_DEFAUT))
+        self.fenetre = fenetre
+        self.rencontres = {}   # rencontres suivies, par identifiant
+        self.echeances = []    # tas de (instant, n, type, rencontre_id, date_heure)
+        self._ordre = itertools.count()
+        self.borne = None      # fin de la fenêtre déjà chargée
+        self.curseur = None    # date_maj du dernier changement vu
+
+    def _suivre(self, rencontre, maintenant):
+        self.rencontres[rencontre['pk']] = rencontre
+        date_heure = rencontre['date_heure']
+        for type_notification, avance in RAPPELS:
+            if date_heure - avance >= maintenant - RETARD_MAX:
+                heapq.heappush(self.echeances, (
+                    date_heure - avance, next(self._ordre), type_notification,
+                    rencontre['pk'], date_heure))
+        # Au début de la rencontre, elle n'est plus suivie
+        heapq.heappush(self.echeances, (
+            date_heure, next(self._ordre), 'debut', rencontre['pk'], date_heure))
+
+    def _charger(self, maintenant):
+        """Ajoute la tranche de la fenêtre qui n'est pas encore chargée."""
+        fin = maintenant + self.fenetre
+        queryset = Rencontre.objects.filter(
+            statut='planifie', date_heure__lte=fin)
+        if self.borne is None:
+            queryset = queryset.filter(date_heure__gte=maintenant)
+        elif fin > self.borne:
+            queryset = queryset.filter(date_heure__gt=self.borne)
+        else:
+            return
+        for rencontre in queryset.values(*CHAMPS):
+            if rencontre['pk'] not in self.rencontres:
+                self._suivre(rencontre, maintenant)
+        self.borne = fin
+
+    def _changements(self, maintenant):
+        """Rencontres modifiées depuis le dernier tour ; retourne les avis
+        de changement à envoyer."""
+        avis = []
+        for rencontre in Rencontre.objects.filter(
+                date_maj__gte=self.curseur - MARGE_CHANGEMENTS).values(*CHAMPS):
+            self.curseur = max(self.curseur, rencontre['date_maj'])
+            pk = rencontre['pk']
+            ancienne = self.rencontres.get(pk)
+            if ancienne is not None and ancienne['version'] == rencontre['version']:
+                continue
+            dans_fenetre = (rencontre['statut'] == 'planifie'
+                            and maintenant <= rencontre['date_heure'] <= self.borne)
+            if ancienne is None:
+                if dans_fenetre:
+                    self._suivre(rencontre, maintenant)
+                continue
+            if rencontre['statut'] == 'planifie' and (
+                    (ancienne['date_heure'], ancienne['terrain'])
+                    != (rencontre['date_heure'], rencontre['terrain'])):
+                avis.append(('modification', rencontre))
+            if not dans_fenetre:
+                del self.rencontres[pk]
+            elif ancienne['date_heure'] != rencontre['date_heure']:
+                self._suivre(rencontre, maintenant)
+            else:
+                self.rencontres[pk] = rencontre
+        return avis
+
+    def _echeances_dues(self, maintenant):
+        dues = []
+        while self.echeances and self.echeances[0][0] <= maintenant:
+            instant, _, type_notification, pk, date_heure = heapq.heappop(
+                self.echeances)
+            rencontre = self.rencontres.get(pk)
+            if rencontre is None or rencontre['date_heure'] != date_heure:
+                continue  # déplacée ou plus suivie : entrée obsolète
+            if type_notification == 'debut':
+                del self.rencontres[pk]
+            elif instant >= maintenant - RETARD_MAX:
+                dues.append((type_notification, rencontre))
+        return dues
+
+    def _distribuer(self, evenements):
+        """Écrit les notifications nouvelles et les envoie, regroupées par
+        destinataire ; retourne {utilisateur_id: [messages]}."""
+        if not evenements:
+            return {}
+        # État actuel : une rencontre supprimée ou annulée entre-temps
+        # n'est pas notifiée
+        actuelles = {r['pk']: r for r in Rencontre.objects.filter(
+            pk__in={r['pk'] for _, r in evenements},
+            statut='planifie').values(*CHAMPS)}
+        destinataires = _destinataires(actuelles.values())
+
+        notifications = {}
+        for type_notification, rencontre in evenements:
+            actuelle = actuelles.get(rencontre['pk'])
+            if actuelle is None or (type_notification != 'modification'
+                                    and actuelle['date_heure'] != rencontre['date_heure']):
+                continue
+            cle = _cle(type_notification, actuelle)
+            message = _message(type_notification, actuelle)
+            for utilisateur_id in destinataires[actuelle['pk']]:
+                notifications[utilisateur_id, cle] = Notification(
+                    utilisateur_id=utilisateur_id, rencontre_id=actuelle['pk'],
+                    type=type_notification, cle=cle, message=message)
+        if not notifications:
+            return {}
+
+        deja_envoyees = set(Notification.objects.filter(
+            utilisateur_id__in={u for u, _ in notifications},
+            cle__in={c for _, c in notifications},
+        ).values_list('utilisateur_id', 'cle'))
+        nouvelles = [notification for cle, notification in notifications.items()
+                     if cle not in deja_envoyees]
+        Notification.objects.bulk_create(
+            nouvelles, batch_size=1000, ignore_conflicts=True)
+
+        lots = {}
+        for notification in nouvelles:
+            lots.setdefault(notification.utilisateur_id, []).append(
+                notification.message)
+        if lots:
+            self.envoyer(lots)
+        return lots
+
+    def tour(self):
+        """Un passage : fenêtre, changements, échéances, envois."""
+        maintenant = self.horloge()
+        if self.curseur is None:
+            self.curseur = timezone.now()
+        self._charger(maintenant)
+        evenements = self._changements(maintenant)
+        evenements += self._echeances_dues(maintenant)
+        return self._distribuer(evenements)
+
+    def executer(self, intervalle=30):
+        while True:
+            try:
+                self.tour()
+            except Exception:
+                logger.exception("Tour du planificateur de notifications")
+            time.sleep(intervalle)
@@ -0,0 +1,83 @@
+# tournois/permissions.py
+from rest_framework.permissions import BasePermission
+
+from .models import Equipe, Inscription, JoueurEquipe, Tournoi
+
+
+class EstAdministrateur(BasePermission):
+    """Réservé aux administrateurs de la plateforme (rôle 'administrateur'
+    ou compte staff)."""
+
+    def has_permission(self, request, view):
+        utilisateur = request.user
+        return bool(getattr(utilisateur, 'is_staff', False)
+                    or getattr(utilisateur, 'role', None) == 'administrateur')
+
+
+class EstArbitre(BasePermission):
+    """Réservé aux arbitres (rôle 'arbitre')."""
+
+    def has_permission(self, request, view):
+        return getattr(request.user, 'role', None) == 'arbitre'
+
+
+class EstOrganisateur(BasePermission):
+    """Réservé à l'organisateur de l'URL (organisateur_id) lui-même."""
+
+    def has_permission(self, request, view):
+        utilisateur = request.user
+        return (getattr(utilisateur, 'role', None) == 'organisateur'
+                and view.kwargs.get('organisateur_id') == utilisateur.pk)
+
+
+class EstOrganisateurDuTournoi(BasePermission):
+    """Réservé à l'organisateur du tournoi de l'URL (tournoi_id, ou celui
+    de l'inscription inscription_id)."""
+
+    def has_permission(self, request, view):
+        utilisateur = request.user
+        if getattr(utilisateur, 'role', None) != 'organisateur':
+            return False
+        tournoi_id = view.kwargs.get('tournoi_id')
+        if tournoi_id is None and 'inscription_id' in view.kwargs:
+            tournoi_id = Inscription.objects.filter(
+                pk=view.kwargs['inscription_id']).values_list(
+                'tournoi_id', flat=True).first()
+        return Tournoi.objects.filter(
+            pk=tournoi_id, organisateur_id=utilisateur.pk).exists()
+
+
+class EstAbonnableAuFlux(BasePermission):
+    """Flux de calendrier du corps de la requête (type, id) : ceux des
+    équipes et des tournois sont ouverts aux utilisateurs connectés,
+    celui d'un joueur ou d'un arbitre à lui seul."""
+
+    def has_permission(self, request, view):
+        utilisateur = request.user
+        role = getattr(utilisateur, 'role', None)
+        if role is None:
+            return False
+        type_flux = request.data.get('type')
+        if type_flux in ('joueur', 'arbitre'):
+            return role == type_flux and request.data.get('id') == utilisateur.pk
+        return True
+
+
+class EstResponsableDeLEquipe(BasePermission):
+    """Réservé au capitaine ou à l'organisateur de l'équipe désignée par
+    le corps de la requête (equipe)."""
+
+    def has_permission(self, request, view):
+        utilisateur = request.user
+        equipe_id = request.data.get('equipe')
+        if not isinstance(equipe_id, int):
+            return False
+        role = getattr(utilisateur, 'role', None)
+        if role == 'organisateur':
+            return Equipe.objects.filter(
+                pk=equipe_id, organisateur_id=utilisateur.pk).exists()
+        if role == 'joueur':
+            return JoueurEquipe.objects.filter(
+                equipe_id=equipe_id, joueur_id=utilisateur.pk,
+                role='capitaine').exists()
+        return False
@@ -0,0 +1,336 @@
+# tournois/profilage.py
+"""
+Profilage de requêtes à la demande, en production.
+
+Une requête est profilée :
+- si elle porte un jeton signé, dans l'en-tête X-Profilage ou dans
+  ?profilage=<jeton> ; le jeton est délivré aux administrateurs par
+  POST /api/profilage/jeton/ et expire après PROFILAGE_DUREE_JETON ;
+- ou par échantillonnage, une requête sur PROFILAGE_ECHANTILLON
+  (0 : désactivé).
+
+Pour une requête profilée, ProfilageMiddleware relève :
+- le profil cProfile du thread de la requête (export pstats) ;
+- des échantillons de pile toutes les PROFILAGE_INTERVALLE secondes,
+  pris par un thread commun (export speedscope ; pour une requête trop
+  courte, les piles sont reconstituées depuis cProfile) ;
+- la liste des requêtes SQL, sur toutes les bases, avec leur durée
+  (sans les paramètres).
+
+Les profils vont dans un tampon circulaire de PROFILAGE_TAMPON
+emplacements, dans le cache : avec un cache partagé, un profil pris
+par un worker se télécharge depuis n'importe quel autre.
+
+Sans jeton ni échantillonnage, le middleware ne fait qu'un test sur
+l'en-tête et la chaîne de requête. Le corps d'une réponse en streaming,
+produit après le middleware, n'est pas profilé.
+"""
+import cProfile
+import itertools
+import json
+import marshal
+import sys
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+EN_TETE = 'HTTP_X_PROFILAGE'
+PARAMETRE = 'profilage'
+SEL = 'tournois.profilage'
+REQUETES_MAX = 2000
+PROFONDEUR_MAX = 200
+DUREE_CACHE = 24 * 3600
+
+_compteur = itertools.count()
+
+
+def _parametre(nom, defaut):
+    return getattr(settings, f'PROFILAGE_{nom}', defaut)
+
+
+# Jetons
+
+def jeton(utilisateur_id):
+    """Jeton signé qui active le profilage des requêtes qui le portent."""
+    return signing.TimestampSigner(salt=SEL).sign(str(utilisateur_id))
+
+
+def duree_jeton():
+    """Validité d'un jeton, en secondes."""
+    return _parametre('DUREE_JETON', 3600)
+
+
+def jeton_valide(valeur):
+    try:
+        signing.TimestampSigner(salt=SEL).unsign(valeur, max_age=duree_jeton())
+    except signing.BadSignature:  # SignatureExpired en hérite
+        return False
+    return True
+
+
+# Échantillonnage des piles
+
+class Echantillonneur:
+    """Un thread unique relève la pile des threads suivis."""
+
+    def __init__(self, intervalle):
+        self.intervalle = intervalle
+        self.suivis = {}  # thread_id -> liste d'échantillons
+        self._verrou = threading.Lock()
+        self._reveil = threading.Event()
+        self._thread = None
+
+    def demarrer(self, thread_id):
+        echantillons = []
+        with self._verrou:
+            self.suivis[thread_id] = echantillons
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._boucle, name='profilage', daemon=True)
+                self._thread.start()
+        self._reveil.set()
+        return echantillons
+
+    def arreter(self, thread_id):
+        with self._verrou:
+            self.suivis.pop(thread_id, None)
+
+    def _boucle(self):
+        while True:
+            with self._verrou:
+                if not self.suivis:
+                    self._reveil.clear()
+            self._reveil.wait()
+            time.sleep(self.intervalle)
+            piles = sys._current_frames()
+            instant = time.perf_counter()
+            with self._verrou:
+                suivis = list(self.suivis.items())
+            for thread_id, echantillons in suivis:
+                frame = piles.get(thread_id)
+                pile = []
+                while frame is not None and len(pile) < PROFONDEUR_MAX:
+                    code = frame.f_code
+                    pile.append((code.co_name, code.co_filename,
+                                 code.co_firstlineno))
+                    frame = frame.f_back
+                if pile:
+                    echantillons.append((instant, tuple(reversed(pile))))
+
+
+_echantillonneur = None
+
+
+def _echantillons(thread_id):
+    global _echantillonneur
+    if _echantillonneur is None:
+        _echantillonneur = Echantillonneur(_parametre('INTERVALLE', 0.001))
+    return _echantillonneur.demarrer(thread_id)
+
+
+# Tampon circulaire
+
+def _cle(emplacement):
+    return f'profilage:{emplacement}'
+
+
+def _enregistrer(profil):
+    taille = _parametre('TAMPON', 20)
+    try:
+        numero = cache.incr('profilage:compteur')
+    except ValueError:  # compteur absent du cache
+        cache.add('profilage:compteur', 0, None)
+        numero = cache.incr('profilage:compteur')
+    profil['id'] = numero
+    cache.set(_cle(numero % taille), profil, DUREE_CACHE)
+    return numero
+
+
+def profils():
+    """Résumés des profils du tampon, du plus récent au plus ancien."""
+    taille = _parametre('TAMPON', 20)
+    trouves = cache.get_many([_cle(i) for i in range(taille)]).values()
+    return [
+        {cle: valeur for cle, valeur in profil.items()
+         if cle not in ('stats', 'echantillons', 'requetes')}
+        for profil in sorted(trouves, key=lambda p: p['id'], reverse=True)
+    ]
+
+
+def profil(profil_id):
+    """Profil complet, ou None s'il a été remplacé dans le tampon."""
+    trouve = cache.get(_cle(profil_id % _parametre('TAMPON', 20)))
+    return trouve if trouve and trouve['id'] == profil_id else None
+
+
+# Exports
+
+def en_pstats(profil):
+    """Contenu d'un fichier .prof (pstats.Stats, snakeviz, ...)."""
+    return marshal.dumps(profil['stats'])
+
+
+def fonctions(profil, nombre=30):
+    """Fonctions les plus coûteuses, en temps cumulé."""
+    lignes = []
+    for (fichier, ligne, nom), (_, appels, propre, cumule, _) in (
+            profil['stats'].items()):
+        lignes.append({'fonction': f'{nom} ({fichier}:{ligne})',
+                       'appels': appels, 'propre_ms': round(propre * 1000, 3),
+                       'cumule_ms': round(cumule * 1000, 3)})
+    lignes.sort(key=lambda l: l['cumule_ms'], reverse=True)
+    return lignes[:nombre]
+
+
+def _piles_cprofile(stats):
+    """Piles reconstituées depuis cProfile, pour une requête trop courte
+    pour avoir été échantillonnée : chaque fonction, sous la chaîne de ses
+    appelants principaux, pèse son temps propre."""
+    piles = []
+    for fonction, (_, _, propre, _, appelants) in stats.items():
+        if propre <= 0:
+            continue
+        pile, vues = [fonction], {fonction}
+        while appelants and len(pile) < PROFONDEUR_MAX:
+            appelant = max(appelants, key=lambda a: appelants[a][3])
+            if appelant in vues or appelant not in stats:
+                break
+            pile.append(appelant)
+            vues.add(appelant)
+            appelants = stats[appelant][4]
+        piles.append((propre * 1000, tuple(
+            (nom, fichier, ligne) for fichier, ligne, nom in reversed(pile))))
+    return piles
+
+
+def en_speedscope(profil):
+    """Profil échantillonné au format speedscope (https://speedscope.app)."""
+    if profil['echantillons']:
+        echantillons = []
+        precedent = None
+        for instant, pile in profil['echantillons']:
+            # Poids : temps réel écoulé depuis l'échantillon précédent
+            echantillons.append((round((instant - precedent) * 1000, 3)
+                                 if precedent else profil['intervalle_ms'], pile))
+            precedent = instant
+    else:
+        echantillons = _piles_cprofile(profil['stats'])
+    index, frames, samples, weights = {}, [], [], []
+    for poids, pile in echantillons:
+        sample = []
+        for nom, fichier, ligne in pile:
+            cle = (nom, fichier, ligne)
+            if cle not in index:
+                index[cle] = len(frames)
+                frames.append({'name': nom, 'file': fichier, 'line': ligne})
+            sample.append(index[cle])
+        samples.append(sample)
+        weights.append(poids)
+    nom = f"{profil['methode']} {profil['chemin']}"
+    return json.dumps({
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': nom,
+        'exporter': 'smartsport-vt',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled', 'name': nom, 'unit': 'milliseconds',
+            'startValue': 0, 'endValue': sum(weights),
+            'samples': samples, 'weights': weights,
+        }],
+    })
+
+
+# Middleware
+
+class _Requetes:
+    """execute_wrapper qui note chaque requête SQL."""
+
+    def __init__(self, alias, requetes):
+        self.alias = alias
+        self.requetes = requetes
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.requetes) < REQUETES_MAX:
+                self.requetes.append({
+                    'base': self.alias, 'sql': sql,
+                    'duree_ms': round((time.perf_counter() - debut) * 1000, 3)})
+
+
+class ProfilageMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _declencheur(self, request):
+        valeur = request.META.get(EN_TETE)
+        if valeur is None and f'{PARAMETRE}=' in request.META.get(
+                'QUERY_STRING', ''):
+            valeur = request.GET.get(PARAMETRE)
+        if valeur is not None:
+            return 'jeton' if jeton_valide(valeur) else None
+        echantillon = _parametre('ECHANTILLON', 0)
+        if echantillon and next(_compteur) % echantillon == 0:
+            return 'echantillon'
+        return None
+
+    def __call__(self, request):
+        declencheur = self._declencheur(request)
+        if declencheur is None:
+            return self.get_response(request)
+        return self._profiler(request, declencheur)
+
+    def _profiler(self, request, declencheur):
+        requetes = []
+        thread_id = threading.get_ident()
+        profileur = cProfile.Profile()
+        debut = time.perf_counter()
+        with ExitStack() as pile:
+            for alias in connections:
+                pile.enter_context(connections[alias].execute_wrapper(
+                    _Requetes(alias, requetes)))
+            echantillons = _echantillons(thread_id)
+            try:
+                profileur.enable()
+            except ValueError:
+                # Un autre profileur est actif dans le processus (Python
+                # 3.12+) : la requête est seulement échantillonnée
+                profileur = None
+            try:
+                response = self.get_response(request)
+            finally:
+                if profileur is not None:
+                    profileur.disable()
+                _echantillonneur.arreter(thread_id)
+                echantillons = list(echantillons)
+        duree = time.perf_counter() - debut
+
+        if profileur is not None:
+            profileur.create_stats()
+            stats = profileur.stats
+        else:
+            stats = {}
+        numero = _enregistrer({
+            'date': timezone.now().isoformat(),
+            'declencheur': declencheur,
+            'methode': request.method,
+            'chemin': request.path,
+            'statut': response.status_code,
+            'duree_ms': round(duree * 1000, 3),
+            'nb_requetes': len(requetes),
+            'duree_sql_ms': round(sum(r['duree_ms'] for r in requetes), 3),
+            'intervalle_ms': _echantillonneur.intervalle * 1000,
+            'stats': stats,
+            'echantillons': echantillons,
+            'requetes': requetes,
+        })
+        response['X-Profilage-Id'] = str(numero)
+        return response
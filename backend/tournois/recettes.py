@@ -0,0 +1,280 @@
+# tournois/recettes.py
+"""
+Recettes et remboursements.
+
+Les paiements sont agrégés par jour dans RecettesJour, par organisateur,
+tournoi, méthode et statut (nombre et montant). Chaque changement d'un
+Paiement retire la contribution de son ancien état et ajoute celle du
+nouvel état : un paiement qui passe de en_attente à paye, puis à
+rembourse, change de ligne sans qu'aucune requête ne relise la table
+des paiements. Une question sur une période se limite à sommer les
+lignes des jours concernés, quelle que soit la taille de la période.
+
+Les paiements archivés (voir archivage.py) continuent de compter.
+balayage() répond aux mêmes questions par un GROUP BY sur les
+paiements : c'est la référence du benchmark et du contrôle nocturne.
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from .models import Paiement, PaiementArchive, RecettesJour
+from .statistiques import jour_de
+
+CHAMPS_ETAT = ('organisateur_id', 'tournoi_id', 'date_paiement', 'methode',
+               'statut', 'montant')
+# Dimensions de regroupement -> colonne
+DIMENSIONS = {
+    'organisateur': 'organisateur_id',
+    'tournoi': 'tournoi_id',
+    'jour': 'jour',
+    'methode': 'methode',
+}
+STATUTS = [statut for statut, _ in Paiement.STATUT_CHOICES]
+
+_local = threading.local()
+
+
+@contextmanager
+def suspendre():
+    """Désactive la mise à jour par signaux, par exemple pendant
+    l'archivage où les paiements quittent la table sans changer
+    les recettes."""
+    precedent = est_suspendu()
+    _local.suspendu = True
+    try:
+        yield
+    finally:
+        _local.suspendu = precedent
+
+
+def est_suspendu():
+    return getattr(_local, 'suspendu', False)
+
+
+def etat(paiement):
+    """Photographie des champs d'un paiement utiles aux recettes."""
+    return {champ: getattr(paiement, champ) for champ in CHAMPS_ETAT}
+
+
+def etat_en_base(paiement_id):
+    """État actuellement enregistré d'un paiement (None si absent)."""
+    return Paiement.objects.filter(pk=paiement_id).values(*CHAMPS_ETAT).first()
+
+
+def contributions(etat_paiement):
+    """Ligne (organisateur_id, tournoi_id, jour, methode, statut) ->
+    (nombre, montant) d'un paiement."""
+    if not etat_paiement:
+        return {}
+    cle = (etat_paiement['organisateur_id'] or 0,
+           etat_paiement['tournoi_id'] or 0,
+           jour_de(etat_paiement['date_paiement']),
+           etat_paiement['methode'], etat_paiement['statut'])
+    return {cle: (1, Decimal(etat_paiement['montant']))}
+
+
+def _cumuler(cible, cle, nombre, montant, signe=1):
+    ligne = cible[cle]
+    ligne[0] += signe * nombre
+    ligne[1] += signe * montant
+
+
+def _appliquer(deltas):
+    """Applique des deltas {clé: [nombre, montant]} à RecettesJour.
+
+    Comme pour les statistiques, les lignes manquantes ne sont créées
+    que pour les clés qui reçoivent une contribution positive, et les
+    clés qui ne diffèrent que par le tournoi sont mises à jour en une
+    seule requête.
+    """
+    a_creer = [
+        RecettesJour(organisateur_id=cle[0], tournoi_id=cle[1], jour=cle[2],
+                     methode=cle[3], statut=cle[4])
+        for cle, (nombre, _) in deltas.items() if nombre > 0
+    ]
+    if a_creer:
+        RecettesJour.objects.bulk_create(a_creer, ignore_conflicts=True)
+
+    groupes = defaultdict(list)
+    for (organisateur_id, tournoi_id, jour, methode, statut), d in (
+            deltas.items()):
+        groupes[(organisateur_id, jour, methode, statut, tuple(d))].append(
+            tournoi_id)
+    for (organisateur_id, jour, methode, statut, (nombre, montant)), ids in (
+            groupes.items()):
+        RecettesJour.objects.filter(
+            organisateur_id=organisateur_id, tournoi_id__in=ids, jour=jour,
+            methode=methode, statut=statut,
+        ).update(nombre=F('nombre') + nombre, montant=F('montant') + montant)
+
+
+def mettre_a_jour(transitions):
+    """Met à jour les agrégats pour une liste de couples (avant, après).
+
+    Chaque élément est un état de paiement (voir etat()) ou None pour
+    une création ou une suppression. Un paiement dont l'état utile n'a
+    pas changé ne coûte aucune requête.
+    """
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for avant, apres in transitions:
+        for cle, (nombre, montant) in contributions(avant).items():
+            _cumuler(deltas, cle, nombre, montant, -1)
+        for cle, (nombre, montant) in contributions(apres).items():
+            _cumuler(deltas, cle, nombre, montant)
+    deltas = {cle: d for cle, d in deltas.items() if any(d)}
+    if not deltas:
+        return
+    with transaction.atomic(using=router.db_for_write(RecettesJour)):
+        _appliquer(deltas)
+
+
+# Lecture
+
+def _colonnes(par):
+    inconnues = [nom for nom in par if nom not in DIMENSIONS]
+    if inconnues:
+        raise ValueError(f"Regroupement inconnu: {', '.join(inconnues)} "
+                         f"(possibles: {', '.join(DIMENSIONS)})")
+    return [DIMENSIONS[nom] for nom in par]
+
+
+def _indicateurs(par_statut):
+    """Recettes, détail par statut et taux, pour {statut: [nombre, montant]}."""
+    statuts = {
+        statut: {'nombre': par_statut[statut][0],
+                 'montant': par_statut[statut][1]}
+        for statut in STATUTS
+    }
+    regles = statuts['paye']['nombre'] + statuts['rembourse']['nombre']
+    regles_montant = statuts['paye']['montant'] + statuts['rembourse']['montant']
+    aboutis = regles + statuts['refuse']['nombre']
+    return {
+        'recettes': statuts['paye']['montant'],
+        'statuts': statuts,
+        'taux_remboursement': round(
+            statuts['rembourse']['nombre'] / regles, 4) if regles else 0.0,
+        'taux_remboursement_montant': round(
+            float(statuts['rembourse']['montant'] / regles_montant), 4)
+        if regles_montant else 0.0,
+        'taux_refus': round(
+            statuts['refuse']['nombre'] / aboutis, 4) if aboutis else 0.0,
+    }
+
+
+def _resultat(lignes, colonnes, par):
+    """Regroupe des lignes (colonnes..., statut, nombre, montant)."""
+    vide = lambda: defaultdict(lambda: [0, Decimal(0)])  # noqa: E731
+    groupes = defaultdict(vide)
+    totaux = vide()
+    for ligne in lignes:
+        cle = tuple((ligne[colonne] or 0) if colonne.endswith('_id')
+                    else ligne[colonne] for colonne in colonnes)
+        for cible in (groupes[cle][ligne['statut']], totaux[ligne['statut']]):
+            cible[0] += ligne['nombre'] or 0
+            cible[1] += ligne['montant'] or Decimal(0)
+    return {
+        'totaux': _indicateurs(totaux),
+        'lignes': [
+            {**dict(zip(par, cle)), **_indicateurs(groupes[cle])}
+            for cle in sorted(groupes)
+        ] if par else [],
+    }
+
+
+def recettes(debut=None, fin=None, organisateur_id=None, tournoi_id=None,
+             par=()):
+    """Recettes d'une période (jours inclus), regroupées selon `par`
+    (organisateur, tournoi, jour, methode), depuis les agrégats."""
+    colonnes = _colonnes(par)
+    # Les lignes vidées par des transitions restent en base
+    queryset = RecettesJour.objects.filter(nombre__gt=0)
+    if debut:
+        queryset = queryset.filter(jour__gte=debut)
+    if fin:
+        queryset = queryset.filter(jour__lte=fin)
+    if organisateur_id:
+        queryset = queryset.filter(organisateur_id=organisateur_id)
+    if tournoi_id:
+        queryset = queryset.filter(tournoi_id=tournoi_id)
+    lignes = queryset.values(*colonnes, 'statut').annotate(
+        nombre=Sum('nombre'), montant=Sum('montant')).order_by()
+    return _resultat(lignes, colonnes, par)
+
+
+def balayage(debut=None, fin=None, organisateur_id=None, tournoi_id=None,
+             par=()):
+    """Même résultat que recettes(), par un GROUP BY sur les paiements
+    (archives comprises)."""
+    colonnes = _colonnes(par)
+    lignes = []
+    for modele in (Paiement, PaiementArchive):
+        queryset = modele.objects.all()
+        if debut:
+            queryset = queryset.filter(date_paiement__date__gte=debut)
+        if fin:
+            queryset = queryset.filter(date_paiement__date__lte=fin)
+        if organisateur_id:
+            queryset = queryset.filter(organisateur_id=organisateur_id)
+        if tournoi_id:
+            queryset = queryset.filter(tournoi_id=tournoi_id)
+        if 'jour' in colonnes:
+            queryset = queryset.annotate(jour=TruncDate('date_paiement'))
+        lignes += queryset.values(*colonnes, 'statut').annotate(
+            nombre=Count('pk'), montant=Sum('montant')).order_by()
+    return _resultat(lignes, colonnes, par)
+
+
+# Contrôle de cohérence
+
+def recalculer():
+    """Agrégats attendus, recalculés à partir des paiements (archivés
+    compris)."""
+    attendu = defaultdict(lambda: [0, Decimal(0)])
+    for modele in (Paiement, PaiementArchive):
+        for etat_paiement in modele.objects.values(*CHAMPS_ETAT).iterator(
+                chunk_size=2000):
+            for cle, (nombre, montant) in contributions(etat_paiement).items():
+                _cumuler(attendu, cle, nombre, montant)
+    return {cle: tuple(d) for cle, d in attendu.items() if any(d)}
+
+
+def _lignes_en_base():
+    lignes = RecettesJour.objects.values_list(
+        'organisateur_id', 'tournoi_id', 'jour', 'methode', 'statut',
+        'nombre', 'montant')
+    return {
+        tuple(ligne[:5]): tuple(ligne[5:])
+        for ligne in lignes.iterator(chunk_size=2000)
+        if ligne[5] or ligne[6]
+    }
+
+
+def verifier(corriger=False):
+    """Compare les agrégats avec un recalcul complet.
+
+    Retourne les écarts ; avec corriger=True la table est reconstruite
+    dans une transaction.
+    """
+    attendu = recalculer()
+    en_base = _lignes_en_base()
+    ecarts = sorted(
+        (cle, attendu.get(cle), en_base.get(cle))
+        for cle in set(attendu) | set(en_base)
+        if attendu.get(cle) != en_base.get(cle)
+    )
+    if corriger and ecarts:
+        with transaction.atomic(using=router.db_for_write(RecettesJour)):
+            RecettesJour.objects.all().delete()
+            RecettesJour.objects.bulk_create(
+                (RecettesJour(organisateur_id=cle[0], tournoi_id=cle[1],
+                              jour=cle[2], methode=cle[3], statut=cle[4],
+                              nombre=nombre, montant=montant)
+                 for cle, (nombre, montant) in attendu.items()),
+                batch_size=1000)
+    return ecarts
@@ -0,0 +1,77 @@
+# tournois/renderers.py
+"""
+Renderers rapides, à activer vue par vue :
+
+    renderer_classes = renderers.RENDERERS_RAPIDES
+
+- ORJSONRenderer : JSON via orjson (repli sur le JSONRenderer de DRF si
+  orjson n'est pas installé) ;
+- MessagePackRenderer : choisi avec `Accept: application/x-msgpack`
+  (ou ?format=msgpack), disponible si msgpack est installé.
+"""
+import datetime
+from decimal import Decimal
+
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # dépendance optionnelle
+    msgpack = None
+
+
+def _par_defaut(valeur):
+    """Types non gérés nativement, rendus comme le fait DRF."""
+    if isinstance(valeur, Decimal):
+        return str(valeur)
+    if isinstance(valeur, Promise):
+        return str(valeur)
+    if isinstance(valeur, datetime.datetime):
+        # Même format que l'encodeur de DRF : UTC noté 'Z' et non '+00:00'
+        representation = valeur.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    if isinstance(valeur, (datetime.date, datetime.time)):
+        return valeur.isoformat()
+    if isinstance(valeur, datetime.timedelta):
+        return str(valeur.total_seconds())
+    if isinstance(valeur, (set, frozenset, tuple)):
+        return list(valeur)
+    raise TypeError(f"Type non sérialisable: {type(valeur).__name__}")
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        # Les dates passent par _par_defaut plutôt que par le format
+        # natif d'orjson, pour rester identiques au JSONRenderer de DRF
+        return orjson.dumps(data, default=_par_defaut,
+                            option=orjson.OPT_NON_STR_KEYS
+                            | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_par_defaut, use_bin_type=True)
+
+
+RENDERERS_RAPIDES = [ORJSONRenderer]
+if msgpack is not None:
+    RENDERERS_RAPIDES.append(MessagePackRenderer)
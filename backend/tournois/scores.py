@@ -0,0 +1,203 @@
+# tournois/scores.py
+"""
+Saisie groupée des scores par les arbitres.
+
+Un lot de (rencontre_id, score1, score2, statut, version) est validé
+puis appliqué dans une seule transaction. La concurrence est optimiste :
+chaque saisie porte la version lue par l'arbitre, et une seule requête
+UPDATE ... WHERE (id, version) réserve les lignes du lot. Seules ces
+lignes sont verrouillées, deux arbitres qui saisissent des rencontres
+différentes ne s'attendent donc jamais. Si une version ne correspond
+plus, rien n'est écrit et les rencontres en conflit sont signalées.
+Un arbitre ne saisit que les rencontres qui lui sont attribuées : la
+condition fait partie de la même réservation.
+
+Les scores sont écrits avec bulk_update, sans passer par
+Rencontre.save(). Statistiques, instantanés, calendriers et le signal
+scores_enregistres sont déclenchés une fois par lot (par shard si le
+lot en couvre plusieurs).
+"""
+from contextlib import ExitStack
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import calendrier, changements, instantanes, shards, statistiques
+from .models import Rencontre
+from .signals import scores_enregistres
+
+TAILLE_MAX_LOT = 500
+STATUTS = {code for code, _ in Rencontre.STATUT_CHOICES}
+
+
+class _ReservationIncomplete(Exception):
+    pass
+
+
+class RencontresIntrouvables(Exception):
+    """Des rencontres du lot n'existent pas (ou sont archivées)."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        super().__init__(f"Rencontres introuvables: {sorted(ids)}")
+
+
+class ConflitVersion(Exception):
+    """Des rencontres ont été modifiées depuis leur lecture."""
+
+    def __init__(self, conflits):
+        self.conflits = conflits  # {rencontre_id: version actuelle}
+        super().__init__(
+            f"Rencontres modifiées entre-temps: {sorted(conflits)}")
+
+
+def _score(valeur, nom, index):
+    if valeur is None:
+        return None
+    if isinstance(valeur, bool) or not isinstance(valeur, int) or valeur < 0:
+        raise ValidationError(
+            f"Saisie {index}: '{nom}' doit être un entier positif ou nul")
+    return valeur
+
+
+def valider(saisies):
+    """Normalise et valide un lot ; lève ValidationError sinon."""
+    if not isinstance(saisies, list) or not saisies:
+        raise ValidationError("Le lot doit être une liste non vide")
+    if len(saisies) > TAILLE_MAX_LOT:
+        raise ValidationError(
+            f"Le lot dépasse {TAILLE_MAX_LOT} rencontres")
+
+    normalisees = []
+    vus = set()
+    for index, saisie in enumerate(saisies):
+        if not isinstance(saisie, dict):
+            raise ValidationError(f"Saisie {index}: objet attendu")
+        rencontre_id, version = saisie.get('id'), saisie.get('version')
+        if any(isinstance(valeur, bool) or not isinstance(valeur, int)
+               for valeur in (rencontre_id, version)):
+            raise ValidationError(
+                f"Saisie {index}: 'id' et 'version' entiers requis")
+        if rencontre_id in vus:
+            raise ValidationError(
+                f"Saisie {index}: rencontre {rencontre_id} en double")
+        vus.add(rencontre_id)
+        statut = saisie.get('statut')
+        if statut not in STATUTS:
+            raise ValidationError(f"Saisie {index}: statut invalide")
+        score1 = _score(saisie.get('score1'), 'score1', index)
+        score2 = _score(saisie.get('score2'), 'score2', index)
+        if statut == 'termine' and (score1 is None or score2 is None):
+            raise ValidationError(
+                f"Saisie {index}: une rencontre terminée a deux scores")
+        normalisees.append({'id': rencontre_id, 'version': version,
+                            'score1': score1, 'score2': score2,
+                            'statut': statut})
+    return normalisees
+
+
+def _appliquer(saisies, arbitre_id=None):
+    """Réserve et met à jour les rencontres d'un lot, toutes dans la base
+    courante ; à appeler dans sa transaction. Retourne les rencontres."""
+    ids = [saisie['id'] for saisie in saisies]
+    reservation = reduce(or_, (
+        Q(pk=saisie['id'], version=saisie['version'])
+        for saisie in saisies))
+    if arbitre_id is not None:
+        reservation &= Q(arbitre_id=arbitre_id)
+    reservees = Rencontre.objects.filter(reservation).update(
+        version=F('version') + 1, date_maj=timezone.now())
+    if reservees != len(saisies):
+        raise _ReservationIncomplete
+
+    rencontres = list(Rencontre.objects.filter(pk__in=ids))
+    transitions = []
+    statut_change = []
+    par_id = {saisie['id']: saisie for saisie in saisies}
+    for rencontre in rencontres:
+        avant = statistiques.etat(rencontre)
+        saisie = par_id[rencontre.pk]
+        if saisie['statut'] != rencontre.statut:
+            statut_change.append(rencontre)
+        rencontre.score1 = saisie['score1']
+        rencontre.score2 = saisie['score2']
+        rencontre.statut = saisie['statut']
+        transitions.append((avant, statistiques.etat(rencontre)))
+    Rencontre.objects.bulk_update(
+        rencontres, ['score1', 'score2', 'statut'])
+    changements.enregistrer('modification', rencontres, shards.base())
+
+    statistiques.mettre_a_jour(transitions)
+    tournoi_ids = {rencontre.tournoi_id for rencontre in rencontres}
+    instantanes.marquer(tournoi_ids, ['rencontres'])
+    flux = {
+        f for rencontre in statut_change
+        for f in calendrier.flux_de_rencontre(vars(rencontre))
+    }
+    alias = shards.base()
+
+    def signaler():
+        # Les récepteurs lisent les tables du tournoi, dans son shard
+        with shards.sur(alias):
+            scores_enregistres.send(sender=Rencontre, rencontre_ids=ids,
+                                    tournoi_ids=tournoi_ids)
+
+    transaction.on_commit(lambda: calendrier.invalider(flux), using=alias)
+    transaction.on_commit(signaler, using=alias)
+    return rencontres
+
+
+def enregistrer_scores(saisies, arbitre_id=None):
+    """Valide et applique un lot de scores ; retourne les rencontres
+    mises à jour. Lève ValidationError, RencontresIntrouvables,
+    PermissionDenied (une rencontre n'est pas attribuée à `arbitre_id`,
+    si fourni) ou ConflitVersion.
+
+    Le shard de chaque rencontre se déduit de son identifiant. Un lot
+    qui couvre plusieurs shards ouvre une transaction par shard, toutes
+    validées ensemble à la fin : un conflit sur l'un n'écrit rien
+    nulle part.
+    """
+    saisies = valider(saisies)
+    par_shard = {}
+    for saisie in saisies:
+        try:
+            alias = shards.shard_de_l_id(saisie['id'])
+        except shards.ShardIndetermine as e:
+            raise ValidationError(str(e))
+        par_shard.setdefault(alias, []).append(saisie)
+
+    try:
+        rencontres = []
+        with ExitStack() as transactions:
+            for alias, lot in par_shard.items():
+                transactions.enter_context(transaction.atomic(using=alias))
+                with shards.sur(alias):
+                    rencontres += _appliquer(lot, arbitre_id)
+    except _ReservationIncomplete:
+        # Lu après le rollback : les versions sont celles des autres
+        versions, arbitres = {}, {}
+        for alias, lot in par_shard.items():
+            for pk, version, arbitre in Rencontre.objects.using(alias).filter(
+                    pk__in=[saisie['id'] for saisie in lot]).values_list(
+                    'pk', 'version', 'arbitre_id'):
+                versions[pk] = version
+                arbitres[pk] = arbitre
+        introuvables = [saisie['id'] for saisie in saisies
+                        if saisie['id'] not in versions]
+        if introuvables:
+            raise RencontresIntrouvables(introuvables)
+        if arbitre_id is not None and any(
+                arbitre != arbitre_id for arbitre in arbitres.values()):
+            raise PermissionDenied(
+                "Rencontre non attribuée à cet arbitre")
+        raise ConflitVersion({
+            saisie['id']: versions.get(saisie['id'])
+            for saisie in saisies
+            if versions.get(saisie['id']) != saisie['version']
+        })
+    return rencontres
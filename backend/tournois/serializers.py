@@ -53,3 +53,54 @@ class RegisterSerializer(serializers.ModelSerializer):
             role=validated_data.get('role', 'joueur')
         )
         return user
+
+
+def champs_demandes(request):
+    """Champs demandés par ?fields=a,b,c (None si absent)."""
+    valeur = request.query_params.get('fields')
+    if not valeur:
+        return None
+    return [champ.strip() for champ in valeur.split(',') if champ.strip()]
+
+
+class SerialiseurValeurs:
+    """
+    Sérialisation en lecture seule à partir de queryset.values() :
+    ni instance de modèle ni champ DRF par ligne. `champs` associe le nom
+    exposé au lookup ORM ; ?fields= en sélectionne un sous-ensemble.
+    """
+    champs = {}
+
+    def __init__(self, fields=None):
+        if fields:
+            inconnus = set(fields) - set(self.champs)
+            if inconnus:
+                raise serializers.ValidationError(
+                    {"fields": f"Champs inconnus: {', '.join(sorted(inconnus))}"})
+        self.selection = {nom: self.champs[nom] for nom in (fields or self.champs)}
+
+    def serialiser(self, queryset):
+        lookups = list(self.selection.values())
+        lignes = queryset.values(*lookups)
+        if all(nom == lookup for nom, lookup in self.selection.items()):
+            return list(lignes)
+        paires = list(self.selection.items())
+        return [{nom: ligne[lookup] for nom, lookup in paires} for ligne in lignes]
+
+
+class RencontreValeursSerializer(SerialiseurValeurs):
+    champs = {
+        'id': 'id',
+        'tournoi': 'tournoi_id',
+        'nom': 'nom',
+        'date_heure': 'date_heure',
+        'duree': 'duree',
+        'score1': 'score1',
+        'score2': 'score2',
+        'statut': 'statut',
+        'equipe1': 'equipe1_id',
+        'equipe2': 'equipe2_id',
+        'arbitre': 'arbitre_id',
+        'terrain': 'terrain',
+        'version': 'version',
+    }
@@ -0,0 +1,298 @@
+# tournois/shards.py
+"""
+Partitionnement optionnel des données par organisateur.
+
+Activé en listant les alias de base dans settings.SHARDS, par exemple
+['default', 'shard1', 'shard2'] ; vide, tout reste dans 'default' et ce
+module n'a aucun effet.
+
+- Les tables globales (Utilisateur, profils, Paiement) restent dans
+  'default'. Les tables d'un tournoi (Tournoi, Rencontre, Equipe,
+  effectifs, inscriptions, instantanés, statistiques, ...) vont dans le
+  shard de leur organisateur.
+- Le shard d'un organisateur est attribué une fois pour toutes
+  (Organisateur.shard) : ajouter un shard ne déplace rien, et un gros
+  organisateur peut être placé à la main sur un shard dédié.
+- Les identifiants des tables partitionnées sont pris dans une plage
+  propre à chaque shard (le i-ème shard commence à i << 40, voir
+  manage.py preparer_shards) : un identifiant de tournoi, d'équipe ou
+  de rencontre suffit à retrouver son shard, sans annuaire.
+
+Le routeur choisit la base d'une requête, dans l'ordre :
+1. l'instance lue ou écrite (sa base, son organisateur ou l'identifiant
+   d'une de ses clés) ;
+2. le shard courant, fixé par `sur(alias)` ou par ShardMiddleware
+   d'après les paramètres de l'URL (tournoi_id, equipe_id, ...).
+Sans l'un ni l'autre, une requête sur une table partitionnée lève
+ShardIndetermine plutôt que de lire une base au hasard. Attention :
+Model.objects.create() choisit sa base avant de construire l'instance ;
+hors d'une vue, créer dans un bloc `pour_organisateur(...)`.
+
+Les transactions des modules de l'application portent sur `base()`, la
+base courante. Les lectures qui traversent les shards (toutes les
+rencontres d'un joueur, par exemple) passent par `rassembler`, qui
+interroge les shards en parallèle.
+
+Limites : les clés étrangères entre tables globales et partitionnées
+n'ont pas de contrainte en base, et une suppression en cascade depuis
+une table globale ne touche que la base 'default'.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import StreamingHttpResponse
+
+BITS_PLAGE = 40
+PARTITIONNES = {
+    'tournois.tournoi', 'tournois.rencontre', 'tournois.equipe',
+    'tournois.joueurequipe', 'tournois.inscription', 'tournois.placestournoi',
+    'tournois.formatmixte', 'tournois.exemption', 'tournois.instantanetournoi',
+    'tournois.statistiqueequipejour', 'tournois.statistiquejoueurjour',
+    'tournois.notification', 'tournois.tournoiarchive',
+    'tournois.rencontrearchive', 'tournois.changement',
+    'tournois.effectifrencontre', 'tournois.inscriptionarchive',
+    'tournois.placestournoiarchive', 'tournois.formatmixtearchive',
+    'tournois.exemptionarchive', 'tournois.notificationarchive',
+}
+# Clés qui désignent une ligne partitionnée, dans l'ordre de préférence
+CLES_PARTITIONNEES = ('tournoi_id', 'equipe_id', 'equipe1_id', 'rencontre_id')
+
+_courant = contextvars.ContextVar('shard_courant', default=None)
+_organisateurs = {}  # organisateur_id -> alias, attribution définitive
+_executeur = None
+
+
+class ShardIndetermine(Exception):
+    """Requête sur une table partitionnée sans shard déterminable."""
+
+
+def actif():
+    return bool(getattr(settings, 'SHARDS', None))
+
+
+def bases():
+    """Bases qui contiennent des données de tournoi."""
+    return list(settings.SHARDS) if actif() else [DEFAULT_DB_ALIAS]
+
+
+def base():
+    """Base courante : celle des transactions de l'application."""
+    return _courant.get() or DEFAULT_DB_ALIAS
+
+
+def disperse():
+    """Vrai si une lecture doit interroger tous les shards (aucun shard
+    courant)."""
+    return actif() and _courant.get() is None
+
+
+def separes(modele1, modele2):
+    """Vrai si les deux modèles peuvent être dans des bases différentes
+    (pas de jointure possible entre eux)."""
+    return actif() and (
+        (modele1._meta.label_lower in PARTITIONNES)
+        != (modele2._meta.label_lower in PARTITIONNES))
+
+
+# Attribution
+
+def debut_plage(alias):
+    return settings.SHARDS.index(alias) << BITS_PLAGE
+
+
+def shard_de_l_id(objet_id):
+    """Shard d'une ligne partitionnée, d'après son identifiant."""
+    if not actif():
+        return DEFAULT_DB_ALIAS
+    try:
+        return settings.SHARDS[int(objet_id) >> BITS_PLAGE]
+    except IndexError:
+        raise ShardIndetermine(f"Identifiant hors des plages: {objet_id}")
+
+
+def shard_de_l_organisateur(organisateur_id):
+    """Shard d'un organisateur, attribué au premier appel."""
+    if not actif():
+        return DEFAULT_DB_ALIAS
+    alias = _organisateurs.get(organisateur_id)
+    if alias is None:
+        from .models import Organisateur
+        alias = Organisateur.objects.using(DEFAULT_DB_ALIAS).filter(
+            pk=organisateur_id).values_list('shard', flat=True).first()
+        if not alias:
+            # Conditionnel : deux processus concurrents gardent le même choix
+            alias = settings.SHARDS[organisateur_id % len(settings.SHARDS)]
+            Organisateur.objects.using(DEFAULT_DB_ALIAS).filter(
+                pk=organisateur_id, shard='').update(shard=alias)
+            alias = Organisateur.objects.using(DEFAULT_DB_ALIAS).filter(
+                pk=organisateur_id).values_list('shard', flat=True).first() or alias
+        _organisateurs[organisateur_id] = alias
+    return alias
+
+
+@contextmanager
+def sur(alias):
+    """Fixe le shard courant le temps d'un bloc."""
+    jeton = _courant.set(alias)
+    try:
+        yield alias
+    finally:
+        _courant.reset(jeton)
+
+
+def pour_id(objet_id):
+    return sur(shard_de_l_id(objet_id))
+
+
+def pour_organisateur(organisateur_id):
+    return sur(shard_de_l_organisateur(organisateur_id))
+
+
+# Lecture sur plusieurs shards
+
+def _sur_shard(alias, fonction, args):
+    connections[alias].close_if_unusable_or_obsolete()
+    with sur(alias):
+        return fonction(*args)
+
+
+def rassembler(fonction, *args, aliases=None):
+    """Exécute fonction(*args) sur chaque shard, en parallèle ;
+    retourne la liste des résultats, dans l'ordre des shards."""
+    global _executeur
+    aliases = aliases or bases()
+    if len(aliases) == 1:
+        with sur(aliases[0]):
+            return [fonction(*args)]
+    if _executeur is None:
+        _executeur = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'SHARDS_THREADS', 8),
+            thread_name_prefix='shards')
+    return list(_executeur.map(
+        lambda alias: _sur_shard(alias, fonction, args), aliases))
+
+
+def rassembler_si_disperse(fonction, *args):
+    """Comme rassembler, mais sur la seule base courante s'il y a un
+    shard courant (ou pas de shards)."""
+    if disperse():
+        return rassembler(fonction, *args)
+    return [fonction(*args)]
+
+
+# Routeur
+
+def _shard_de_l_instance(instance):
+    if instance._state.db is not None:
+        return instance._state.db
+    organisateur_id = getattr(instance, 'organisateur_id', None)
+    if organisateur_id is not None:
+        return shard_de_l_organisateur(organisateur_id)
+    for cle in CLES_PARTITIONNEES + ('pk',):
+        valeur = getattr(instance, cle, None)
+        if valeur is not None:
+            return shard_de_l_id(valeur)
+    return None
+
+
+class RouteurShards:
+    def _base(self, model, **hints):
+        if not actif():
+            return None
+        if model._meta.label_lower not in PARTITIONNES:
+            # Sans cela, Django suivrait la base de l'instance liée
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._meta.label_lower in PARTITIONNES:
+            alias = _shard_de_l_instance(instance)
+            if alias is not None:
+                return alias
+        elif instance is not None and instance._meta.label_lower == (
+                'tournois.organisateur'):
+            # organisateur.equipe_set, organisateur.tournoi_set
+            return shard_de_l_organisateur(instance.pk)
+        alias = _courant.get()
+        if alias is None:
+            raise ShardIndetermine(
+                f"{model._meta.label} : aucun shard courant (voir shards.sur)")
+        return alias
+
+    db_for_read = _base
+    db_for_write = _base
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les identifiants sont uniques sur tous les shards
+        return True if actif() else None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not actif() or db == DEFAULT_DB_ALIAS:
+            return None
+        if db not in settings.SHARDS:
+            return None
+        return f'{app_label}.{model_name}' in PARTITIONNES
+
+
+# Middleware
+
+PARAMETRES_ID = {
+    'tournoi_id': shard_de_l_id, 'equipe_id': shard_de_l_id,
+    'rencontre_id': shard_de_l_id, 'inscription_id': shard_de_l_id,
+    'organisateur_id': shard_de_l_organisateur,
+}
+PARAMETRES_REQUETE = {
+    'tournoi': shard_de_l_id, 'equipe': shard_de_l_id,
+    'organisateur': shard_de_l_organisateur,
+}
+
+
+def shard_de_la_requete(view_kwargs, query_params):
+    for nom, trouver in PARAMETRES_ID.items():
+        if view_kwargs.get(nom) is not None:
+            return trouver(int(view_kwargs[nom]))
+    # Flux de calendrier : (type_flux, objet_id) décodé de son jeton
+    type_flux, objet_id = view_kwargs.get('flux') or (None, None)
+    if type_flux in ('tournoi', 'equipe'):
+        return shard_de_l_id(objet_id)
+    for nom, trouver in PARAMETRES_REQUETE.items():
+        valeur = query_params.get(nom, '')
+        if valeur.isdigit():
+            return trouver(int(valeur))
+    return None
+
+
+class ShardMiddleware:
+    """Fixe le shard courant d'après les paramètres de la vue."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._shard = None
+        try:
+            response = self.get_response(request)
+        finally:
+            jeton = getattr(request, '_jeton_shard', None)
+            if jeton is not None:
+                _courant.reset(jeton)
+        if request._shard and isinstance(response, StreamingHttpResponse):
+            # Le corps est produit après la sortie du middleware
+            response.streaming_content = self._dans_le_shard(
+                request._shard, response.streaming_content)
+        return response
+
+    @staticmethod
+    def _dans_le_shard(alias, contenu):
+        with sur(alias):
+            yield from contenu
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not actif():
+            return None
+        alias = shard_de_la_requete(view_kwargs, request.GET)
+        if alias is not None:
+            request._shard = alias
+            request._jeton_shard = _courant.set(alias)
+        return None
@@ -1,7 +1,24 @@
 # tournois/signals.py
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from .models import Utilisateur, Joueur, Organisateur, Administrateur, Arbitre
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from . import (
+    calendrier, changements, inscriptions, instantanes, recettes, shards,
+    statistiques, suisse,
+)
+from .models import (
+    Utilisateur, Joueur, Organisateur, Administrateur, Arbitre, Rencontre,
+    Tournoi, Equipe, JoueurEquipe, Paiement
+)
+
+# Champs relus avant chaque sauvegarde d'une rencontre
+CHAMPS_SUIVIS = statistiques.CHAMPS_ETAT + (
+    'nom', 'terrain', 'duree', 'arbitre_id')
+
+# Envoyé une fois par lot de scores saisis (voir scores.py), avec
+# rencontre_ids et tournoi_ids : point d'accroche pour l'avancement
+# des tableaux.
+scores_enregistres = Signal()
 
 
 @receiver(post_save, sender=Utilisateur)
@@ -29,3 +46,223 @@ def save_user_profile(sender, instance, **kwargs):
         instance.administrateur_profile.save()
     elif instance.role == 'arbitre' and hasattr(instance, 'arbitre_profile'):
         instance.arbitre_profile.save()
+
+
+@receiver(pre_save, sender=Rencontre)
+def memoriser_etat_rencontre(sender, instance, raw=False, **kwargs):
+    """Garde l'état enregistré pour calculer les deltas après la sauvegarde"""
+    if raw or statistiques.est_suspendu():
+        return
+    instance._etat_precedent = Rencontre.objects.filter(
+        pk=instance.pk).values(*CHAMPS_SUIVIS).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Rencontre)
+def maj_statistiques_rencontre(sender, instance, raw=False, **kwargs):
+    """Répercute la fin d'un match (ou sa correction) sur les statistiques"""
+    if raw or statistiques.est_suspendu():
+        return
+    avant = getattr(instance, '_etat_precedent', None)
+    statistiques.mettre_a_jour([(avant, statistiques.etat(instance))])
+
+
+@receiver(post_delete, sender=Rencontre)
+def retirer_statistiques_rencontre(sender, instance, **kwargs):
+    """Retire la contribution d'une rencontre supprimée"""
+    if statistiques.est_suspendu():
+        return
+    statistiques.mettre_a_jour([(statistiques.etat(instance), None)])
+
+
+# Instantanés des pages de tournoi : seule la section touchée est
+# reconstruite, après le commit.
+
+@receiver(post_save, sender=Tournoi)
+def instantane_tournoi(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        instantanes.marquer([instance.pk], ['tournoi'])
+
+
+@receiver(post_save, sender=Rencontre)
+@receiver(post_delete, sender=Rencontre)
+def instantane_rencontre(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    avant = getattr(instance, '_etat_precedent', None)
+    sections = ['rencontres']
+    # post_delete ne fournit pas 'created' : une suppression compte
+    # comme un changement d'équipes
+    if (kwargs.get('created', True) or avant is None
+            or (avant['equipe1_id'], avant['equipe2_id'])
+            != (instance.equipe1_id, instance.equipe2_id)):
+        sections.append('equipes')
+    tournoi_ids = {instance.tournoi_id}
+    if avant is not None:
+        tournoi_ids.add(avant['tournoi_id'])
+    instantanes.marquer(tournoi_ids, sections)
+
+
+@receiver(post_save, sender=Equipe)
+def instantane_equipe(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        instantanes.marquer(
+            instantanes.tournois_des_equipes([instance.pk]), ['equipes'])
+
+
+@receiver(post_save, sender=JoueurEquipe)
+@receiver(post_delete, sender=JoueurEquipe)
+def instantane_effectif(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instantanes.marquer(
+            instantanes.tournois_des_equipes([instance.equipe_id]), ['equipes'])
+
+
+@receiver(post_save, sender=Organisateur)
+def instantane_organisateur(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    for alias in shards.bases():
+        with shards.sur(alias):
+            instantanes.marquer(
+                Tournoi.objects.filter(organisateur=instance).values_list(
+                    'pk', flat=True), ['tournoi'])
+
+
+@receiver(post_save, sender=Utilisateur)
+def instantane_utilisateur(sender, instance, created, raw=False, **kwargs):
+    """Un changement de nom se répercute sur les pages qui l'affichent"""
+    if raw or created:
+        return
+    for alias in shards.bases():
+        with shards.sur(alias):
+            for section, tournoi_ids in instantanes.tournois_de_l_utilisateur(
+                    instance.pk).items():
+                instantanes.marquer(tournoi_ids, [section])
+
+
+# Calendriers : seuls les changements visibles dans un flux l'invalident.
+
+@receiver(post_save, sender=Rencontre)
+@receiver(post_delete, sender=Rencontre)
+def invalider_calendriers_rencontre(sender, instance, raw=False, using=None,
+                                    **kwargs):
+    if raw:
+        return
+    avant = getattr(instance, '_etat_precedent', None)
+    apres = {champ: getattr(instance, champ) for champ in CHAMPS_SUIVIS}
+    if not kwargs.get('created', True) and not calendrier.changement_visible(
+            avant, apres):
+        return
+    flux = calendrier.flux_de_rencontre(apres)
+    if avant is not None:
+        flux += calendrier.flux_de_rencontre(avant)
+    # Après le commit, sinon un lecteur concurrent remettrait en cache
+    # l'ancien contenu sous la nouvelle version
+    transaction.on_commit(lambda: calendrier.invalider(set(flux)), using=using)
+
+
+@receiver(post_save, sender=JoueurEquipe)
+@receiver(post_delete, sender=JoueurEquipe)
+def invalider_calendrier_joueur(sender, instance, raw=False, using=None,
+                                **kwargs):
+    if not raw:
+        transaction.on_commit(
+            lambda: calendrier.invalider([('joueur', instance.joueur_id)]),
+            using=using)
+
+
+# Format mixte : la ronde suivante est générée dès que la courante est
+# complète.
+
+@receiver(scores_enregistres)
+def avancer_format_mixte(sender, tournoi_ids, **kwargs):
+    suisse.avancer_tournois(tournoi_ids)
+
+
+@receiver(post_save, sender=Rencontre)
+def avancer_format_mixte_rencontre(sender, instance, raw=False, using=None,
+                                   **kwargs):
+    """Une rencontre du format mixte enregistrée une à une (admin,
+    API) fait aussi avancer son tournoi."""
+    if raw or not instance.phase or instance.statut in suisse.STATUTS_EN_ATTENTE:
+        return
+    avant = getattr(instance, '_etat_precedent', None)
+    if avant is not None and all(
+            avant[champ] == getattr(instance, champ)
+            for champ in ('statut', 'score1', 'score2')):
+        return
+    def avancer():
+        with shards.sur(using):
+            suisse.avancer_tournois([instance.tournoi_id])
+
+    # Après le commit, comme pour la saisie groupée
+    transaction.on_commit(avancer, using=using)
+
+
+# Recettes : chaque changement d'un paiement déplace sa contribution.
+
+@receiver(pre_save, sender=Paiement)
+def memoriser_etat_paiement(sender, instance, raw=False, **kwargs):
+    if raw or recettes.est_suspendu():
+        return
+    instance._etat_recettes = recettes.etat_en_base(
+        instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Paiement)
+def maj_recettes_paiement(sender, instance, raw=False, **kwargs):
+    if raw or recettes.est_suspendu():
+        return
+    avant = getattr(instance, '_etat_recettes', None)
+    recettes.mettre_a_jour([(avant, recettes.etat(instance))])
+
+
+@receiver(post_delete, sender=Paiement)
+def retirer_recettes_paiement(sender, instance, **kwargs):
+    if not recettes.est_suspendu():
+        recettes.mettre_a_jour([(recettes.etat(instance), None)])
+
+
+# Inscriptions : confirmées au paiement, annulées s'il est refusé.
+
+@receiver(post_save, sender=Tournoi)
+def creer_places_tournoi(sender, instance, created, raw=False, using=None,
+                         **kwargs):
+    """Compteur de places, tenu dès la création (voir inscriptions.py)"""
+    if created and not raw:
+        inscriptions.creer_compteurs([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Paiement)
+def maj_inscription_paiement(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    # Le paiement est global : son inscription peut être sur n'importe
+    # quel shard
+    for alias in shards.bases():
+        with shards.sur(alias):
+            inscriptions.paiement_modifie(instance.pk, instance.statut)
+
+
+# Journal des changements : écrit dans la transaction de la sauvegarde
+# (voir models.Journalise) ou de la suppression.
+
+@receiver(post_save, sender=Tournoi)
+@receiver(post_save, sender=Rencontre)
+@receiver(post_save, sender=Equipe)
+@receiver(post_save, sender=JoueurEquipe)
+@receiver(post_save, sender=Paiement)
+def journaliser_sauvegarde(sender, instance, created, raw=False, using=None,
+                           **kwargs):
+    if not raw:
+        changements.enregistrer('creation' if created else 'modification',
+                                [instance], using)
+
+
+@receiver(post_delete, sender=Tournoi)
+@receiver(post_delete, sender=Rencontre)
+@receiver(post_delete, sender=Equipe)
+@receiver(post_delete, sender=JoueurEquipe)
+@receiver(post_delete, sender=Paiement)
+def journaliser_suppression(sender, instance, using=None, **kwargs):
+    changements.enregistrer('suppression', [instance], using)
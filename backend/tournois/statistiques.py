@@ -0,0 +1,411 @@
+# tournois/statistiques.py
+"""
+Statistiques des équipes et des joueurs.
+
+Les résultats sont agrégés par jour dans StatistiqueEquipeJour et
+StatistiqueJoueurJour. Chaque changement d'une Rencontre retire la
+contribution de son ancien état et ajoute celle du nouvel état, ce qui
+couvre la fin d'un match, la correction d'un score et la suppression.
+Une requête sur une période se limite ainsi à sommer quelques lignes.
+Les rencontres archivées (voir archivage.py) continuent de compter.
+
+Un résultat est crédité aux joueurs de l'effectif de l'équipe quand la
+rencontre a compté pour la première fois (EffectifRencontre) : une
+correction de score ou un recalcul après un changement d'effectif
+touche les mêmes joueurs.
+"""
+import heapq
+import itertools
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import shards
+from .models import (
+    EffectifRencontre,
+    JoueurEquipe,
+    Rencontre,
+    RencontreArchive,
+    StatistiqueEquipeJour,
+    StatistiqueJoueurJour,
+)
+
+COMPTEURS = ('matchs_joues', 'victoires', 'nuls', 'defaites',
+             'buts_pour', 'buts_contre')
+CHAMPS_ETAT = ('id', 'tournoi_id', 'equipe1_id', 'equipe2_id',
+               'score1', 'score2', 'statut', 'date_heure')
+TAILLE_FORME = 5
+
+_local = threading.local()
+
+
+@contextmanager
+def suspendre():
+    """Désactive la mise à jour par signaux, par exemple pendant
+    l'archivage où les rencontres quittent la table sans changer
+    les résultats."""
+    precedent = est_suspendu()
+    _local.suspendu = True
+    try:
+        yield
+    finally:
+        _local.suspendu = precedent
+
+
+def est_suspendu():
+    return getattr(_local, 'suspendu', False)
+
+
+def etat(rencontre):
+    """Photographie des champs d'une rencontre utiles aux statistiques."""
+    return {champ: getattr(rencontre, champ) for champ in CHAMPS_ETAT}
+
+
+def etat_en_base(rencontre_id):
+    """État actuellement enregistré d'une rencontre (None si absente)."""
+    return Rencontre.objects.filter(pk=rencontre_id).values(*CHAMPS_ETAT).first()
+
+
+def jour_de(date_heure):
+    if timezone.is_aware(date_heure):
+        return timezone.localtime(date_heure).date()
+    return date_heure.date()
+
+
+def _resultat(pour, contre):
+    return {
+        'matchs_joues': 1,
+        'victoires': int(pour > contre),
+        'nuls': int(pour == contre),
+        'defaites': int(pour < contre),
+        'buts_pour': pour,
+        'buts_contre': contre,
+    }
+
+
+def contributions(etat_rencontre):
+    """Lignes (equipe_id, tournoi_id, jour) -> compteurs d'une rencontre.
+
+    Seules les rencontres terminées avec un score complet comptent.
+    """
+    if (not etat_rencontre or etat_rencontre['statut'] != 'termine'
+            or etat_rencontre['score1'] is None
+            or etat_rencontre['score2'] is None):
+        return {}
+    jour = jour_de(etat_rencontre['date_heure'])
+    tournoi_id = etat_rencontre['tournoi_id']
+    s1, s2 = etat_rencontre['score1'], etat_rencontre['score2']
+    return {
+        (etat_rencontre['equipe1_id'], tournoi_id, jour): _resultat(s1, s2),
+        (etat_rencontre['equipe2_id'], tournoi_id, jour): _resultat(s2, s1),
+    }
+
+
+def _cumuler(cible, cle, compteurs, signe=1):
+    ligne = cible[cle]
+    for champ in COMPTEURS:
+        ligne[champ] += signe * compteurs[champ]
+
+
+def _appliquer(modele, champ_id, deltas):
+    """Applique des deltas {(id, tournoi_id, jour): compteurs} à un modèle.
+
+    Les lignes manquantes ne sont créées que pour les clés qui reçoivent
+    une contribution positive : retirer un résultat d'une ligne déjà
+    supprimée (cascade sur un tournoi ou une équipe) ne fait rien.
+    Les clés qui partagent les mêmes deltas sont mises à jour en une
+    seule requête.
+    """
+    deltas = {cle: d for cle, d in deltas.items() if any(d.values())}
+    if not deltas:
+        return
+    a_creer = [
+        modele(**{champ_id: cle[0], 'tournoi_id': cle[1], 'jour': cle[2]})
+        for cle, d in deltas.items() if any(v > 0 for v in d.values())
+    ]
+    if a_creer:
+        modele.objects.bulk_create(a_creer, ignore_conflicts=True)
+
+    groupes = defaultdict(list)
+    for (objet_id, tournoi_id, jour), d in deltas.items():
+        signature = tuple(d[champ] for champ in COMPTEURS)
+        groupes[(tournoi_id, jour, signature)].append(objet_id)
+    for (tournoi_id, jour, signature), ids in groupes.items():
+        modele.objects.filter(
+            **{f'{champ_id}__in': ids}, tournoi_id=tournoi_id, jour=jour
+        ).update(**{
+            champ: F(champ) + valeur
+            for champ, valeur in zip(COMPTEURS, signature) if valeur
+        })
+
+
+def _membres_par_equipe(equipe_ids=None):
+    membres = defaultdict(list)
+    lignes = JoueurEquipe.objects.all()
+    if equipe_ids is not None:
+        lignes = lignes.filter(equipe_id__in=equipe_ids)
+    for equipe_id, joueur_id in lignes.values_list('equipe_id', 'joueur_id'):
+        membres[equipe_id].append(joueur_id)
+    return membres
+
+
+def _effectifs(paires):
+    """Joueurs crédités pour chaque couple (rencontre_id, equipe_id).
+
+    C'est l'effectif photographié quand la rencontre a compté pour la
+    première fois ; à défaut, l'effectif actuel, photographié à son tour.
+    """
+    effectifs = {}
+    lignes = EffectifRencontre.objects.filter(
+        rencontre_id__in={rencontre_id for rencontre_id, _ in paires}
+    ).values_list('rencontre_id', 'equipe_id', 'joueur_id')
+    for rencontre_id, equipe_id, joueur_id in lignes:
+        joueurs = effectifs.setdefault((rencontre_id, equipe_id), [])
+        if joueur_id is not None:
+            joueurs.append(joueur_id)
+    manquantes = set(paires) - set(effectifs)
+    if manquantes:
+        membres = _membres_par_equipe({equipe_id for _, equipe_id in manquantes})
+        photos = []
+        for rencontre_id, equipe_id in manquantes:
+            joueurs = effectifs[(rencontre_id, equipe_id)] = membres[equipe_id]
+            photos.extend(
+                EffectifRencontre(rencontre_id=rencontre_id,
+                                  equipe_id=equipe_id, joueur_id=joueur_id)
+                for joueur_id in joueurs or [None])
+        EffectifRencontre.objects.bulk_create(photos, ignore_conflicts=True)
+    return effectifs
+
+
+def _deltas_joueurs(transitions):
+    """Répercute les transitions sur les joueurs de l'effectif de chaque
+    rencontre (voir _effectifs)."""
+    lignes = []
+    for avant, apres in transitions:
+        for etat_rencontre, signe in ((avant, -1), (apres, 1)):
+            for (equipe_id, tournoi_id, jour), compteurs in contributions(
+                    etat_rencontre).items():
+                lignes.append(((etat_rencontre['id'], equipe_id),
+                               (tournoi_id, jour), compteurs, signe))
+    vide = dict.fromkeys(COMPTEURS, 0)
+    deltas = defaultdict(vide.copy)
+    effectifs = _effectifs({paire for paire, *_ in lignes})
+    for paire, (tournoi_id, jour), compteurs, signe in lignes:
+        for joueur_id in effectifs[paire]:
+            _cumuler(deltas, (joueur_id, tournoi_id, jour), compteurs, signe)
+    return deltas
+
+
+def mettre_a_jour(transitions):
+    """Met à jour les agrégats pour une liste de couples (avant, après).
+
+    Chaque élément est un état de rencontre (voir etat()) ou None pour
+    une création ou une suppression. Un lot de rencontres est traité en
+    un nombre de requêtes indépendant de sa taille.
+    """
+    supprimees = [avant['id'] for avant, apres in transitions
+                  if avant and apres is None]
+    transitions = [(avant, apres) for avant, apres in transitions
+                   if contributions(avant) != contributions(apres)]
+    vide = dict.fromkeys(COMPTEURS, 0)
+    deltas = defaultdict(vide.copy)
+    for avant, apres in transitions:
+        for cle, compteurs in contributions(avant).items():
+            _cumuler(deltas, cle, compteurs, -1)
+        for cle, compteurs in contributions(apres).items():
+            _cumuler(deltas, cle, compteurs)
+    if not transitions and not supprimees:
+        return
+    with transaction.atomic(using=shards.base()):
+        _appliquer(StatistiqueEquipeJour, 'equipe_id', deltas)
+        _appliquer(StatistiqueJoueurJour, 'joueur_id',
+                   _deltas_joueurs(transitions))
+        if supprimees:
+            EffectifRencontre.objects.filter(rencontre_id__in=supprimees).delete()
+
+
+# Lecture
+
+def _filtrer_periode(queryset, debut=None, fin=None, tournoi_id=None):
+    if debut:
+        queryset = queryset.filter(jour__gte=debut)
+    if fin:
+        queryset = queryset.filter(jour__lte=fin)
+    if tournoi_id:
+        queryset = queryset.filter(tournoi_id=tournoi_id)
+    return queryset
+
+
+def _sommes(queryset):
+    sommes = queryset.aggregate(**{champ: Sum(champ) for champ in COMPTEURS})
+    return {champ: sommes[champ] or 0 for champ in COMPTEURS}
+
+
+def _totaux(queryset):
+    return _avec_taux(_sommes(queryset))
+
+
+def _avec_taux(totaux):
+    joues = totaux['matchs_joues']
+    totaux['taux_victoire'] = round(
+        totaux['victoires'] / joues, 4) if joues else 0.0
+    return totaux
+
+
+def forme(equipe_ids, fin=None, tournoi_id=None, limite=TAILLE_FORME):
+    """Résultats ('V', 'N', 'D') des derniers matchs, du plus récent au
+    plus ancien, pour un ensemble d'équipes (celles d'un joueur)."""
+    return [resultat for _, resultat in _derniers_resultats(
+        equipe_ids, fin, tournoi_id, limite)]
+
+
+def _derniers_resultats(equipe_ids, fin, tournoi_id, limite):
+    """[(date_heure, résultat)] des derniers matchs, du plus récent au
+    plus ancien.
+
+    Une requête par côté pour profiter des index equipe1/equipe2 ;
+    l'archive n'est lue que si les tables chaudes ne suffisent pas.
+    """
+    equipe_ids = set(equipe_ids)
+    rencontres = []
+    for modele in (Rencontre, RencontreArchive):
+        if len(rencontres) >= limite:
+            break
+        for cote in ('equipe1', 'equipe2'):
+            queryset = modele.objects.filter(
+                **{f'{cote}_id__in': equipe_ids}, statut='termine',
+                score1__isnull=False, score2__isnull=False)
+            if fin:
+                queryset = queryset.filter(date_heure__date__lte=fin)
+            if tournoi_id:
+                queryset = queryset.filter(tournoi_id=tournoi_id)
+            rencontres.extend(queryset.order_by('-date_heure').values(
+                'id', 'date_heure', 'equipe1_id', 'score1', 'score2')[:limite])
+
+    uniques = {r['id']: r for r in rencontres}.values()
+    resultats = []
+    for r in sorted(uniques, key=lambda r: r['date_heure'], reverse=True)[:limite]:
+        pour, contre = r['score1'], r['score2']
+        if r['equipe1_id'] not in equipe_ids:
+            pour, contre = contre, pour
+        resultats.append((r['date_heure'], 'V' if pour > contre
+                          else 'N' if pour == contre else 'D'))
+    return resultats
+
+
+def statistiques_equipe(equipe_id, debut=None, fin=None, tournoi_id=None):
+    queryset = _filtrer_periode(
+        StatistiqueEquipeJour.objects.filter(equipe_id=equipe_id),
+        debut, fin, tournoi_id)
+    resultat = _totaux(queryset)
+    resultat['forme'] = forme([equipe_id], fin, tournoi_id)
+    return resultat
+
+
+def _joueur_sur_la_base(joueur_id, debut, fin, tournoi_id):
+    """Compteurs et derniers résultats d'un joueur dans la base courante."""
+    sommes = _sommes(_filtrer_periode(
+        StatistiqueJoueurJour.objects.filter(joueur_id=joueur_id),
+        debut, fin, tournoi_id))
+    equipe_ids = JoueurEquipe.objects.filter(
+        joueur_id=joueur_id).values_list('equipe_id', flat=True)
+    return sommes, _derniers_resultats(equipe_ids, fin, tournoi_id, TAILLE_FORME)
+
+
+def statistiques_joueur(joueur_id, debut=None, fin=None, tournoi_id=None):
+    """Un joueur peut jouer pour des organisateurs de shards différents :
+    sans shard courant, chaque shard est lu et les résultats fusionnés."""
+    parties = shards.rassembler_si_disperse(
+        _joueur_sur_la_base, joueur_id, debut, fin, tournoi_id)
+    resultat = _avec_taux({
+        champ: sum(sommes[champ] for sommes, _ in parties)
+        for champ in COMPTEURS})
+    derniers = heapq.merge(*(resultats for _, resultats in parties),
+                           key=itemgetter(0), reverse=True)
+    resultat['forme'] = [resultat_match for _, resultat_match
+                         in itertools.islice(derniers, TAILLE_FORME)]
+    return resultat
+
+
+# Contrôle de cohérence
+
+def recalculer():
+    """Recalcule les agrégats attendus à partir des rencontres, archivées
+    comprises.
+
+    Les joueurs crédités sont ceux de l'effectif photographié à la fin
+    de chaque rencontre, comme pour la mise à jour incrémentale.
+    """
+    effectifs = {}
+    lignes = EffectifRencontre.objects.values_list(
+        'rencontre_id', 'equipe_id', 'joueur_id')
+    for rencontre_id, equipe_id, joueur_id in lignes.iterator(chunk_size=2000):
+        joueurs = effectifs.setdefault((rencontre_id, equipe_id), [])
+        if joueur_id is not None:
+            joueurs.append(joueur_id)
+    # Rencontre jamais photographiée : _effectifs prendrait l'effectif actuel
+    membres = _membres_par_equipe()
+
+    vide = dict.fromkeys(COMPTEURS, 0)
+    equipes = defaultdict(vide.copy)
+    joueurs = defaultdict(vide.copy)
+    for modele in (Rencontre, RencontreArchive):
+        rencontres = modele.objects.filter(statut='termine').values(*CHAMPS_ETAT)
+        for etat_rencontre in rencontres.iterator(chunk_size=2000):
+            for cle, compteurs in contributions(etat_rencontre).items():
+                equipe_id, tournoi_id, jour = cle
+                _cumuler(equipes, cle, compteurs)
+                for joueur_id in effectifs.get(
+                        (etat_rencontre['id'], equipe_id), membres[equipe_id]):
+                    _cumuler(joueurs, (joueur_id, tournoi_id, jour), compteurs)
+    return dict(equipes), dict(joueurs)
+
+
+def _lignes_en_base(modele, champ_id):
+    lignes = modele.objects.values_list(champ_id, 'tournoi_id', 'jour', *COMPTEURS)
+    return {
+        tuple(ligne[:3]): dict(zip(COMPTEURS, ligne[3:]))
+        for ligne in lignes.iterator(chunk_size=2000)
+        if any(ligne[3:])
+    }
+
+
+def _ecarts(attendu, en_base):
+    cles = set(attendu) | set(en_base)
+    return sorted(
+        (cle, attendu.get(cle), en_base.get(cle))
+        for cle in cles if attendu.get(cle) != en_base.get(cle)
+    )
+
+
+def _reconstruire(modele, champ_id, attendu):
+    modele.objects.all().delete()
+    modele.objects.bulk_create(
+        (modele(**{champ_id: cle[0], 'tournoi_id': cle[1], 'jour': cle[2]},
+                **compteurs) for cle, compteurs in attendu.items()),
+        batch_size=1000)
+
+
+def verifier(corriger=False):
+    """Compare les agrégats avec un recalcul complet.
+
+    Retourne les écarts par table ; avec corriger=True les tables sont
+    reconstruites dans une transaction.
+    """
+    attendu_equipes, attendu_joueurs = recalculer()
+    ecarts = {
+        'equipes': _ecarts(attendu_equipes,
+                           _lignes_en_base(StatistiqueEquipeJour, 'equipe_id')),
+        'joueurs': _ecarts(attendu_joueurs,
+                           _lignes_en_base(StatistiqueJoueurJour, 'joueur_id')),
+    }
+    if corriger and (ecarts['equipes'] or ecarts['joueurs']):
+        with transaction.atomic(using=shards.base()):
+            _reconstruire(StatistiqueEquipeJour, 'equipe_id', attendu_equipes)
+            _reconstruire(StatistiqueJoueurJour, 'joueur_id', attendu_joueurs)
+    return ecarts
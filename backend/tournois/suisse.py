@@ -0,0 +1,352 @@
+# tournois/suisse.py
+"""
+Moteur du format 'mixte' : rondes suisses puis élimination directe.
+
+Phase suisse (système Monrad) : les équipes sont classées (points, puis
+Buchholz, différence de buts, buts marqués) et appariées dans l'ordre du
+classement, chacune avec la mieux classée qu'elle n'a pas encore
+rencontrée. Les rencontres déjà jouées sont lues une fois dans un index
+{équipe: adversaires}. Si la fin du classement ne peut plus être appariée
+sans revanche, une paire déjà formée est échangée au lieu de revenir en
+arrière. L'appariement est donc linéaire en pratique : quelques
+millisecondes pour 1000 équipes.
+
+Avec un nombre impair d'équipes, la moins bien classée qui n'a pas encore
+été exemptée reçoit une exemption, comptée comme une victoire.
+
+Après nb_rondes, les nb_qualifies premiers forment un tableau à
+élimination (1 contre N, 2 contre N-1, ...), dont chaque tour apparie les
+vainqueurs des rencontres voisines.
+
+Une rencontre annulée avec un score décisif (3-0 par exemple) est un
+forfait : l'équipe qui mène l'emporte. Annulée sans score décisif, elle
+n'a pas de vainqueur ; en élimination les deux équipes sont éliminées,
+et si un tour compte alors un nombre impair d'équipes, la mieux classée
+de la phase suisse passe directement au tour suivant. Un nul en
+élimination qualifie aussi la mieux classée.
+
+Chaque ronde est créée avec bulk_create. La ronde suivante est générée
+dès que la ronde courante est complète, sur le signal scores_enregistres
+(saisie groupée) ou après Rencontre.save() (voir signals.py).
+"""
+import math
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import calendrier, changements, instantanes, shards
+from .models import Equipe, Exemption, FormatMixte, Rencontre
+
+POINTS_VICTOIRE = 3
+POINTS_NUL = 1
+STATUTS_EN_ATTENTE = ('planifie', 'en_cours', 'reporte')
+
+
+# Classement
+
+def gagnant(equipe1, equipe2, score1, score2):
+    """Équipe qui mène au score, None à égalité ou sans score."""
+    if score1 is None or score2 is None or score1 == score2:
+        return None
+    return equipe1 if score1 > score2 else equipe2
+
+
+def _rencontres_suisses(tournoi_id):
+    return Rencontre.objects.filter(
+        tournoi_id=tournoi_id, phase='suisse').values_list(
+        'equipe1_id', 'equipe2_id', 'score1', 'score2', 'statut')
+
+
+def _index(tournoi_id, equipe_ids=()):
+    """(participants, adversaires, exemptes, stats) de la phase suisse."""
+    participants = dict.fromkeys(equipe_ids)
+    adversaires = {}
+    stats = {}
+
+    def ligne(equipe_id):
+        participants.setdefault(equipe_id)
+        return stats.setdefault(equipe_id, [0, 0, 0])  # points, pour, contre
+
+    for equipe1, equipe2, score1, score2, statut in _rencontres_suisses(
+            tournoi_id):
+        ligne1, ligne2 = ligne(equipe1), ligne(equipe2)
+        if statut == 'annule':
+            forfait = gagnant(equipe1, equipe2, score1, score2)
+            if forfait is not None:
+                adversaires.setdefault(equipe1, set()).add(equipe2)
+                adversaires.setdefault(equipe2, set()).add(equipe1)
+                ligne(forfait)[0] += POINTS_VICTOIRE
+            # Sans forfait, la rencontre n'a pas eu lieu
+            continue
+        adversaires.setdefault(equipe1, set()).add(equipe2)
+        adversaires.setdefault(equipe2, set()).add(equipe1)
+        if statut != 'termine' or score1 is None or score2 is None:
+            continue
+        ligne1[1] += score1
+        ligne1[2] += score2
+        ligne2[1] += score2
+        ligne2[2] += score1
+        if score1 > score2:
+            ligne1[0] += POINTS_VICTOIRE
+        elif score2 > score1:
+            ligne2[0] += POINTS_VICTOIRE
+        else:
+            ligne1[0] += POINTS_NUL
+            ligne2[0] += POINTS_NUL
+
+    exemptes = set()
+    for equipe_id in Exemption.objects.filter(
+            tournoi_id=tournoi_id).values_list('equipe_id', flat=True):
+        exemptes.add(equipe_id)
+        ligne(equipe_id)[0] += POINTS_VICTOIRE
+    for equipe_id in participants:
+        ligne(equipe_id)
+    return list(participants), adversaires, exemptes, stats
+
+
+def classer(participants, adversaires, stats):
+    """Identifiants des équipes, de la première à la dernière."""
+    def cle(equipe_id):
+        points, pour, contre = stats[equipe_id]
+        buchholz = sum(stats[a][0] for a in adversaires.get(equipe_id, ()))
+        return (-points, -buchholz, contre - pour, -pour)
+    # sorted est stable : à égalité, l'ordre initial (tête de série) est gardé
+    return sorted(participants, key=cle)
+
+
+def classement(tournoi_id):
+    """Classement de la phase suisse, pour affichage."""
+    participants, adversaires, exemptes, stats = _index(tournoi_id)
+    return [
+        {'rang': rang, 'equipe': equipe_id, 'points': stats[equipe_id][0],
+         'buts_pour': stats[equipe_id][1], 'buts_contre': stats[equipe_id][2],
+         'exemptee': equipe_id in exemptes}
+        for rang, equipe_id in enumerate(
+            classer(participants, adversaires, stats), start=1)
+    ]
+
+
+# Appariement
+
+def apparier(ordre, adversaires, exemptes=()):
+    """Apparie des équipes classées ; retourne (paires, exemptée ou None)."""
+    libres = list(ordre)
+    exemptee = None
+    if len(libres) % 2:
+        index = next((i for i in range(len(libres) - 1, -1, -1)
+                      if libres[i] not in exemptes), len(libres) - 1)
+        exemptee = libres.pop(index)
+
+    def deja_joue(a, b):
+        return b in adversaires.get(a, ())
+
+    paires = []
+    libres.reverse()  # pop() en fin de liste : la mieux classée
+    while libres:
+        haut = libres.pop()
+        index = next((i for i in range(len(libres) - 1, -1, -1)
+                      if not deja_joue(haut, libres[i])), None)
+        if index is not None:
+            paires.append((haut, libres.pop(index)))
+            continue
+        # Toutes les restantes ont déjà joué `haut` : échange avec une
+        # paire formée, en remontant depuis le bas du classement
+        voisine = libres.pop()
+        for position in range(len(paires) - 1, -1, -1):
+            a, b = paires[position]
+            if not deja_joue(haut, b) and not deja_joue(a, voisine):
+                paires[position] = (a, voisine)
+                paires.append((b, haut))
+                break
+            if not deja_joue(haut, a) and not deja_joue(b, voisine):
+                paires[position] = (a, haut)
+                paires.append((b, voisine))
+                break
+        else:
+            # Revanche inévitable (plus de rondes que d'adversaires)
+            paires.append((haut, voisine))
+    return paires, exemptee
+
+
+def ordre_tableau(taille):
+    """Têtes de série dans l'ordre du tableau : 1 et 2 ne se croisent
+    qu'en finale (ordre_tableau(4) == [1, 4, 2, 3])."""
+    ordre = [1]
+    while len(ordre) < taille:
+        n = 2 * len(ordre)
+        ordre = [s for tete in ordre for s in (tete, n + 1 - tete)]
+    return ordre
+
+
+# Création des rondes
+
+def _creer_ronde(tournoi_id, phase, ronde, paires, date_heure, exemptee=None):
+    noms = dict(Equipe.objects.filter(
+        pk__in={e for paire in paires for e in paire}).values_list('pk', 'nom'))
+    rencontres = Rencontre.objects.bulk_create([
+        Rencontre(tournoi_id=tournoi_id, equipe1_id=a, equipe2_id=b,
+                  nom=f"{noms[a]} vs {noms[b]}", date_heure=date_heure,
+                  phase=phase, ronde=ronde)
+        for a, b in paires
+    ], batch_size=1000)
+    if exemptee is not None:
+        Exemption.objects.create(
+            tournoi_id=tournoi_id, equipe_id=exemptee, ronde=ronde)
+    # bulk_create ne déclenche pas les signaux ; MySQL ne renvoie pas
+    # les identifiants créés
+    changements.enregistrer('creation', rencontres if all(
+        rencontre.pk for rencontre in rencontres) else Rencontre.objects.filter(
+        tournoi_id=tournoi_id, phase=phase, ronde=ronde), shards.base())
+    instantanes.marquer([tournoi_id], ['rencontres', 'equipes'])
+    flux = {('tournoi', tournoi_id)} | {
+        ('equipe', equipe_id) for paire in paires for equipe_id in paire}
+    transaction.on_commit(lambda: calendrier.invalider(flux),
+                          using=shards.base())
+    return rencontres
+
+
+def _ronde_suisse(format_mixte, date_heure, equipe_ids=()):
+    participants, adversaires, exemptes, stats = _index(
+        format_mixte.tournoi_id, equipe_ids)
+    paires, exemptee = apparier(
+        classer(participants, adversaires, stats), adversaires, exemptes)
+    return _creer_ronde(format_mixte.tournoi_id, 'suisse',
+                        format_mixte.ronde_courante, paires, date_heure,
+                        exemptee)
+
+
+def _premier_tour(format_mixte, date_heure):
+    participants, adversaires, _, stats = _index(format_mixte.tournoi_id)
+    qualifies = classer(participants, adversaires, stats)[
+        :format_mixte.nb_qualifies]
+    tetes = [qualifies[s - 1] for s in ordre_tableau(len(qualifies))]
+    return _creer_ronde(format_mixte.tournoi_id, 'elimination', 1,
+                        list(zip(tetes[::2], tetes[1::2])), date_heure)
+
+
+def _tour(en_lice, rang):
+    """(paires, équipe qualifiée d'office) d'un tour à élimination :
+    avec un nombre impair d'équipes, la mieux classée passe."""
+    qualifiee = min(en_lice, key=rang.get) if len(en_lice) % 2 else None
+    restantes = [equipe for equipe in en_lice if equipe != qualifiee]
+    return list(zip(restantes[::2], restantes[1::2])), qualifiee
+
+
+def _en_lice(tournoi_id, ronde_courante):
+    """Équipes encore en lice après le tour `ronde_courante`, dans
+    l'ordre du tableau ; None si un tour n'a pas de résultat."""
+    participants, adversaires, _, stats = _index(tournoi_id)
+    rang = {equipe: i for i, equipe in enumerate(
+        classer(participants, adversaires, stats))}
+    tours = {}
+    for ronde, *ligne in Rencontre.objects.filter(
+            tournoi_id=tournoi_id, phase='elimination',
+            ronde__lte=ronde_courante).order_by('pk').values_list(
+            'ronde', 'equipe1_id', 'equipe2_id', 'score1', 'score2', 'statut'):
+        tours.setdefault(ronde, {})[frozenset(ligne[:2])] = ligne
+
+    # Le premier tour est tel que créé : les têtes de série dans l'ordre
+    en_lice = [equipe for ligne in tours.get(1, {}).values()
+               for equipe in ligne[:2]]
+    for ronde in range(1, ronde_courante + 1):
+        paires, qualifiee = _tour(en_lice, rang)
+        vainqueurs = {qualifiee}
+        for paire in paires:
+            ligne = tours.get(ronde, {}).get(frozenset(paire))
+            if ligne is None or ligne[4] in STATUTS_EN_ATTENTE:
+                return None
+            equipe1, equipe2, score1, score2, statut = ligne
+            vainqueur = gagnant(equipe1, equipe2, score1, score2)
+            if vainqueur is None and statut == 'termine':
+                vainqueur = min((equipe1, equipe2), key=rang.get)
+            vainqueurs.add(vainqueur)
+        en_lice = [equipe for equipe in en_lice if equipe in vainqueurs]
+    return en_lice, rang
+
+
+def demarrer(tournoi, equipe_ids, nb_rondes=None, nb_qualifies=8,
+             date_heure=None, intervalle_rondes=None):
+    """Crée le format et la première ronde suisse ; l'ordre de
+    `equipe_ids` sert de tête de série. Lève ValidationError."""
+    equipe_ids = list(dict.fromkeys(equipe_ids))
+    n = len(equipe_ids)
+    if tournoi.type != 'mixte':
+        raise ValidationError("Le tournoi n'est pas au format mixte")
+    if n < 2:
+        raise ValidationError("Il faut au moins deux équipes")
+    if Equipe.objects.filter(pk__in=equipe_ids).count() != n:
+        raise ValidationError("Équipe inconnue")
+    if nb_rondes is None:
+        nb_rondes = max(1, math.ceil(math.log2(n)))
+    if not 1 <= nb_rondes < n:
+        raise ValidationError(
+            f"Le nombre de rondes doit être compris entre 1 et {n - 1}")
+    if nb_qualifies < 2 or nb_qualifies > n or nb_qualifies & (nb_qualifies - 1):
+        raise ValidationError(
+            "Le nombre de qualifiés doit être une puissance de 2 "
+            "inférieure ou égale au nombre d'équipes")
+
+    valeurs = {'nb_rondes': nb_rondes, 'nb_qualifies': nb_qualifies}
+    if intervalle_rondes is not None:
+        valeurs['intervalle_rondes'] = intervalle_rondes
+    with transaction.atomic(using=shards.base()):
+        format_mixte, cree = FormatMixte.objects.get_or_create(
+            tournoi=tournoi, defaults=valeurs)
+        if not cree:
+            raise ValidationError("Le format mixte a déjà démarré")
+        return format_mixte, _ronde_suisse(
+            format_mixte, date_heure or tournoi.date_debut, equipe_ids)
+
+
+def avancer(tournoi_id, date_heure=None):
+    """Génère la ronde suivante si la ronde courante est complète ;
+    retourne les rencontres créées (liste vide sinon)."""
+    with transaction.atomic(using=shards.base()):
+        format_mixte = FormatMixte.objects.select_for_update().filter(
+            tournoi_id=tournoi_id).first()
+        if format_mixte is None or format_mixte.phase == 'termine':
+            return []
+        courante = list(Rencontre.objects.filter(
+            tournoi_id=tournoi_id, phase=format_mixte.phase,
+            ronde=format_mixte.ronde_courante,
+        ).order_by('pk').values_list(
+            'equipe1_id', 'equipe2_id', 'score1', 'score2', 'statut',
+            'date_heure'))
+        if any(statut in STATUTS_EN_ATTENTE for *_, statut, _ in courante):
+            return []
+        if date_heure is None:
+            derniere = max((ligne[-1] for ligne in courante),
+                           default=timezone.now())
+            date_heure = derniere + format_mixte.intervalle_rondes
+
+        if format_mixte.phase == 'suisse':
+            if format_mixte.ronde_courante < format_mixte.nb_rondes:
+                format_mixte.ronde_courante += 1
+                rencontres = _ronde_suisse(format_mixte, date_heure)
+            else:
+                format_mixte.phase, format_mixte.ronde_courante = 'elimination', 1
+                rencontres = _premier_tour(format_mixte, date_heure)
+        else:
+            resultat = _en_lice(tournoi_id, format_mixte.ronde_courante)
+            if resultat is None:
+                return []
+            en_lice, rang = resultat
+            if len(en_lice) < 2:
+                format_mixte.phase = 'termine'
+                rencontres = []
+            else:
+                format_mixte.ronde_courante += 1
+                rencontres = _creer_ronde(
+                    tournoi_id, 'elimination', format_mixte.ronde_courante,
+                    _tour(en_lice, rang)[0], date_heure)
+        format_mixte.save(update_fields=['phase', 'ronde_courante'])
+        return rencontres
+
+
+def avancer_tournois(tournoi_ids):
+    """Fait avancer les tournois mixtes parmi `tournoi_ids`."""
+    for tournoi_id in FormatMixte.objects.filter(
+            tournoi_id__in=tournoi_ids).exclude(phase='termine').values_list(
+            'tournoi_id', flat=True):
+        avancer(tournoi_id)
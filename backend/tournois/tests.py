@@ -1,3 +1,1462 @@
-from django.test import TestCase
+import io
+import json
+import marshal
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteWrapper
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings,
+)
+from django.urls import URLResolver, path, reverse
+from django.urls.resolvers import RegexPattern
+from django.utils.module_loading import import_string
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from backend import views as vues_backend
+
+from . import (
+    archivage, bench, calendrier, changements, connexions, inclusions, inscriptions,
+    instantanes, mots_de_passe, notifications, profilage, recettes, renderers, shards,
+    statistiques, suisse,
+)
+from .connexions.sqlite3.base import DatabaseWrapper as WrapperPoole
+from .demarrage import vue
+from .models import (
+    Arbitre, Changement, Equipe, Exemption, ExemptionArchive, FormatMixte,
+    FormatMixteArchive, Inscription, InscriptionArchive, InstantaneTournoi,
+    Joueur, JoueurEquipe,
+    Notification, NotificationArchive, Organisateur, Paiement, PlacesTournoi,
+    PlacesTournoiArchive, RecettesJour, Rencontre, RencontreArchive,
+    StatistiqueJoueurJour, Tournoi, TournoiArchive, Utilisateur,
+)
+from .serializers import RencontreValeursSerializer
+
+
+def creer_utilisateur(role, nom):
+    """Utilisateur et son profil (créé par les signaux)."""
+    return Utilisateur.objects.create(
+        nom=nom, email=f'{nom}@test.local', motDePasse='secret', role=role)
+
+
+def creer_tournoi(organisateur, nom='Coupe', **champs):
+    debut = timezone.now()
+    return Tournoi.objects.create(
+        nom=nom, description='', type=champs.pop('type', 'elimination'),
+        date_debut=debut, date_fin=debut + timedelta(days=2),
+        organisateur=organisateur, **champs)
+
+
+def creer_equipe(organisateur, nom, joueurs=()):
+    equipe = Equipe.objects.create(nom=nom, organisateur=organisateur)
+    for joueur in joueurs:
+        JoueurEquipe.objects.create(joueur=joueur, equipe=equipe)
+    return equipe
+
+
+# Hachage minimal : les tests créent beaucoup d'utilisateurs
+@override_settings(HACHAGE_PBKDF2_ITERATIONS=1)
+class DonneesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organisateur = Organisateur.objects.get(
+            utilisateur=creer_utilisateur('organisateur', 'orga'))
+        cls.joueurs = [
+            Joueur.objects.get(utilisateur=creer_utilisateur('joueur', f'j{i}'))
+            for i in range(4)]
+        cls.tournoi = creer_tournoi(cls.organisateur)
+        cls.equipe1 = creer_equipe(cls.organisateur, 'Rouges', cls.joueurs[:2])
+        cls.equipe2 = creer_equipe(cls.organisateur, 'Bleus', cls.joueurs[2:])
+
+    def client_de(self, utilisateur):
+        client = APIClient()
+        client.force_authenticate(user=utilisateur)
+        return client
+
+    def creer_rencontre(self, **champs):
+        return Rencontre.objects.create(
+            tournoi=self.tournoi, equipe1=self.equipe1, equipe2=self.equipe2,
+            date_heure=champs.pop('date_heure', timezone.now()), **champs)
+
+
+class StatistiquesTests(DonneesTestCase):
+    def _matchs_joues(self, joueur):
+        return sum(StatistiqueJoueurJour.objects.filter(
+            joueur=joueur).values_list('matchs_joues', flat=True))
+
+    def test_verifier_apres_changement_effectif(self):
+        rencontre = self.creer_rencontre(statut='termine', score1=2, score2=1)
+        nouveau = Joueur.objects.get(
+            utilisateur=creer_utilisateur('joueur', 'nouveau'))
+        JoueurEquipe.objects.filter(joueur=self.joueurs[0]).delete()
+        JoueurEquipe.objects.create(joueur=nouveau, equipe=self.equipe1)
+
+        self.assertEqual(statistiques.verifier(),
+                         {'equipes': [], 'joueurs': []})
+
+        # Une correction de score touche les joueurs crédités à la fin
+        rencontre.score2 = 3
+        rencontre.save()
+        self.assertEqual(statistiques.verifier(),
+                         {'equipes': [], 'joueurs': []})
+        self.assertEqual(self._matchs_joues(self.joueurs[0]), 1)
+        self.assertEqual(self._matchs_joues(nouveau), 0)
+
+    def test_suppression_retire_les_joueurs_credites(self):
+        rencontre = self.creer_rencontre(statut='termine', score1=0, score2=0)
+        JoueurEquipe.objects.filter(joueur=self.joueurs[2]).delete()
+        rencontre.delete()
+        self.assertEqual(self._matchs_joues(self.joueurs[2]), 0)
+        self.assertEqual(statistiques.verifier(),
+                         {'equipes': [], 'joueurs': []})
+
+
+class RecettesTests(DonneesTestCase):
+    def _payer(self, montant, methode='carte', **champs):
+        return Paiement.objects.create(
+            joueur=self.joueurs[0], montant=Decimal(montant), methode=methode,
+            tournoi_id=champs.pop('tournoi_id', self.tournoi.pk),
+            organisateur_id=self.organisateur.pk, **champs)
+
+    def _ligne(self, paiement, statut):
+        return (self.organisateur.pk, paiement.tournoi_id,
+                statistiques.jour_de(paiement.date_paiement),
+                paiement.methode, statut)
+
+    def test_deltas_des_paiements(self):
+        paiement = self._payer('20')
+        self.assertEqual(recettes._lignes_en_base(), {
+            self._ligne(paiement, 'en_attente'): (1, Decimal(20))})
+
+        paiement.statut = 'paye'
+        paiement.save()
+        autre = self._payer('30', statut='paye')
+        self.assertEqual(recettes._lignes_en_base(), {
+            self._ligne(paiement, 'paye'): (2, Decimal(50))})
+
+        # Remboursement partiel : le montant change avec le statut
+        paiement.statut = 'rembourse'
+        paiement.montant = Decimal('12.50')
+        paiement.save()
+        self.assertEqual(recettes._lignes_en_base(), {
+            self._ligne(paiement, 'paye'): (1, Decimal(30)),
+            self._ligne(paiement, 'rembourse'): (1, Decimal('12.50'))})
+
+        paiement.delete()
+        self.assertEqual(recettes._lignes_en_base(), {
+            self._ligne(autre, 'paye'): (1, Decimal(30))})
+        self.assertEqual(recettes.verifier(), [])
+        self.assertEqual(recettes.recettes(par=['methode']),
+                         recettes.balayage(par=['methode']))
+
+    def test_verifier_corrige(self):
+        paiement = self._payer('20', statut='paye')
+        with recettes.suspendre():
+            oublie = self._payer('15', methode='especes', statut='paye')
+        RecettesJour.objects.update(nombre=F('nombre') + 1)
+
+        ecarts = recettes.verifier()
+        self.assertEqual(ecarts, sorted([
+            (self._ligne(paiement, 'paye'), (1, Decimal(20)), (2, Decimal(20))),
+            (self._ligne(oublie, 'paye'), (1, Decimal(15)), None),
+        ]))
+        self.assertEqual(recettes.verifier(corriger=True), ecarts)
+        self.assertEqual(recettes.verifier(), [])
+        self.assertEqual(recettes.recettes()['totaux']['recettes'], Decimal(35))
+
+    def test_regroupement_par_l_api(self):
+        autre_tournoi = creer_tournoi(self.organisateur, nom='Trophée')
+        self._payer('20', statut='paye')
+        self._payer('10', statut='rembourse')
+        self._payer('5', statut='refuse')
+        self._payer('30', methode='virement', statut='paye',
+                    tournoi_id=autre_tournoi.pk)
+        url = reverse('recettes')
+        self.assertEqual(self.client_de(self.organisateur.utilisateur).get(
+            url).status_code, 403)
+        client = self.client_de(creer_utilisateur('administrateur', 'admin'))
+
+        reponse = client.get(url, {'par': 'methode'})
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.data['totaux']['recettes'], Decimal(50))
+        carte, virement = reponse.data['lignes']
+        self.assertEqual((carte['methode'], carte['recettes']),
+                         ('carte', Decimal(20)))
+        self.assertEqual((carte['taux_remboursement'], carte['taux_refus']),
+                         (0.5, 0.3333))
+        self.assertEqual((virement['methode'], virement['recettes'],
+                          virement['taux_remboursement']),
+                         ('virement', Decimal(30), 0.0))
+
+        reponse = client.get(url, {'par': 'tournoi,methode',
+                                   'tournoi': autre_tournoi.pk})
+        self.assertEqual(
+            [(ligne['tournoi'], ligne['methode'], ligne['recettes'])
+             for ligne in reponse.data['lignes']],
+            [(autre_tournoi.pk, 'virement', Decimal(30))])
+        self.assertEqual(reponse.data, recettes.balayage(
+            tournoi_id=autre_tournoi.pk, par=['tournoi', 'methode']))
+
+        reponse = client.get(url, {'par': 'joueur'})
+        self.assertEqual(reponse.status_code, 400)
+        self.assertIn('joueur', reponse.data['error'])
+
+
+class InstantanesTests(DonneesTestCase):
+    def setUp(self):
+        self.arbitre = Arbitre.objects.get(
+            utilisateur=creer_utilisateur('arbitre', 'arbitre'))
+        # Vide aussi ce que setUpTestData a marqué : ses rappels
+        # on_commit ne sont jamais exécutés
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rencontre = self.creer_rencontre(arbitre=self.arbitre)
+        instantanes.lire(self.tournoi.pk)
+
+    def _document(self):
+        return InstantaneTournoi.objects.get(tournoi=self.tournoi).document
+
+    def _sections_reconstruites(self, modification):
+        """Sections reconstruites par `modification`, après le commit
+        seulement."""
+        constructeurs = {
+            section: mock.Mock(wraps=constructeur)
+            for section, constructeur in instantanes._CONSTRUCTEURS.items()}
+        with mock.patch.dict(instantanes._CONSTRUCTEURS, constructeurs):
+            with self.captureOnCommitCallbacks(execute=True):
+                modification()
+                self.assertFalse(any(c.called for c in constructeurs.values()))
+        for constructeur in constructeurs.values():
+            self.assertLessEqual(constructeur.call_count, 1)
+        return {section for section, constructeur in constructeurs.items()
+                if constructeur.called}
+
+    def test_seule_la_section_touchee(self):
+        def score():
+            # Plusieurs changements dans la transaction : une reconstruction
+            for score1 in (1, 2, 3):
+                self.rencontre.score1 = score1
+                self.rencontre.save()
+        self.assertEqual(self._sections_reconstruites(score), {'rencontres'})
+        self.assertEqual(self._document()['rencontres'][0]['score1'], 3)
+
+        self.equipe1.nom = 'Grenats'
+        self.assertEqual(self._sections_reconstruites(self.equipe1.save),
+                         {'equipes'})
+        self.assertEqual(
+            self._document()['equipes'][str(self.equipe1.pk)]['nom'], 'Grenats')
+
+        self.tournoi.nom = 'Coupe d\'hiver'
+        self.assertEqual(self._sections_reconstruites(self.tournoi.save),
+                         {'tournoi'})
+        self.assertEqual(self._document()['tournoi']['nom'], 'Coupe d\'hiver')
+
+        nouveau = Joueur.objects.get(
+            utilisateur=creer_utilisateur('joueur', 'nouveau'))
+        self.assertEqual(self._sections_reconstruites(
+            lambda: JoueurEquipe.objects.create(
+                joueur=nouveau, equipe=self.equipe2)), {'equipes'})
+        self.assertEqual(
+            len(self._document()['equipes'][str(self.equipe2.pk)]['effectif']), 3)
+
+    def test_renommages(self):
+        organisateur = self.organisateur.utilisateur
+        organisateur.nom = 'Organisatrice'
+        self.assertEqual(self._sections_reconstruites(organisateur.save),
+                         {'tournoi'})
+        self.organisateur.nom_organisation = 'Club'
+        self.assertEqual(self._sections_reconstruites(self.organisateur.save),
+                         {'tournoi'})
+
+        arbitre = self.arbitre.utilisateur
+        arbitre.nom = 'Sifflet'
+        self.assertEqual(self._sections_reconstruites(arbitre.save),
+                         {'rencontres'})
+
+        joueur = self.joueurs[0].utilisateur
+        joueur.nom = 'Buteur'
+        self.assertEqual(self._sections_reconstruites(joueur.save), {'equipes'})
+
+        document = self._document()
+        self.assertEqual(document['tournoi']['organisateur']['nom'],
+                         'Organisatrice')
+        self.assertEqual(
+            document['tournoi']['organisateur']['nom_organisation'], 'Club')
+        self.assertEqual(document['rencontres'][0]['arbitre']['nom'], 'Sifflet')
+        self.assertEqual(
+            document['equipes'][str(self.equipe1.pk)]['effectif'][0]['nom'],
+            'Buteur')
+
+        # Utilisateur absent des pages : rien n'est reconstruit
+        autre = creer_utilisateur('joueur', 'spectateur')
+        autre.nom = 'Spectatrice'
+        self.assertEqual(self._sections_reconstruites(autre.save), set())
+
+
+class ArchivageTests(DonneesTestCase):
+    def test_aucune_ligne_perdue(self):
+        rencontre = self.creer_rencontre(statut='termine', score1=1, score2=0)
+        Notification.objects.create(
+            utilisateur=self.joueurs[0].utilisateur, rencontre=rencontre,
+            type='rappel_1h', cle=f'rappel_1h:{rencontre.pk}', message='...')
+        PlacesTournoi.objects.filter(tournoi=self.tournoi).update(capacite=8, occupees=2)
+        FormatMixte.objects.create(tournoi=self.tournoi, nb_rondes=3)
+        Exemption.objects.create(tournoi=self.tournoi, equipe=self.equipe1, ronde=1)
+        for equipe in (self.equipe1, self.equipe2):
+            Inscription.objects.create(tournoi=self.tournoi, equipe=equipe)
+        paires = [(Tournoi, TournoiArchive), (Rencontre, RencontreArchive),
+                  (Notification, NotificationArchive),
+                  (Inscription, InscriptionArchive),
+                  (PlacesTournoi, PlacesTournoiArchive),
+                  (FormatMixte, FormatMixteArchive),
+                  (Exemption, ExemptionArchive)]
+        avant = {source: source.objects.count() for source, _ in paires}
+
+        self.assertEqual(archivage.archiver_tournoi(self.tournoi.pk, taille_lot=1), 1)
+
+        for source, archive in paires:
+            with self.subTest(source.__name__):
+                self.assertEqual(source.objects.count(), 0)
+                self.assertEqual(archive.objects.count(), avant[source])
+        self.assertEqual(
+            PlacesTournoiArchive.objects.get(tournoi_id=self.tournoi.pk).occupees, 2)
+
+    def test_champs_de_la_rencontre_conserves(self):
+        rencontre = self.creer_rencontre(statut='termine', score1=1, score2=0,
+                                         phase='suisse', ronde=2)
+        rencontre.save()  # version 1
+        archivage.archiver_tournoi(self.tournoi.pk)
+        archivee = RencontreArchive.objects.get(pk=rencontre.pk)
+        self.assertEqual((archivee.phase, archivee.ronde, archivee.version),
+                         ('suisse', 2, 1))
+
+    def test_journal_archivage(self):
+        rencontre = self.creer_rencontre(statut='termine', score1=1, score2=0)
+        depuis = Changement.objects.order_by('sequence').last().sequence
+        archivage.archiver_tournoi(self.tournoi.pk, taille_lot=1)
+        self.assertEqual(
+            sorted(Changement.objects.filter(sequence__gt=depuis).values_list(
+                'modele', 'objet_id', 'operation', 'donnees')),
+            [('rencontre', rencontre.pk, 'archivage', None),
+             ('tournoi', self.tournoi.pk, 'archivage', None)])
+
+
+class SaisieScoresTests(DonneesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.arbitre = creer_utilisateur('arbitre', 'arbitre')
+
+    def setUp(self):
+        self.rencontre = self.creer_rencontre(arbitre_id=self.arbitre.pk)
+        self.url = reverse('saisie-scores')
+
+    def _saisie(self, **champs):
+        return {'id': self.rencontre.pk, 'version': self.rencontre.version,
+                'score1': 2, 'score2': 1, 'statut': 'termine', **champs}
+
+    def test_reserve_aux_arbitres(self):
+        reponse = self.client_de(self.joueurs[0].utilisateur).post(
+            self.url, {'rencontres': [self._saisie()]}, format='json')
+        self.assertEqual(reponse.status_code, 403)
+        self.rencontre.refresh_from_db()
+        self.assertIsNone(self.rencontre.score1)
+
+    def test_saisie(self):
+        reponse = self.client_de(self.arbitre).post(
+            self.url, {'rencontres': [self._saisie()]}, format='json')
+        self.assertEqual(reponse.status_code, 200)
+        self.rencontre.refresh_from_db()
+        self.assertEqual((self.rencontre.score1, self.rencontre.statut),
+                         (2, 'termine'))
+
+    def test_rencontre_d_un_autre_arbitre(self):
+        autre = creer_utilisateur('arbitre', 'autre-arbitre')
+        reponse = self.client_de(autre).post(
+            self.url, {'rencontres': [self._saisie()]}, format='json')
+        self.assertEqual(reponse.status_code, 403)
+        self.rencontre.refresh_from_db()
+        self.assertEqual(self.rencontre.version, 0)
+
+        # Un administrateur saisit n'importe quelle rencontre
+        admin = creer_utilisateur('administrateur', 'admin')
+        reponse = self.client_de(admin).post(
+            self.url, {'rencontres': [self._saisie()]}, format='json')
+        self.assertEqual(reponse.status_code, 200)
+
+    def test_rencontre_introuvable(self):
+        reponse = self.client_de(self.arbitre).post(
+            self.url, {'rencontres': [self._saisie(),
+                                      self._saisie(id=self.rencontre.pk + 100)]},
+            format='json')
+        self.assertEqual(reponse.status_code, 404)
+        self.assertEqual(reponse.data['rencontres'], [self.rencontre.pk + 100])
+        self.rencontre.refresh_from_db()
+        self.assertIsNone(self.rencontre.score1)
+
+    def test_corps_invalide(self):
+        client = self.client_de(self.arbitre)
+        for corps in ([self._saisie()],
+                      {'rencontres': [self._saisie(id=True)]},
+                      {'rencontres': [self._saisie(version=False)]}):
+            with self.subTest(corps=corps):
+                reponse = client.post(self.url, corps, format='json')
+                self.assertEqual(reponse.status_code, 400)
+
+
+class InclusionsTests(DonneesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        arbitre = Arbitre.objects.get(
+            utilisateur=creer_utilisateur('arbitre', 'arbitre'))
+        autre = creer_equipe(cls.organisateur, 'Verts', cls.joueurs[1:3])
+        for equipe1, equipe2 in ((cls.equipe1, cls.equipe2),
+                                 (cls.equipe2, autre), (autre, cls.equipe1)):
+            Rencontre.objects.create(
+                tournoi=cls.tournoi, equipe1=equipe1, equipe2=equipe2,
+                arbitre=arbitre, date_heure=timezone.now())
+
+    def _lire(self, modele, include):
+        plan = inclusions.planifier(modele, include)
+        with self.assertNumQueries(plan.nb_requetes_max):
+            lignes = [inclusions.serialiser(objet, plan.arbre)
+                      for objet in plan.appliquer(modele.objects.all())]
+        self.assertEqual(len(lignes), modele.objects.count())
+        return lignes
+
+    def test_chaque_inclusion_autorisee(self):
+        for modele, chemins in inclusions.INCLUSIONS_AUTORISEES.items():
+            for chemin in sorted(chemins):
+                with self.subTest(modele=modele.__name__, include=chemin):
+                    self._lire(modele, chemin)
+
+    def test_toutes_les_inclusions(self):
+        for modele, chemins in inclusions.INCLUSIONS_AUTORISEES.items():
+            with self.subTest(modele=modele.__name__):
+                self._lire(modele, ','.join(chemins))
+        equipe = self._lire(Equipe, 'joueurequipe_set.joueur.utilisateur')[0]
+        utilisateur = equipe['joueurequipe_set'][0]['joueur']['utilisateur']
+        self.assertNotIn('motDePasse', utilisateur)
+
+    def test_profondeur_maximale(self):
+        chemin = '.'.join(['tournoi'] * (inclusions.PROFONDEUR_MAX + 1))
+        with self.assertRaisesMessage(inclusions.InclusionInvalide,
+                                      'profondeur maximale'):
+            inclusions.planifier(Rencontre, chemin)
+
+    def test_inclusion_non_autorisee(self):
+        for modele, chemin in ((Rencontre, 'equipe1.joueurequipe_set'),
+                               (Rencontre, 'tournoi.rencontre_set'),
+                               (Equipe, 'rencontres_equipe1')):
+            with self.subTest(include=chemin):
+                with self.assertRaisesMessage(inclusions.InclusionInvalide,
+                                              'non autorisée'):
+                    inclusions.planifier(modele, chemin)
+
+    def test_refus_par_les_vues(self):
+        client = self.client_de(self.organisateur.utilisateur)
+        for url, include in ((reverse('rencontres'), 'equipe1.joueurequipe_set'),
+                             (reverse('equipes'), 'a.b.c.d')):
+            with self.subTest(url=url):
+                reponse = client.get(url, {'include': include})
+                self.assertEqual(reponse.status_code, 400)
+                self.assertIn('include', reponse.json())
+
+
+class SerialisationTests(DonneesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        debut = timezone.now().replace(microsecond=123456)
+        for i in range(3):
+            Rencontre.objects.create(
+                tournoi=cls.tournoi, equipe1=cls.equipe1, equipe2=cls.equipe2,
+                date_heure=debut + timedelta(hours=i), duree=90)
+
+    def setUp(self):
+        self.client = self.client_de(self.organisateur.utilisateur)
+
+    def test_selection_des_champs(self):
+        reponse = self.client.get(reverse('rencontres'), {'fields': 'id, statut'})
+        self.assertEqual(reponse.status_code, 200)
+        lignes = reponse.json()
+        self.assertEqual(len(lignes), 3)
+        for ligne in lignes:
+            self.assertEqual(set(ligne), {'id', 'statut'})
+
+    def test_champ_inconnu(self):
+        reponse = self.client.get(reverse('rencontres'),
+                                  {'fields': 'id,inconnu,motDePasse'})
+        self.assertEqual(reponse.status_code, 400)
+        self.assertIn('inconnu, motDePasse', reponse.json()['fields'])
+
+    def test_json_identique_a_drf(self):
+        reponse = self.client.get(reverse('rencontres'))
+        self.assertEqual(reponse.status_code, 200)
+        lignes = reponse.json()
+        self.assertTrue(lignes[0]['date_heure'].endswith('.123456Z'))
+        self.assertEqual(lignes[0]['duree'], 90)
+        self.assertEqual(set(lignes[0]), set(RencontreValeursSerializer.champs))
+        donnees = RencontreValeursSerializer().serialiser(
+            Rencontre.objects.order_by('date_heure', 'pk'))
+        if renderers.orjson is not None:
+            self.assertEqual(renderers.ORJSONRenderer().render(donnees),
+                             JSONRenderer().render(donnees))
+
+    @skipIf(renderers.msgpack is None, "msgpack n'est pas installé")
+    def test_messagepack(self):
+        attendu = self.client.get(reverse('rencontres'), {'fields': 'id,date_heure'})
+        reponse = self.client.get(reverse('rencontres'), {'fields': 'id,date_heure'},
+                                  HTTP_ACCEPT='application/x-msgpack')
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse['Content-Type'], 'application/x-msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(reponse.content), attendu.json())
+
+
+class LoginTests(DonneesTestCase):
+    def _connexion(self, corps):
+        requete = RequestFactory().post(
+            '/api/login/', corps, content_type='application/json')
+        return vues_backend.login(requete)
+
+    def test_corps_invalide(self):
+        for corps in ('{"email": ', '[]', b'\xff'):
+            with self.subTest(corps=corps):
+                self.assertEqual(self._connexion(corps).status_code, 400)
+
+    def test_connexion(self):
+        email = self.organisateur.utilisateur.email
+        reponse = self._connexion({'email': email, 'password': 'secret'})
+        self.assertEqual(reponse.status_code, 200)
+        # Vue DRF sans authentification par session : pas de CSRF
+        self.assertTrue(vues_backend.login.csrf_exempt)
+        jeton = AccessToken(reponse.data['access'])
+        self.assertEqual(jeton['user_id'], str(self.organisateur.pk))
+        self.assertEqual(RefreshToken(reponse.data['refresh'])['user_id'],
+                         str(self.organisateur.pk))
+        reponse = self._connexion({'email': email, 'password': 'faux'})
+        self.assertEqual(reponse.status_code, 401)
+
+    def _rafraichissement(self, corps):
+        requete = RequestFactory().post(
+            '/api/token/refresh/', corps, content_type='application/json')
+        return vues_backend.refresh(requete)
+
+    def test_rafraichissement(self):
+        email = self.organisateur.utilisateur.email
+        refresh = self._connexion(
+            {'email': email, 'password': 'secret'}).data['refresh']
+        reponse = self._rafraichissement({'refresh': refresh})
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(AccessToken(reponse.data['access'])['user_id'],
+                         str(self.organisateur.pk))
+        self.assertTrue(vues_backend.refresh.csrf_exempt)
+
+        for corps, statut in (({}, 400), ([], 400), ({'refresh': ''}, 400),
+                              ({'refresh': reponse.data['access']}, 401),
+                              ({'refresh': refresh[:-2]}, 401)):
+            with self.subTest(corps=corps):
+                self.assertEqual(
+                    self._rafraichissement(corps).status_code, statut)
+        self.organisateur.utilisateur.delete()
+        self.assertEqual(
+            self._rafraichissement({'refresh': refresh}).status_code, 401)
+
+    def test_rehachage_seulement_a_la_hausse(self):
+        utilisateur = Utilisateur.objects.get(pk=self.organisateur.pk)
+        with override_settings(HACHAGE_PBKDF2_ITERATIONS=2):
+            self.assertTrue(mots_de_passe.verifier(utilisateur, 'secret'))
+        self.assertTrue(utilisateur.motDePasse.startswith('pbkdf2_sha256$2$'))
+        # Réglage revenu à 1 itération : le hachage n'est pas affaibli
+        self.assertTrue(mots_de_passe.verifier(utilisateur, 'secret'))
+        utilisateur.refresh_from_db()
+        self.assertTrue(utilisateur.motDePasse.startswith('pbkdf2_sha256$2$'))
+
+    def test_mot_de_passe_relu_non_rehache(self):
+        utilisateur = Utilisateur.objects.get(pk=self.organisateur.pk)
+        Utilisateur.objects.filter(pk=utilisateur.pk).update(
+            motDePasse=mots_de_passe.hacher('nouveau'))
+        utilisateur.refresh_from_db()
+        utilisateur.save()
+        self.assertTrue(mots_de_passe.verifier(utilisateur, 'nouveau'))
+
+
+class ImportEffectifsTests(DonneesTestCase):
+    def test_reserve_a_l_organisateur(self):
+        url = reverse('import-effectifs', args=[self.organisateur.pk])
+        ligne = {'email': self.joueurs[0].utilisateur.email,
+                 'equipe': 'Nouvelle', 'role': 'joueur'}
+        autre = creer_utilisateur('organisateur', 'autre-orga')
+        for utilisateur in (self.joueurs[0].utilisateur, autre):
+            with self.subTest(utilisateur=utilisateur.nom):
+                reponse = self.client_de(utilisateur).post(
+                    url, {'lignes': [ligne]}, format='json')
+                self.assertEqual(reponse.status_code, 403)
+        self.assertFalse(Equipe.objects.filter(nom='Nouvelle').exists())
+
+        admin = creer_utilisateur('administrateur', 'admin')
+        for utilisateur in (self.organisateur.utilisateur, admin):
+            with self.subTest(utilisateur=utilisateur.nom):
+                reponse = self.client_de(utilisateur).post(
+                    url, {'lignes': []}, format='json')
+                self.assertEqual(reponse.status_code, 200)
+
+
+class FormatMixteTests(DonneesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.mixte = creer_tournoi(cls.organisateur, 'Mixte', type='mixte')
+        cls.equipes = [creer_equipe(cls.organisateur, f'E{i}') for i in range(8)]
+
+    def setUp(self):
+        suisse.demarrer(self.mixte, [equipe.pk for equipe in self.equipes],
+                        nb_rondes=1, nb_qualifies=8)
+
+    def _ronde(self, phase, ronde):
+        return list(Rencontre.objects.filter(
+            tournoi=self.mixte, phase=phase, ronde=ronde).order_by('pk'))
+
+    def _jouer(self, rencontre, score1, score2, statut='termine'):
+        # Comme depuis l'admin : un save() par rencontre
+        rencontre.score1, rencontre.score2, rencontre.statut = score1, score2, statut
+        with self.captureOnCommitCallbacks(execute=True):
+            rencontre.save()
+
+    def test_forfait_en_phase_suisse(self):
+        premiere, *autres = self._ronde('suisse', 1)
+        self._jouer(premiere, 0, 3, statut='annule')
+        points = {ligne['equipe']: ligne['points']
+                  for ligne in suisse.classement(self.mixte.pk)}
+        self.assertEqual(points[premiere.equipe2_id], suisse.POINTS_VICTOIRE)
+        self.assertEqual(points[premiere.equipe1_id], 0)
+        for rencontre in autres:
+            self._jouer(rencontre, 1, 0)
+        self.assertEqual(len(self._ronde('elimination', 1)), 4)
+
+    def test_annulation_et_nul_en_elimination(self):
+        for rencontre in self._ronde('suisse', 1):
+            self._jouer(rencontre, 1, 0)
+        rang = {ligne['equipe']: ligne['rang']
+                for ligne in suisse.classement(self.mixte.pk)}
+        annulee, nul, forfait, victoire = self._ronde('elimination', 1)
+        self._jouer(annulee, None, None, statut='annule')
+        self._jouer(nul, 2, 2)
+        self._jouer(forfait, 3, 0, statut='annule')
+        self._jouer(victoire, 0, 1)
+
+        # Trois équipes en lice : la mieux classée passe le tour
+        en_lice = {min((nul.equipe1_id, nul.equipe2_id), key=rang.get),
+                   forfait.equipe1_id, victoire.equipe2_id}
+        qualifiee = min(en_lice, key=rang.get)
+        [demi] = self._ronde('elimination', 2)
+        self.assertEqual({demi.equipe1_id, demi.equipe2_id}, en_lice - {qualifiee})
+
+        self._jouer(demi, 1, 0)
+        [finale] = self._ronde('elimination', 3)
+        self.assertEqual({finale.equipe1_id, finale.equipe2_id},
+                         {qualifiee, demi.equipe1_id})
+        self._jouer(finale, 0, 2)
+        self.assertEqual(FormatMixte.objects.get(tournoi=self.mixte).phase,
+                         'termine')
+
+
+class InscriptionsTests(DonneesTestCase):
+    def setUp(self):
+        self.inscription = inscriptions.inscrire(self.tournoi.pk, self.equipe1.pk)
+
+    def test_compteur_sans_limite(self):
+        self.assertEqual(inscriptions.places(self.tournoi.pk),
+                         {'capacite': None, 'occupees': 1, 'restantes': None})
+        inscriptions.definir_capacite(self.tournoi.pk, 1)
+        with self.assertRaises(inscriptions.TournoiComplet):
+            inscriptions.inscrire(self.tournoi.pk, self.equipe2.pk)
+        with self.assertRaises(ValidationError):
+            inscriptions.definir_capacite(self.tournoi.pk, 0)
+        inscriptions.definir_capacite(self.tournoi.pk, None)
+        inscriptions.inscrire(self.tournoi.pk, self.equipe2.pk)
+        self.assertEqual(inscriptions.places(self.tournoi.pk)['occupees'], 2)
+
+    def test_reserve_a_l_organisateur(self):
+        autre = creer_utilisateur('organisateur', 'autre-orga')
+        urls = [
+            ('put', reverse('tournoi-inscriptions', args=[self.tournoi.pk]),
+             {'capacite': 4}),
+            ('post', reverse('tournoi-format-mixte', args=[self.tournoi.pk]),
+             {'equipes': []}),
+            ('post', reverse('inscription-annulation', args=[self.inscription.pk]),
+             {}),
+        ]
+        for utilisateur in (self.joueurs[0].utilisateur, autre):
+            client = self.client_de(utilisateur)
+            for methode, url, donnees in urls:
+                with self.subTest(utilisateur=utilisateur.nom, url=url):
+                    reponse = getattr(client, methode)(url, donnees, format='json')
+                    self.assertEqual(reponse.status_code, 403)
+        self.assertEqual(inscriptions.places(self.tournoi.pk)['capacite'], None)
+
+        client = self.client_de(self.organisateur.utilisateur)
+        for methode, url, donnees in urls:
+            with self.subTest(url=url):
+                reponse = getattr(client, methode)(url, donnees, format='json')
+                self.assertNotEqual(reponse.status_code, 403)
+        self.assertEqual(inscriptions.places(self.tournoi.pk)['occupees'], 0)
+
+    def test_inscription_par_un_responsable_de_l_equipe(self):
+        JoueurEquipe.objects.filter(joueur=self.joueurs[2]).update(role='capitaine')
+        url = reverse('tournoi-inscriptions', args=[self.tournoi.pk])
+        donnees = {'equipe': self.equipe2.pk}
+        autre = Organisateur.objects.get(
+            utilisateur=creer_utilisateur('organisateur', 'autre-orga'))
+        refuses = [
+            ('anonyme', APIClient(), (401, 403)),
+            # Membre sans être capitaine, capitaine d'une autre équipe
+            ('membre', self.client_de(self.joueurs[3].utilisateur), (403,)),
+            ('autre-equipe', self.client_de(self.joueurs[0].utilisateur), (403,)),
+            ('autre-orga', self.client_de(autre.utilisateur), (403,)),
+        ]
+        JoueurEquipe.objects.filter(joueur=self.joueurs[0]).update(role='capitaine')
+        for nom, client, statuts in refuses:
+            with self.subTest(client=nom):
+                reponse = client.post(url, donnees, format='json')
+                self.assertIn(reponse.status_code, statuts)
+        self.assertFalse(Inscription.objects.filter(equipe=self.equipe2).exists())
+
+        capitaine = self.client_de(self.joueurs[2].utilisateur)
+        # Le payeur doit être membre de l'équipe inscrite
+        reponse = capitaine.post(
+            url, {**donnees, 'joueur': self.joueurs[0].pk}, format='json')
+        self.assertEqual(reponse.status_code, 400)
+        reponse = capitaine.post(
+            url, {**donnees, 'joueur': self.joueurs[3].pk}, format='json')
+        self.assertEqual(reponse.status_code, 201, reponse.data)
+
+
+class CalendrierTests(DonneesTestCase):
+    def setUp(self):
+        cache.clear()
+        self.rencontre = self.creer_rencontre()
+
+    def _abonnement(self, utilisateur, type_flux, objet_id):
+        return self.client_de(utilisateur).post(
+            reverse('abonnement-calendrier'),
+            {'type': type_flux, 'id': objet_id}, format='json')
+
+    def _url(self, type_flux='equipe', objet_id=None):
+        reponse = self._abonnement(self.joueurs[0].utilisateur, type_flux,
+                                   objet_id or self.equipe1.pk)
+        self.assertEqual(reponse.status_code, 201)
+        return reponse.data['url']
+
+    def test_jeton_requis(self):
+        url = self._url()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # Deux abonnés au même flux n'ont pas la même URL
+        self.assertNotEqual(url, self._abonnement(
+            self.organisateur.utilisateur, 'equipe', self.equipe1.pk
+        ).data['url'])
+
+        jeton = url.rsplit('/', 1)[1][:-len('.ics')]
+        # Contenu d'un autre jeton, signature de celui-ci
+        autre = calendrier.jeton('equipe', self.equipe2.pk, self.joueurs[0].pk)
+        faux = autre.split(':')[0] + ':' + jeton.split(':')[1]
+        for invalide in (jeton[:-1] + ('A' if jeton[-1] != 'A' else 'B'),
+                         faux, f'equipe/{self.equipe1.pk}'):
+            with self.subTest(jeton=invalide):
+                reponse = self.client.get(f'/api/calendriers/{invalide}.ics')
+                self.assertEqual(reponse.status_code, 404)
+
+    def test_flux_personnels_reserves(self):
+        joueur = self.joueurs[0]
+        self.assertEqual(self._abonnement(
+            joueur.utilisateur, 'joueur', joueur.pk).status_code, 201)
+        self.assertEqual(self._abonnement(
+            joueur.utilisateur, 'joueur', self.joueurs[1].pk).status_code, 403)
+        self.assertEqual(self._abonnement(
+            joueur.utilisateur, 'arbitre', joueur.pk).status_code, 403)
+        reponse = APIClient().post(
+            reverse('abonnement-calendrier'),
+            {'type': 'equipe', 'id': self.equipe1.pk}, format='json')
+        self.assertIn(reponse.status_code, (401, 403))
+
+    def test_requetes_conditionnelles(self):
+        url = self._url()
+        reponse = self.client.get(url)
+        etag, derniere_maj = reponse['ETag'], reponse['Last-Modified']
+        self.assertTrue(reponse.streaming)
+        self.assertIn(f'UID:rencontre-{self.rencontre.pk}@',
+                      b''.join(reponse.streaming_content).decode())
+
+        reponse = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reponse.status_code, 304)
+        reponse = self.client.get(url, HTTP_IF_MODIFIED_SINCE=derniere_maj)
+        self.assertEqual(reponse.status_code, 304)
+        # Le corps est désormais servi depuis le cache
+        reponse = self.client.get(url)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertFalse(reponse.streaming)
+        self.assertEqual(reponse['ETag'], etag)
+
+    def test_invalide_par_un_changement_visible(self):
+        url = self._url()
+        etag = self.client.get(url)['ETag']
+        # Champ absent du flux : toujours à jour
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rencontre.score1 = 3
+            self.rencontre.save()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rencontre.terrain = 'Terrain 2'
+            self.rencontre.save()
+        time.sleep(0.002)  # les dates de mise à jour sont en ms
+        reponse = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertNotEqual(reponse['ETag'], etag)
+        self.assertIn('Terrain 2', b''.join(reponse.streaming_content).decode())
+
+
+class NotificationsTests(DonneesTestCase):
+    """Planificateur sur une horloge simulée (voir simuler_notifications)."""
+    PAS = timedelta(minutes=5)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.arbitre = Arbitre.objects.get(
+            utilisateur=creer_utilisateur('arbitre', 'arbitre'))
+        cls.destinataires = {joueur.pk for joueur in cls.joueurs} | {cls.arbitre.pk}
+
+    def setUp(self):
+        self.horloge = notifications.HorlogeSimulee()
+        self.debut = self.horloge()
+        self.envois = []
+
+    def _planificateur(self):
+        return notifications.Planificateur(self.horloge, envoyer=self.envois.append)
+
+    def _rencontre(self, dans):
+        return self.creer_rencontre(arbitre=self.arbitre, terrain='Terrain A',
+                                    date_heure=self.debut + dans)
+
+    def _derouler(self, duree, scenario):
+        planificateur = self._planificateur()
+        while self.horloge() - self.debut <= duree:
+            action = scenario.get(self.horloge() - self.debut)
+            if action == 'redemarrage':
+                planificateur = self._planificateur()
+            elif action:
+                action()
+            planificateur.tour()
+            self.horloge.avancer(self.PAS)
+
+    def _envoyees(self, rencontre, type_notification):
+        return set(Notification.objects.filter(
+            rencontre=rencontre, type=type_notification).values_list(
+            'utilisateur_id', flat=True))
+
+    def test_scenario_sur_deux_jours(self):
+        changee = self._rencontre(timedelta(hours=2))
+        annulee = self._rencontre(timedelta(hours=3))
+        lointaine = self._rencontre(timedelta(hours=30))
+
+        def changer_terrain():
+            changee.terrain = 'Terrain B'
+            changee.save()
+
+        def annuler():
+            annulee.statut = 'annule'
+            annulee.save()
+
+        self._derouler(timedelta(hours=31), {
+            timedelta(minutes=30): changer_terrain,
+            timedelta(hours=1): annuler,
+            timedelta(hours=10): 'redemarrage',
+        })
+
+        self.assertEqual(self._envoyees(changee, 'modification'), self.destinataires)
+        self.assertEqual(self._envoyees(changee, 'rappel_1h'), self.destinataires)
+        # Son rappel 24 h était dû avant le démarrage
+        self.assertEqual(self._envoyees(changee, 'rappel_24h'), set())
+        self.assertFalse(Notification.objects.filter(rencontre=annulee).exists())
+        for type_notification in ('rappel_24h', 'rappel_1h'):
+            self.assertEqual(self._envoyees(lointaine, type_notification),
+                             self.destinataires)
+        self.assertIn('Terrain B', Notification.objects.get(
+            rencontre=changee, type='rappel_1h',
+            utilisateur_id=self.arbitre.pk).message)
+
+        # Un message envoyé par notification, aucun doublon après le
+        # redémarrage
+        self.assertEqual(sum(len(messages) for lots in self.envois
+                             for messages in lots.values()),
+                         Notification.objects.count())
+        self.assertEqual(Notification.objects.count(), 4 * len(self.destinataires))
+
+    def test_envois_groupes_par_destinataire(self):
+        for _ in range(3):
+            self._rencontre(timedelta(minutes=50))
+        self._planificateur().tour()
+        self.assertEqual(len(self.envois), 1)
+        self.assertEqual(set(self.envois[0]), self.destinataires)
+        self.assertTrue(all(len(messages) == 3
+                            for messages in self.envois[0].values()))
+
+    def test_rappel_en_retard(self):
+        rencontre = self._rencontre(timedelta(minutes=70))
+        planificateur = self._planificateur()
+        planificateur.tour()
+        # Planificateur bloqué : rappel dû depuis 10 minutes, encore envoyé
+        self.horloge.avancer(timedelta(minutes=20))
+        planificateur.tour()
+        self.assertEqual(self._envoyees(rencontre, 'rappel_1h'), self.destinataires)
+
+        # Redémarrage : rappel dû depuis plus de RETARD_MAX, abandonné
+        tardive = self._rencontre(timedelta(minutes=80))
+        self.horloge.avancer(timedelta(minutes=20))
+        self._planificateur().tour()
+        self.assertEqual(self._envoyees(tardive, 'rappel_1h'), set())
+
+
+@override_settings(HACHAGE_PBKDF2_ITERATIONS=1)
+class InscriptionsConcurrentesTests(TransactionTestCase):
+    """Chaque thread a sa connexion : les écritures doivent être validées."""
+    NB_EQUIPES = 24
+
+    def setUp(self):
+        organisateur = Organisateur.objects.get(
+            utilisateur=creer_utilisateur('organisateur', 'orga'))
+        self.tournoi = creer_tournoi(organisateur)
+        self.equipes = [creer_equipe(organisateur, f'E{i}').pk
+                        for i in range(self.NB_EQUIPES)]
+
+    def _en_parallele(self, *fonctions):
+        depart = threading.Barrier(len(fonctions))
+        erreurs = []
+
+        def lancer(fonction):
+            try:
+                depart.wait()
+                fonction()
+            except Exception as e:  # remontée dans le thread du test
+                erreurs.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=lancer, args=(fonction,))
+                   for fonction in fonctions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return erreurs
+
+    def _inscription(self, equipe_id):
+        return lambda: inscriptions.inscrire(self.tournoi.pk, equipe_id)
+
+    def _verifier_compteur(self):
+        places = inscriptions.places(self.tournoi.pk)
+        inscrites = Inscription.objects.filter(
+            tournoi=self.tournoi).exclude(statut='annulee').count()
+        self.assertEqual(places['occupees'], inscrites)
+        if places['capacite'] is not None:
+            self.assertLessEqual(inscrites, places['capacite'])
+        return inscrites
+
+    def test_aucune_surreservation(self):
+        inscriptions.definir_capacite(self.tournoi.pk, 5)
+        erreurs = self._en_parallele(
+            *(self._inscription(equipe_id) for equipe_id in self.equipes))
+        self.assertEqual(self._verifier_compteur(), 5)
+        self.assertEqual(len(erreurs), self.NB_EQUIPES - 5)
+        self.assertTrue(all(isinstance(e, inscriptions.TournoiComplet)
+                            for e in erreurs))
+
+    def test_capacite_fixee_pendant_les_inscriptions(self):
+        erreurs = self._en_parallele(
+            lambda: inscriptions.definir_capacite(self.tournoi.pk, 10),
+            *(self._inscription(equipe_id) for equipe_id in self.equipes))
+        self.assertTrue(all(isinstance(e, (inscriptions.TournoiComplet,
+                                           ValidationError))
+                            for e in erreurs), erreurs)
+        self._verifier_compteur()
+
+
+SHARDS_TEST = ['shard_test_0', 'shard_test_1']
+
+
+@override_settings(HACHAGE_PBKDF2_ITERATIONS=1)
+class ShardsTests(TransactionTestCase):
+    """Deux shards SQLite temporaires, créés pour la classe (le lanceur
+    de tests ne connaît que les bases des settings) ; les tables
+    globales (utilisateurs, profils) restent dans 'default'."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        dossier = cls.enterClassContext(tempfile.TemporaryDirectory())
+        for alias in SHARDS_TEST:
+            bench.ajouter_base(alias, os.path.join(dossier, f'{alias}.sqlite3'))
+            cls.addClassCleanup(bench.retirer_base, alias)
+        # Autorisées, et vidées après chaque test comme 'default'
+        cls.databases = cls.databases | set(SHARDS_TEST)
+        cls.enterClassContext(override_settings(SHARDS=SHARDS_TEST))
+        for alias in SHARDS_TEST:
+            call_command('migrate', database=alias, run_syncdb=True, verbosity=0)
+        call_command('preparer_shards', stdout=io.StringIO())
+
+    def setUp(self):
+        shards._organisateurs.clear()
+        self.arbitre = Arbitre.objects.get(
+            utilisateur=creer_utilisateur('arbitre', 'arbitre'))
+        self.joueur = Joueur.objects.get(
+            utilisateur=creer_utilisateur('joueur', 'joueur'))
+        # Un tournoi par shard, le joueur et l'arbitre sont sur les deux
+        self.rencontres = []
+        for i, alias in enumerate(SHARDS_TEST):
+            organisateur = Organisateur.objects.get(
+                utilisateur=creer_utilisateur('organisateur', f'orga{i}'))
+            Organisateur.objects.filter(pk=organisateur.pk).update(shard=alias)
+            with shards.pour_organisateur(organisateur.pk):
+                tournoi = creer_tournoi(organisateur)
+                self.rencontres.append(Rencontre.objects.create(
+                    tournoi=tournoi, arbitre=self.arbitre,
+                    equipe1=creer_equipe(organisateur, 'Rouges', [self.joueur]),
+                    equipe2=creer_equipe(organisateur, 'Bleus'),
+                    date_heure=timezone.now() - timedelta(days=i + 1)))
+
+    def _saisie(self, versions, score1=2):
+        return self.client_de(self.arbitre.utilisateur).post(
+            reverse('saisie-scores'), {'rencontres': [
+                {'id': rencontre.pk, 'version': version, 'score1': score1,
+                 'score2': 0, 'statut': 'termine'}
+                for rencontre, version in zip(self.rencontres, versions)]},
+            format='json')
+
+    client_de = DonneesTestCase.client_de
+
+    def test_identifiants_dans_la_plage_du_shard(self):
+        for alias, rencontre in zip(SHARDS_TEST, self.rencontres):
+            self.assertEqual(shards.shard_de_l_id(rencontre.pk), alias)
+            self.assertTrue(Rencontre.objects.using(alias).filter(
+                pk=rencontre.pk, tournoi_id=rencontre.tournoi_id).exists())
+        with self.assertRaises(shards.ShardIndetermine):
+            list(Rencontre.objects.all())
+
+    def test_saisie_scores_sur_deux_shards(self):
+        reponse = self._saisie([0, 0])
+        self.assertEqual(reponse.status_code, 200, reponse.data)
+        for alias, rencontre in zip(SHARDS_TEST, self.rencontres):
+            self.assertEqual(Rencontre.objects.using(alias).get(
+                pk=rencontre.pk).statut, 'termine')
+
+        # Un conflit sur un shard : rien n'est écrit sur l'autre
+        reponse = self._saisie([1, 0], score1=5)
+        self.assertEqual(reponse.status_code, 409)
+        self.assertEqual(reponse.data['conflits'], {self.rencontres[1].pk: 1})
+        self.assertEqual(Rencontre.objects.using(SHARDS_TEST[0]).get(
+            pk=self.rencontres[0].pk).score1, 2)
+
+    def test_statistiques_du_joueur(self):
+        self.assertEqual(self._saisie([0, 0]).status_code, 200)
+        reponse = self.client.get(
+            reverse('statistiques-joueur', args=[self.joueur.pk]))
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.data['matchs_joues'], 2)
+        self.assertEqual(reponse.data['forme'], ['V', 'V'])
+
+    def test_calendriers_joueur_et_arbitre(self):
+        for type_flux, objet_id in (('joueur', self.joueur.pk),
+                                    ('arbitre', self.arbitre.pk)):
+            with self.subTest(type_flux=type_flux):
+                reponse = self.client.get(reverse('flux-calendrier', args=[
+                    calendrier.jeton(type_flux, objet_id, objet_id)]))
+                self.assertEqual(reponse.status_code, 200)
+                corps = b''.join(reponse.streaming_content).decode()
+                uids = [f'UID:rencontre-{rencontre.pk}@'
+                        for rencontre in self.rencontres]
+                # Du plus ancien au plus récent, d'un shard à l'autre
+                self.assertLess(corps.index(uids[1]), corps.index(uids[0]))
+
+    def test_commandes_de_verification(self):
+        self.assertEqual(self._saisie([0, 0]).status_code, 200)
+        sortie = io.StringIO()
+        call_command('verifier_statistiques', stdout=sortie)
+        for alias in SHARDS_TEST:
+            self.assertIn(f'{alias}/equipes: 0 écart(s)', sortie.getvalue())
+        self.assertIn('Statistiques cohérentes', sortie.getvalue())
+
+        sortie = io.StringIO()
+        call_command('verifier_recettes', stdout=sortie)
+        self.assertIn('Recettes cohérentes', sortie.getvalue())
+
+        sortie = io.StringIO()
+        call_command('archiver_tournois', jours=0, dry_run=True, stdout=sortie)
+        self.assertIn('0 tournoi(s) éligible(s)', sortie.getvalue())
+
+    def test_page_du_tournoi(self):
+        for i, rencontre in enumerate(self.rencontres):
+            reponse = self.client.get(
+                reverse('tournoi-page', args=[rencontre.tournoi_id]))
+            self.assertEqual(reponse.status_code, 200)
+            document = reponse.data
+            self.assertEqual(document['tournoi']['organisateur']['nom'], f'orga{i}')
+            self.assertEqual(document['rencontres'][0]['arbitre']['nom'], 'arbitre')
+            self.assertEqual(
+                document['equipes'][str(rencontre.equipe1_id)]['effectif'][0]['nom'],
+                'joueur')
+
+
+class ChangementsTests(TestCase):
+    def setUp(self):
+        Changement.objects.all().delete()
+
+    def _ligne(self, sequence, age=timedelta(), operation='modification',
+               objet_id=1):
+        Changement.objects.create(sequence=sequence, modele='tournoi',
+                                  objet_id=objet_id, operation=operation)
+        Changement.objects.filter(pk=sequence).update(date=timezone.now() - age)
+
+    def _sequences(self, since=0):
+        return [changement['sequence']
+                for changement in changements.lire(since)['changements']]
+
+    def test_trou_recent_garde(self):
+        self._ligne(1)
+        self._ligne(3)
+        self.assertEqual(changements.lire(1), {'sequence': 1, 'changements': []})
+        self.assertFalse(Changement.objects.filter(sequence=2).exists())
+
+    def test_trou_d_une_transaction_annulee(self):
+        self._ligne(1, age=timedelta(minutes=1))
+        self._ligne(4, age=timedelta(minutes=1))
+        self.assertEqual(changements.lire(1)['sequence'], 4)
+        self.assertEqual(set(Changement.objects.filter(
+            operation='annulation').values_list('sequence', flat=True)), {2, 3})
+        # Les lignes d'annulation ne sont jamais renvoyées
+        self.assertEqual(self._sequences(), [1, 4])
+
+    def test_compaction(self):
+        self._ligne(1, age=timedelta(days=40), operation='suppression', objet_id=2)
+        for sequence, objet_id in ((2, 1), (3, 3), (4, 1)):
+            self._ligne(sequence, age=timedelta(days=10), objet_id=objet_id)
+        self._ligne(5, age=timedelta(minutes=1))
+
+        self.assertEqual(changements.compacter(), (2, 1))
+        self.assertEqual(self._sequences(), [3, 5])
+        # Le trou laissé par la compaction n'est pas sondé
+        self.assertEqual(self._sequences(1), [3, 5])
+        self.assertFalse(Changement.objects.filter(sequence=2).exists())
+
+
+class ChangementsConcurrentsTests(TransactionTestCase):
+    """Les écritures des autres connexions doivent être validées."""
+
+    def _en_parallele(self, fonction):
+        def lancer():
+            try:
+                fonction()
+            finally:
+                connection.close()
+        thread = threading.Thread(target=lancer)
+        thread.start()
+        return thread
+
+    @override_settings(CHANGEMENTS_INTERVALLE=0.05)
+    def test_long_poll(self):
+        since = changements.lire(0, limite=changements.LIMITE_MAX)['sequence']
+        self.assertEqual(changements.lire(since, attente=0.1)['changements'], [])
+
+        def ecrire():
+            time.sleep(0.2)
+            Changement.objects.create(modele='tournoi', objet_id=1,
+                                      operation='creation')
+        thread = self._en_parallele(ecrire)
+        debut = time.monotonic()
+        resultat = changements.lire(since, attente=10)
+        thread.join()
+        self.assertLess(time.monotonic() - debut, 5)
+        self.assertEqual([c['operation'] for c in resultat['changements']],
+                         ['creation'])
+
+    @override_settings(CHANGEMENTS_ATTENTE_VERROU=0.1)
+    def test_trou_d_une_transaction_en_cours(self):
+        for sequence in (1, 3):
+            Changement.objects.create(sequence=sequence, modele='tournoi',
+                                      objet_id=1, operation='modification')
+        Changement.objects.update(date=timezone.now() - timedelta(minutes=1))
+        en_cours, fin = threading.Event(), threading.Event()
+
+        def transaction_longue():
+            with transaction.atomic():
+                Changement.objects.create(sequence=2, modele='tournoi',
+                                          objet_id=1, operation='modification')
+                en_cours.set()
+                fin.wait(10)
+        thread = self._en_parallele(transaction_longue)
+        en_cours.wait(10)
+        try:
+            self.assertEqual(changements.lire(1),
+                             {'sequence': 1, 'changements': []})
+        finally:
+            fin.set()
+            thread.join()
+        self.assertEqual([c['sequence'] for c in changements.lire(1)['changements']],
+                         [2, 3])
+
+
+class ConnexionFactice:
+    def __init__(self):
+        self.fermee = False
+
+    def close(self):
+        self.fermee = True
+
+
+class PoolTests(SimpleTestCase):
+    def _pool(self, **reglages):
+        return connexions.Pool('test', **{
+            'taille': 2, 'attente': 0.05, 'duree_vie': None,
+            'controle_apres': None, **reglages})
+
+    def test_prendre_et_rendre(self):
+        pool = self._pool()
+        premiere = pool.prendre(ConnexionFactice)
+        pool.rendre(premiere)
+        self.assertIs(pool.prendre(ConnexionFactice), premiere)
+        seconde = pool.prendre(ConnexionFactice)
+        self.assertIsNot(seconde, premiere)
+        metriques = pool.metriques()
+        self.assertEqual((metriques['prises'], metriques['creations'],
+                          metriques['ouvertes'], metriques['en_service']),
+                         (3, 2, 2, 2))
+
+    def test_expiration(self):
+        pool = self._pool(duree_vie=0)
+        connexion = pool.prendre(ConnexionFactice)
+        pool.rendre(connexion)
+        self.assertTrue(connexion.fermee)
+        self.assertEqual(pool.metriques()['expirees'], 1)
+        self.assertEqual(pool.metriques()['ouvertes'], 0)
+
+        # Une connexion rejetée (transaction ouverte...) est fermée aussi
+        pool = self._pool()
+        connexion = pool.prendre(ConnexionFactice)
+        pool.rendre(connexion, saine=False)
+        self.assertTrue(connexion.fermee)
+        self.assertEqual(pool.metriques()['rejetees'], 1)
+
+    def test_controle_avant_reprise(self):
+        pool = self._pool(controle_apres=0)
+        connexion = pool.prendre(ConnexionFactice)
+        pool.rendre(connexion)
+        self.assertIs(pool.prendre(ConnexionFactice, lambda c: True), connexion)
+        pool.rendre(connexion)
+        remplacante = pool.prendre(ConnexionFactice, lambda c: False)
+        self.assertIsNot(remplacante, connexion)
+        self.assertTrue(connexion.fermee)
+        metriques = pool.metriques()
+        self.assertEqual((metriques['reconnexions'], metriques['ouvertes']),
+                         (1, 1))
+
+    def test_epuisement(self):
+        pool = self._pool(taille=1)
+        connexion = pool.prendre(ConnexionFactice)
+        with self.assertRaises(connexions.PoolEpuise):
+            pool.prendre(ConnexionFactice)
+        self.assertEqual(pool.metriques()['epuisements'], 1)
+
+        # Une connexion rendue pendant l'attente est reprise
+        pool.attente = 5
+        rendue = threading.Timer(0.05, pool.rendre, [connexion])
+        rendue.start()
+        self.assertIs(pool.prendre(ConnexionFactice), connexion)
+        rendue.join()
+        self.assertEqual(pool.metriques()['attentes'], 1)
+
+
+class MoteurPooleTests(SimpleTestCase):
+    """Moteur tournois.connexions.sqlite3, hors des bases des settings."""
+
+    def _wrapper(self, nom):
+        reglages = connections.configure_settings({'default': {}, 'pool_test': {
+            'ENGINE': 'tournois.connexions.sqlite3', 'NAME': nom,
+            'CONN_MAX_AGE': None}})['pool_test']
+        return WrapperPoole(reglages, 'pool_test')
+
+    def _pools_de_test(self):
+        return connexions.metriques().get('pool_test', {})
+
+    def test_connexion_reprise_sans_reinitialisation(self):
+        dossier = self.enterContext(tempfile.TemporaryDirectory())
+        chemin = os.path.join(dossier, 'pool.sqlite3')
+        with mock.patch.object(SQLiteWrapper, 'init_connection_state') as init:
+            premier = self._wrapper(chemin)
+            premier.ensure_connection()
+            connexion = premier.connection
+            premier.close()
+            second = self._wrapper(chemin)
+            second.ensure_connection()
+        self.assertIs(second.connection, connexion)
+        self.assertEqual(init.call_count, 1)
+        second.close()
+        self.assertEqual(self._pools_de_test()[chemin]['libres'], 1)
+        connexions.vider()
+
+    def test_base_en_memoire_sans_pool(self):
+        erreurs = []
+
+        def requete():
+            try:
+                wrapper = self._wrapper(':memory:')
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                wrapper.close()
+            except Exception as e:
+                erreurs.append(e)
+        # Plus de threads que POOL_TAILLE : aucune place n'est retenue
+        with override_settings(POOL_TAILLE=1, POOL_ATTENTE=0):
+            for _ in range(3):
+                thread = threading.Thread(target=requete)
+                thread.start()
+                thread.join()
+        self.assertEqual(erreurs, [])
+        self.assertNotIn(':memory:', self._pools_de_test())
+
+
+class MetriquesConnexionsTests(DonneesTestCase):
+    def test_reserve_aux_administrateurs(self):
+        url = reverse('metriques-connexions')
+        reponse = self.client_de(self.joueurs[0].utilisateur).get(url)
+        self.assertEqual(reponse.status_code, 403)
+
+        pool = connexions.Pool('test', 1, 0, None, None)
+        with mock.patch.dict(connexions._pools,
+                             {('metriques_test', 'base', None, None): pool}):
+            pool.rendre(pool.prendre(ConnexionFactice))
+            admin = creer_utilisateur('administrateur', 'admin')
+            reponse = self.client_de(admin).get(url)
+        self.assertEqual(reponse.status_code, 200)
+        metriques = reponse.data['metriques_test']['base']
+        self.assertEqual((metriques['prises'], metriques['libres']), (1, 1))
+
+
+class ProfilageTests(DonneesTestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = creer_utilisateur('administrateur', 'admin')
+        self.client = self.client_de(self.admin)
+
+    def test_jetons_refuses(self):
+        valeur = profilage.jeton(self.admin.pk)
+        self.assertTrue(profilage.jeton_valide(valeur))
+        signature = valeur.rsplit(':', 1)[1]
+        for invalide in ('', 'n-importe-quoi', f'999:{signature}',
+                         valeur[:-1] + ('A' if valeur[-1] != 'A' else 'B')):
+            with self.subTest(jeton=invalide):
+                self.assertFalse(profilage.jeton_valide(invalide))
+        with mock.patch('django.core.signing.time.time',
+                        return_value=time.time() - profilage.duree_jeton() - 1):
+            expire = profilage.jeton(self.admin.pk)
+        self.assertFalse(profilage.jeton_valide(expire))
+
+        for invalide in ('n-importe-quoi', expire):
+            with self.subTest(jeton=invalide):
+                reponse = self.client.get(reverse('rencontres'),
+                                          HTTP_X_PROFILAGE=invalide)
+                self.assertEqual(reponse.status_code, 200)
+                self.assertNotIn('X-Profilage-Id', reponse)
+        self.assertEqual(profilage.profils(), [])
+
+    @override_settings(PROFILAGE_TAMPON=3)
+    def test_tampon_circulaire(self):
+        for i in range(5):
+            profilage._enregistrer({'chemin': f'/{i}', 'stats': {}})
+        self.assertEqual([p['id'] for p in profilage.profils()], [5, 4, 3])
+        self.assertEqual(profilage.profils()[0]['chemin'], '/4')
+        for remplace in (1, 2):
+            self.assertIsNone(profilage.profil(remplace))
+        self.assertEqual(profilage.profil(4)['chemin'], '/3')
+
+    def test_requete_profilee(self):
+        self.creer_rencontre()
+        valeur = self.client.post(reverse('profilage-jeton')).data['jeton']
+        reponse = self.client.get(reverse('rencontres'),
+                                  {'profilage': valeur})
+        self.assertEqual(reponse.status_code, 200)
+        profil_id = int(reponse['X-Profilage-Id'])
+
+        url = reverse('profilage-profil', args=[profil_id])
+        resume = self.client.get(url)
+        self.assertEqual(resume.status_code, 200)
+        self.assertEqual((resume.data['chemin'], resume.data['declencheur']),
+                         (reverse('rencontres'), 'jeton'))
+        self.assertGreater(resume.data['nb_requetes'], 0)
+        self.assertTrue(resume.data['fonctions'])
+        self.assertEqual([p['id'] for p in self.client.get(
+            reverse('profilage')).data], [profil_id])
+
+        pstats = self.client.get(url, {'export': 'pstats'})
+        self.assertTrue(marshal.loads(pstats.content))
+        speedscope = json.loads(self.client.get(
+            url, {'export': 'speedscope'}).content)
+        self.assertTrue(speedscope['profiles'][0]['samples'])
+        self.assertEqual(self.client.get(
+            reverse('profilage-profil', args=[profil_id + 1])).status_code, 404)
+
+
+class DemarrageTests(SimpleTestCase):
+    def test_vue_chargee_au_premier_appel(self):
+        differee = vue('tournois.views.ProfilsAPI')
+        resolveur = URLResolver(RegexPattern(r'^/'), [
+            path('profils/', differee, name='profils')])
+        with mock.patch('tournois.demarrage.import_string',
+                        wraps=import_string) as importer:
+            self.assertEqual(resolveur._reverse_with_prefix('profils', '/'),
+                             '/profils/')
+            correspondance = resolveur.resolve('/profils/')
+            self.assertEqual(correspondance._func_path,
+                             'tournois.views.ProfilsAPI')
+            self.assertEqual(resolveur.url_patterns[0].lookup_str,
+                             'tournois.views.ProfilsAPI')
+            importer.assert_not_called()
+
+            # Sans jeton : refus par les permissions, sans base de données
+            requete = RequestFactory().get('/profils/')
+            for _ in range(2):
+                self.assertEqual(correspondance.func(requete).status_code, 401)
+            importer.assert_called_once_with('tournois.views.ProfilsAPI')
+        self.assertEqual(differee.view_class.__name__, 'ProfilsAPI')
+        self.assertTrue(differee.csrf_exempt)
+
+    def test_urlconf_sans_import_des_vues(self):
+        # Nouvel interpréteur : les autres tests ont déjà importé les vues
+        script = (
+            "import sys, django; django.setup()\n"
+            "from django.urls import resolve, reverse\n"
+            "resolve(reverse('rencontres'))\n"
+            "print('tournois.views' in sys.modules)\n")
+        resultat = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'backend.settings')})
+        self.assertEqual(resultat.returncode, 0, resultat.stderr)
+        self.assertEqual(resultat.stdout.strip(), 'False')
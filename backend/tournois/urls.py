@@ -1,17 +1,52 @@
-from django.urls import path
-from . import views
-from .views import register_user, login_user
-from .views import RegisterAPI
-from .views import SyncSupabaseUser
-from .models import (
-    User,  # Si vous utilisez un modèle User personnalisé
-    Joueur,
-    Organisateur,
-    Arbitre
-)
+from django.urls import path, register_converter
+
+from .calendrier import JetonCalendrier
+from .demarrage import vue
+
+register_converter(JetonCalendrier, 'calendrier')
+
 urlpatterns = [
-    path('api/sync-user/', SyncSupabaseUser.as_view(), name='sync_user'),
-    path('tournois/', views.liste_tournois, name='liste-tournois'),
-    path('api/auth/register/', RegisterAPI.as_view(), name='register'),
-    path('login/', login_user, name='login'),
+    path('api/sync-user/', vue('tournois.views.SyncSupabaseUser'),
+         name='sync_user'),
+    path('api/statistiques/equipes/<int:equipe_id>/',
+         vue('tournois.views.StatistiquesEquipeAPI'), name='statistiques-equipe'),
+    path('api/statistiques/joueurs/<int:joueur_id>/',
+         vue('tournois.views.StatistiquesJoueurAPI'), name='statistiques-joueur'),
+    path('api/recettes/',
+         vue('tournois.views.RecettesAPI'), name='recettes'),
+    path('api/changements/',
+         vue('tournois.views.ChangementsAPI'), name='changements'),
+    path('api/tournois/<int:tournoi_id>/historique/',
+         vue('tournois.views.TournoiHistoriqueAPI'), name='tournoi-historique'),
+    path('api/tournois/<int:tournoi_id>/page/',
+         vue('tournois.views.PageTournoiAPI'), name='tournoi-page'),
+    path('api/tournois/<int:tournoi_id>/format-mixte/',
+         vue('tournois.views.FormatMixteAPI'), name='tournoi-format-mixte'),
+    path('api/tournois/<int:tournoi_id>/inscriptions/',
+         vue('tournois.views.InscriptionsAPI'), name='tournoi-inscriptions'),
+    path('api/inscriptions/<int:inscription_id>/annulation/',
+         vue('tournois.views.AnnulationInscriptionAPI'),
+         name='inscription-annulation'),
+    path('api/organisateurs/<int:organisateur_id>/effectifs/',
+         vue('tournois.views.ImportEffectifsAPI'), name='import-effectifs'),
+    path('api/rencontres/',
+         vue('tournois.views.RencontresAPI'), name='rencontres'),
+    path('api/equipes/',
+         vue('tournois.views.EquipesAPI'), name='equipes'),
+    path('api/rencontres/scores/',
+         vue('tournois.views.SaisieScoresAPI'), name='saisie-scores'),
+    path('api/calendriers/abonnements/',
+         vue('tournois.views.AbonnementCalendrierAPI'),
+         name='abonnement-calendrier'),
+    path('api/calendriers/<calendrier:flux>.ics',
+         vue('tournois.views.flux_calendrier'), name='flux-calendrier'),
+    path('api/metriques/connexions/',
+         vue('tournois.views.MetriquesConnexionsAPI'),
+         name='metriques-connexions'),
+    path('api/profilage/jeton/',
+         vue('tournois.views.JetonProfilageAPI'), name='profilage-jeton'),
+    path('api/profilage/',
+         vue('tournois.views.ProfilsAPI'), name='profilage'),
+    path('api/profilage/<int:profil_id>/',
+         vue('tournois.views.ProfilAPI'), name='profilage-profil'),
 ]
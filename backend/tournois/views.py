@@ -1,9 +1,34 @@
+import csv
+import heapq
+import io
+import itertools
+from operator import itemgetter
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
 from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.dateparse import parse_date, parse_datetime
 # Importez les modèles nécessaires
-from .models import Joueur, Organisateur, Arbitre
+from .models import (
+    Joueur, Organisateur, Arbitre, Equipe, FormatMixte, Inscription,
+    JoueurEquipe, Paiement, Rencontre, Tournoi,
+)
+from . import (
+    archivage, calendrier, changements, connexions, effectifs, inclusions,
+    inscriptions, instantanes, profilage, recettes, renderers, scores, shards,
+    statistiques, suisse,
+)
+from .permissions import (
+    EstAdministrateur, EstArbitre, EstOrganisateur, EstOrganisateurDuTournoi,
+    EstAbonnableAuFlux, EstResponsableDeLEquipe,
+)
+from .serializers import RencontreValeursSerializer, champs_demandes
 
 User = get_user_model()
 
@@ -72,3 +97,584 @@ class SyncSupabaseUser(APIView):
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+def _parametres_periode(request):
+    """Lit ?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ&tournoi=<id> (tous optionnels)"""
+    periode = {}
+    for nom in ('debut', 'fin'):
+        valeur = request.query_params.get(nom)
+        if valeur:
+            date = parse_date(valeur)
+            if date is None:
+                raise ValueError(f"Date invalide pour '{nom}': {valeur}")
+            periode[nom] = date
+    tournoi = request.query_params.get('tournoi')
+    if tournoi:
+        if not tournoi.isdigit():
+            raise ValueError(f"Tournoi invalide: {tournoi}")
+        periode['tournoi_id'] = int(tournoi)
+    return periode
+
+
+class StatistiquesEquipeAPI(APIView):
+    def get(self, request, equipe_id):
+        """
+        Statistiques d'une équipe sur une période, tous tournois confondus
+        sauf si ?tournoi= est fourni: matchs joués, taux de victoire,
+        buts pour/contre et forme sur les 5 derniers matchs.
+        """
+        try:
+            periode = _parametres_periode(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "equipe_id": equipe_id,
+            **statistiques.statistiques_equipe(equipe_id, **periode),
+        })
+
+
+class StatistiquesJoueurAPI(APIView):
+    def get(self, request, joueur_id):
+        """Statistiques d'un joueur, cumulées sur les matchs de ses équipes."""
+        try:
+            periode = _parametres_periode(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "joueur_id": joueur_id,
+            **statistiques.statistiques_joueur(joueur_id, **periode),
+        })
+
+
+class RecettesAPI(APIView):
+    """
+    Recettes et taux de remboursement sur une période, depuis les
+    agrégats journaliers : ?debut=&fin= (jours inclus), ?organisateur=,
+    ?tournoi= et ?par=organisateur,tournoi,jour,methode pour détailler.
+    """
+    permission_classes = [EstAdministrateur]
+
+    def get(self, request):
+        try:
+            periode = _parametres_periode(request)
+            organisateur = request.query_params.get('organisateur')
+            if organisateur:
+                if not organisateur.isdigit():
+                    raise ValueError(f"Organisateur invalide: {organisateur}")
+                periode['organisateur_id'] = int(organisateur)
+            par = [nom for nom in request.query_params.get('par', '').split(',')
+                   if nom]
+            resultat = recettes.recettes(par=par, **periode)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultat)
+
+
+class ChangementsAPI(APIView):
+    """
+    Journal des changements après une séquence : ?since=<seq> (0 au
+    premier appel, puis la `sequence` de la réponse), ?base=<alias> avec
+    des shards, ?modeles=tournoi,rencontre,... pour filtrer, ?limite= et
+    ?attente=<secondes> pour attendre le prochain changement (long-poll).
+    """
+    permission_classes = [EstAdministrateur]
+
+    def get(self, request):
+        parametres = request.query_params
+        base = parametres.get('base', shards.bases()[0])
+        if base not in shards.bases():
+            return Response({"error": f"Base inconnue: {base}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            since = int(parametres.get('since', 0))
+            limite = int(parametres.get('limite', 500))
+            attente = float(parametres.get('attente', 0))
+            if since < 0 or attente < 0:
+                raise ValueError("since et attente sont positifs")
+            modeles = [nom for nom in parametres.get('modeles', '').split(',')
+                       if nom]
+            resultat = changements.lire(since, using=base, modeles=modeles,
+                                        limite=limite, attente=attente)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'base': base, **resultat})
+
+
+class TournoiHistoriqueAPI(APIView):
+    def get(self, request, tournoi_id):
+        """Tournoi et rencontres, qu'ils soient en base chaude ou archivés."""
+        tournoi = archivage.tournoi(tournoi_id)
+        if tournoi is None:
+            return Response({"error": "Tournoi introuvable"},
+                            status=status.HTTP_404_NOT_FOUND)
+        tournoi['rencontres'] = archivage.rencontres(tournoi_id)
+        return Response(tournoi)
+
+
+class PageTournoiAPI(APIView):
+    def get(self, request, tournoi_id):
+        """
+        Page complète d'un tournoi (organisateur, rencontres, arbitres,
+        équipes et effectifs) servie depuis l'instantané dénormalisé.
+        """
+        document = instantanes.lire(tournoi_id)
+        if document is None:
+            return Response({"error": "Tournoi introuvable"},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response(document)
+
+
+class FormatMixteAPI(APIView):
+    def get_permissions(self):
+        # Lecture publique ; le démarrage est réservé à l'organisateur
+        if self.request.method == 'POST':
+            return [(EstAdministrateur | EstOrganisateurDuTournoi)()]
+        return super().get_permissions()
+
+    def get(self, request, tournoi_id):
+        """Avancement du format mixte et classement de la phase suisse."""
+        format_mixte = FormatMixte.objects.filter(
+            tournoi_id=tournoi_id).first()
+        if format_mixte is None:
+            return Response({"error": "Format mixte non démarré"},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "phase": format_mixte.phase,
+            "ronde": format_mixte.ronde_courante,
+            "nb_rondes": format_mixte.nb_rondes,
+            "nb_qualifies": format_mixte.nb_qualifies,
+            "classement": suisse.classement(tournoi_id),
+        })
+
+    def post(self, request, tournoi_id):
+        """
+        Démarre le format mixte et crée la première ronde suisse
+        Attend en paramètres:
+        - equipes (liste d'ids, dans l'ordre des têtes de série ; par
+          défaut les inscriptions confirmées, par ordre d'arrivée)
+        - nb_rondes (optionnel, log2 du nombre d'équipes par défaut)
+        - nb_qualifies (optionnel, 8 par défaut)
+        - date_heure (optionnel, début du tournoi par défaut)
+        """
+        try:
+            tournoi = Tournoi.objects.get(pk=tournoi_id)
+        except Tournoi.DoesNotExist:
+            return Response({"error": "Tournoi introuvable"},
+                            status=status.HTTP_404_NOT_FOUND)
+        equipes = request.data.get("equipes")
+        if equipes is None:
+            equipes = list(Inscription.objects.filter(
+                tournoi=tournoi, statut='confirmee').order_by(
+                'date_inscription').values_list('equipe_id', flat=True))
+        nb_rondes = request.data.get("nb_rondes")
+        nb_qualifies = request.data.get("nb_qualifies", 8)
+        date_heure = request.data.get("date_heure")
+        if (not isinstance(equipes, list)
+                or not all(isinstance(e, int) for e in equipes)
+                or not isinstance(nb_qualifies, int)
+                or not isinstance(nb_rondes, (int, type(None)))):
+            return Response({"error": "Paramètres invalides"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if date_heure is not None:
+            date_heure = parse_datetime(str(date_heure))
+            if date_heure is None:
+                return Response({"error": "date_heure invalide"},
+                                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            _, rencontres = suisse.demarrer(
+                tournoi, equipes, nb_rondes=nb_rondes,
+                nb_qualifies=nb_qualifies, date_heure=date_heure)
+        except ValidationError as e:
+            return Response({"error": e.messages},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "status": "success",
+            "rencontres": [
+                {"equipe1": r.equipe1_id, "equipe2": r.equipe2_id,
+                 "ronde": r.ronde}
+                for r in rencontres
+            ],
+        }, status=status.HTTP_201_CREATED)
+
+
+class InscriptionsAPI(APIView):
+    def get_permissions(self):
+        # La capacité est réservée à l'organisateur, l'inscription au
+        # capitaine ou à l'organisateur de l'équipe
+        if self.request.method == 'PUT':
+            return [(EstAdministrateur | EstOrganisateurDuTournoi)()]
+        if self.request.method == 'POST':
+            return [(EstAdministrateur | EstResponsableDeLEquipe)()]
+        return super().get_permissions()
+
+    def get(self, request, tournoi_id):
+        """Places du tournoi et équipes inscrites (hors annulations)."""
+        return Response({
+            **inscriptions.places(tournoi_id),
+            "inscriptions": list(Inscription.objects.filter(
+                tournoi_id=tournoi_id).exclude(statut='annulee').order_by(
+                'date_inscription').values(
+                'id', 'equipe_id', 'statut', 'paiement_id', 'date_inscription')),
+        })
+
+    def post(self, request, tournoi_id):
+        """
+        Inscrit une équipe au tournoi
+        Attend en paramètres:
+        - equipe (int)
+        - joueur (int, optionnel): payeur, le capitaine par défaut
+        - methode (string, optionnel): méthode de paiement, 'carte' par défaut
+        Répond 409 si le tournoi est complet.
+        """
+        equipe = request.data.get("equipe")
+        joueur = request.data.get("joueur")
+        methode = request.data.get("methode", "carte")
+        if (not isinstance(equipe, int)
+                or not isinstance(joueur, (int, type(None)))
+                or methode not in dict(Paiement.METHODE_CHOICES)):
+            return Response({"error": "Paramètres invalides"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            inscription = inscriptions.inscrire(
+                tournoi_id, equipe, joueur_id=joueur, methode=methode)
+        except ValidationError as e:
+            return Response({"error": e.messages},
+                            status=status.HTTP_400_BAD_REQUEST)
+        except inscriptions.TournoiComplet as e:
+            return Response({"error": str(e)},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({
+            "status": "success",
+            "inscription": {"id": inscription.pk,
+                            "statut": inscription.statut,
+                            "paiement_id": inscription.paiement_id},
+        }, status=status.HTTP_201_CREATED)
+
+    def put(self, request, tournoi_id):
+        """Fixe la capacité du tournoi (null pour la supprimer)."""
+        capacite = request.data.get("capacite")
+        if capacite is not None and (not isinstance(capacite, int)
+                                     or capacite < 0):
+            return Response({"error": "Capacité invalide"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            inscriptions.definir_capacite(tournoi_id, capacite)
+        except ValidationError as e:
+            return Response({"error": e.messages},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(inscriptions.places(tournoi_id))
+
+
+class ImportEffectifsAPI(APIView):
+    permission_classes = [EstAdministrateur | EstOrganisateur]
+
+    def post(self, request, organisateur_id):
+        """
+        Importe des effectifs dans les équipes de l'organisateur
+        Attend soit un fichier CSV `fichier` (colonnes email, equipe, role),
+        soit `lignes`: [{"email", "equipe", "role"}, ...].
+        Répond avec le nombre de lignes par statut et le résultat de
+        chaque ligne (voir effectifs.py).
+        """
+        fichier = request.FILES.get("fichier")
+        if fichier is not None:
+            lignes = effectifs.lire_csv(
+                io.TextIOWrapper(fichier, encoding='utf-8-sig', newline=''))
+        else:
+            lignes = request.data.get("lignes")
+            if not isinstance(lignes, list) or not all(
+                    isinstance(ligne, dict) for ligne in lignes):
+                return Response({"error": "Fichier ou lignes attendus"},
+                                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            resume, resultats = effectifs.importer(organisateur_id, lignes)
+        except (UnicodeDecodeError, csv.Error) as e:
+            return Response({"error": f"Fichier illisible: {e}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"resume": resume, "lignes": resultats})
+
+
+class AnnulationInscriptionAPI(APIView):
+    permission_classes = [EstAdministrateur | EstOrganisateurDuTournoi]
+
+    def post(self, request, inscription_id):
+        """Annule une inscription et libère sa place."""
+        if not inscriptions.annuler(inscription_id):
+            return Response({"error": "Inscription introuvable ou déjà annulée"},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({"status": "success"})
+
+
+class SaisieScoresAPI(APIView):
+    permission_classes = [EstArbitre | EstAdministrateur]
+
+    def post(self, request):
+        """
+        Saisie des scores d'une série de rencontres en une transaction
+        Attend en paramètres:
+        - rencontres (liste): {id, version, score1, score2, statut}
+        Un arbitre ne saisit que ses rencontres (403 sinon), 404 si une
+        rencontre n'existe pas. Répond 409 avec les versions actuelles si
+        une rencontre a été modifiée depuis sa lecture ; rien n'est alors
+        enregistré.
+        """
+        if not isinstance(request.data, dict):
+            return Response({"error": "Objet JSON attendu"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        arbitre_id = (None if EstAdministrateur().has_permission(request, self)
+                      else request.user.pk)
+        try:
+            rencontres = scores.enregistrer_scores(
+                request.data.get("rencontres"), arbitre_id=arbitre_id)
+        except ValidationError as e:
+            return Response({"error": e.messages},
+                            status=status.HTTP_400_BAD_REQUEST)
+        except PermissionDenied as e:
+            return Response({"error": str(e)},
+                            status=status.HTTP_403_FORBIDDEN)
+        except scores.RencontresIntrouvables as e:
+            return Response({"error": str(e), "rencontres": e.ids},
+                            status=status.HTTP_404_NOT_FOUND)
+        except scores.ConflitVersion as e:
+            return Response(
+                {"error": str(e), "conflits": e.conflits},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({
+            "status": "success",
+            "rencontres": [
+                {"id": r.pk, "version": r.version, "statut": r.statut,
+                 "score1": r.score1, "score2": r.score2}
+                for r in rencontres
+            ],
+        })
+
+
+class AbonnementCalendrierAPI(APIView):
+    """
+    URL d'abonnement à un flux iCalendar, propre à l'utilisateur
+    Attend en paramètres:
+    - type (string): equipe, joueur, arbitre ou tournoi
+    - id (int)
+    Les flux joueur et arbitre sont réservés à l'intéressé.
+    """
+    permission_classes = [EstAdministrateur | EstAbonnableAuFlux]
+
+    def post(self, request):
+        type_flux, objet_id = request.data.get("type"), request.data.get("id")
+        if (type_flux not in calendrier.TYPES_FLUX
+                or isinstance(objet_id, bool) or not isinstance(objet_id, int)):
+            return Response({"error": "Paramètres invalides"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        jeton = calendrier.jeton(type_flux, objet_id, request.user.pk)
+        return Response({
+            "url": request.build_absolute_uri(
+                reverse('flux-calendrier', args=[jeton])),
+        }, status=status.HTTP_201_CREATED)
+
+
+def _version_calendrier(request, flux):
+    # Calculée une fois par requête pour l'ETag et le Last-Modified
+    if not hasattr(request, '_version_calendrier'):
+        request._version_calendrier = calendrier.version(*flux)
+    return request._version_calendrier
+
+
+@require_GET
+@condition(
+    etag_func=lambda request, flux: _version_calendrier(request, flux)[0],
+    last_modified_func=lambda request, flux: _version_calendrier(
+        request, flux)[1],
+)
+def flux_calendrier(request, flux):
+    """
+    Flux iCalendar d'une équipe, d'un joueur, d'un arbitre ou d'un tournoi,
+    désigné par un jeton d'abonnement (voir AbonnementCalendrierAPI).
+    Les requêtes conditionnelles (If-None-Match / If-Modified-Since)
+    reçoivent un 304 tant qu'aucune rencontre du flux n'a changé.
+    """
+    type_flux, objet_id = flux
+    etag, derniere_maj = _version_calendrier(request, flux)
+    corps = calendrier.corps_en_cache(type_flux, objet_id, etag)
+    if corps is not None:
+        response = HttpResponse(corps, content_type='text/calendar; charset=utf-8')
+    else:
+        response = StreamingHttpResponse(
+            calendrier.generer_et_cacher(type_flux, objet_id, etag, derniere_maj),
+            content_type='text/calendar; charset=utf-8')
+    response['Cache-Control'] = 'private, max-age=300'
+    return response
+
+
+class RencontresAPI(APIView):
+    """
+    Liste des rencontres en lecture seule, sérialisée sans ModelSerializer
+    Paramètres optionnels: tournoi, equipe, joueur, limit (max 10000),
+    fields=id,nom,... pour ne recevoir que certains champs et
+    include=equipe1,arbitre.utilisateur,... pour imbriquer des relations
+    (voir inclusions.INCLUSIONS_AUTORISEES).
+    Répond en JSON (orjson) ou en MessagePack selon l'en-tête Accept.
+    Avec le partitionnement, une liste qui n'est pas limitée à un tournoi
+    ou une équipe est lue sur tous les shards en parallèle.
+    """
+    renderer_classes = renderers.RENDERERS_RAPIDES
+    LIMITE_MAX = 10000
+
+    def get(self, request):
+        queryset = Rencontre.objects.order_by('date_heure', 'pk')
+        tournoi = request.query_params.get('tournoi')
+        equipe = request.query_params.get('equipe')
+        joueur = request.query_params.get('joueur')
+        limite = request.query_params.get('limit', '1000')
+        for valeur in (tournoi, equipe, joueur, limite):
+            if valeur is not None and not valeur.isdigit():
+                return Response({"error": f"Paramètre invalide: {valeur}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+        if tournoi:
+            queryset = queryset.filter(tournoi_id=tournoi)
+        if equipe:
+            queryset = queryset.filter(
+                Q(equipe1_id=equipe) | Q(equipe2_id=equipe))
+        if joueur:
+            equipes = JoueurEquipe.objects.filter(
+                joueur_id=joueur).values('equipe_id')
+            queryset = queryset.filter(
+                Q(equipe1_id__in=equipes) | Q(equipe2_id__in=equipes))
+        limite = min(int(limite), self.LIMITE_MAX)
+        queryset = queryset[:limite]
+        champs = champs_demandes(request)
+        disperse = shards.disperse()
+        try:
+            serialiseur = RencontreValeursSerializer(champs)
+            # La fusion des shards trie sur date_heure et id
+            lecture = RencontreValeursSerializer(
+                champs and list(dict.fromkeys(champs + ['date_heure', 'id']))
+            ) if disperse else serialiseur
+            plan = inclusions.planifier(
+                Rencontre, request.query_params.get('include'))
+        except serializers.ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except inclusions.InclusionInvalide as e:
+            return Response({"include": str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def lire():
+            if not plan.arbre:
+                return lecture.serialiser(queryset)
+            return [inclusions.serialiser(rencontre, plan.arbre)
+                    for rencontre in plan.appliquer(queryset)]
+
+        if disperse:
+            lignes = list(itertools.islice(heapq.merge(
+                *shards.rassembler(lire),
+                key=itemgetter('date_heure', 'id')), limite))
+        else:
+            lignes = lire()
+        if not plan.arbre and lecture is serialiseur:
+            return Response(lignes)
+        garder = set(serialiseur.selection) | set(plan.arbre)
+        return Response([
+            {cle: valeur for cle, valeur in ligne.items() if cle in garder}
+            for ligne in lignes
+        ])
+
+
+class EquipesAPI(APIView):
+    """
+    Liste des équipes, filtrable par organisateur
+    include=organisateur.utilisateur,joueurequipe_set.joueur.utilisateur
+    imbrique l'organisateur et l'effectif en un nombre borné de requêtes.
+    """
+    renderer_classes = renderers.RENDERERS_RAPIDES
+
+    def get(self, request):
+        queryset = Equipe.objects.order_by('nom', 'pk')
+        organisateur = request.query_params.get('organisateur')
+        if organisateur:
+            if not organisateur.isdigit():
+                return Response({"error": f"Paramètre invalide: {organisateur}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(organisateur_id=organisateur)
+        try:
+            plan = inclusions.planifier(
+                Equipe, request.query_params.get('include'))
+        except inclusions.InclusionInvalide as e:
+            return Response({"include": str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def lire():
+            return [inclusions.serialiser(equipe, plan.arbre)
+                    for equipe in plan.appliquer(queryset)]
+
+        if shards.disperse():
+            return Response(list(heapq.merge(
+                *shards.rassembler(lire), key=itemgetter('nom', 'id'))))
+        return Response(lire())
+
+
+class JetonProfilageAPI(APIView):
+    """Délivre un jeton qui active le profilage des requêtes qui le portent
+    (en-tête X-Profilage ou ?profilage=), voir profilage.py."""
+    permission_classes = [EstAdministrateur]
+
+    def post(self, request):
+        return Response({
+            "jeton": profilage.jeton(request.user.pk),
+            "expire_dans": profilage.duree_jeton(),
+        }, status=status.HTTP_201_CREATED)
+
+
+class ProfilsAPI(APIView):
+    """Profils de requêtes du tampon, du plus récent au plus ancien"""
+    permission_classes = [EstAdministrateur]
+
+    def get(self, request):
+        return Response(profilage.profils())
+
+
+class MetriquesConnexionsAPI(APIView):
+    """
+    Pools de connexions du processus qui répond, par base : prises,
+    attentes, connexions créées et remplacées après un contrôle.
+    """
+    permission_classes = [EstAdministrateur]
+
+    def get(self, request):
+        return Response(connexions.metriques())
+
+
+class ProfilAPI(APIView):
+    """
+    Un profil : résumé, requêtes SQL et fonctions les plus coûteuses ;
+    ?export=pstats télécharge le fichier .prof, ?export=speedscope le
+    profil échantillonné pour https://speedscope.app.
+    """
+    permission_classes = [EstAdministrateur]
+
+    def get(self, request, profil_id):
+        profil = profilage.profil(profil_id)
+        if profil is None:
+            return Response({"error": "Profil introuvable ou remplacé"},
+                            status=status.HTTP_404_NOT_FOUND)
+        export = request.query_params.get('export')
+        if export == 'pstats':
+            response = HttpResponse(profilage.en_pstats(profil),
+                                    content_type='application/octet-stream')
+            extension = 'prof'
+        elif export == 'speedscope':
+            response = HttpResponse(profilage.en_speedscope(profil),
+                                    content_type='application/json')
+            extension = 'speedscope.json'
+        elif export is None:
+            return Response({
+                **{cle: valeur for cle, valeur in profil.items()
+                   if cle not in ('stats', 'echantillons')},
+                'fonctions': profilage.fonctions(profil),
+            })
+        else:
+            return Response({"error": f"Export inconnu: {export}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        response['Content-Disposition'] = (
+            f'attachment; filename="profil-{profil_id}.{extension}"')
+        return response